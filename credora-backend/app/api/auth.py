@@ -1,20 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.security import get_password_hash, verify_password, create_access_token
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.core.auth import principal_claims
+from app.core.passwords import password_hasher
+from app.core.rate_limit import rate_limit
+from app.core.security import create_access_token
 from app.models.user import User
 from app.schemas.user import UserCreate, Token, UserResponse
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
 @router.post("/register", response_model=dict)
-async def register(user: UserCreate, db: Session = Depends(get_db)):
-    existing_user = db.query(User).filter(User.email == user.email).first()
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    existing_user = await db.scalar(select(User).where(User.email == user.email))
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await password_hasher.hash(user.password)
     new_user = User(
         email=user.email,
         full_name=user.full_name,
@@ -22,8 +26,8 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
         is_admin=False  # ← ADD THIS: New users are not admin by default
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
     # Return with is_admin field
     return {
@@ -34,21 +38,29 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
         "is_admin": new_user.is_admin  # ← ADD THIS
     }
 
-@router.post("/login", response_model=Token)
+@router.post("/login", response_model=Token, dependencies=[Depends(rate_limit("login", "10/minute"))])
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # OAuth2PasswordRequestForm uses 'username' field for email
-    db_user = db.query(User).filter(User.email == form_data.username).first()
-    if not db_user or not verify_password(form_data.password, db_user.hashed_password):
+    db_user = await db.scalar(select(User).where(User.email == form_data.username))
+    valid, new_hash = (False, None)
+    if db_user:
+        valid, new_hash = await password_hasher.verify_and_update(form_data.password, db_user.hashed_password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token = create_access_token(data={"sub": db_user.email, "user_id": db_user.id})
+    # Stored hash uses an old cost (BCRYPT_ROUNDS changed): replace it now that we have the password
+    if new_hash:
+        db_user.hashed_password = new_hash
+        await db.commit()
+    
+    access_token = create_access_token(data=principal_claims(db_user))
     
     user_response = UserResponse(
         id=db_user.id,
@@ -1,56 +1,63 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, defer, joinedload, load_only
+from typing import List, Optional, Tuple
+import asyncio
+import mimetypes
 import os
-import shutil
+import time
 from datetime import datetime
-from app.core.database import get_db
-from app.core.security import decode_token, oauth2_scheme
+from urllib.parse import quote
+from app.core.auth import Principal, get_admin_user, get_current_user, get_token_user
+from app.core.database import get_async_db, get_db
+from app.core.rate_limit import rate_limit
+from app.core.security import (
+    document_url_expiry, sign_document_url, verify_document_signature,
+)
 from app.models.loan_application import LoanApplication
 from app.models.fraud_check import FraudCheck
 from app.models.document import Document
 from app.models.user import User
-from app.schemas.loan import LoanApplicationCreate, LoanApplicationResponse
+from app.schemas.loan import LoanApplicationCreate, LoanApplicationResponse, LoanApplicationSummary
 from app.services.ml_service import ml_service
 from app.services.fraud_service import fraud_service
+from app.services.velocity_service import velocity_service
+from app.services.anomaly_service import anomaly_service
 from app.services.risk_service import risk_service
 from app.services.cibil_service import cibil_service
-from app.services.ocr_service import ocr_service
+from app.services.ocr_service import ocr_service, OCR_EXTENSIONS
+from app.services.document_features import extract_document_features
+from app.services.export_service import EXPORT_CHUNK_SIZE, ExportWriter, build_export_query, parse_columns
+from app.services.blob_store import blob_store
+from app.services.rendition_service import rendition_service, RENDITIONS_EAGER, RENDITION_SIZES
+from app.services.working_copy_service import working_copy_service
+from app.utils.uploads import DOCUMENT_TYPES, IMAGE_TYPES
+from app.utils.compression import is_compressed, iter_decompressed
+from app.utils.file_response import (
+    RangeFileResponse, RangeNotSatisfiable, accepts_encoding, etag_matches, parse_range,
+)
+from app.utils.pagination import decode_cursor, encode_cursor
 from app.api.websocket import manager
 import traceback
 import json
 
 router = APIRouter(prefix="/api/loan", tags=["Loan Application"])
 
-# Create upload directory if it doesn't exist
-UPLOAD_DIR = "uploads/documents"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+# Admin listing page size: default and the most a client may ask for
+ADMIN_PAGE_SIZE = int(os.getenv("ADMIN_PAGE_SIZE", 50))
+ADMIN_MAX_PAGE_SIZE = 200
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    payload = decode_token(token)
-    email: str = payload.get("sub")
-    if email is None:
-        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
-    
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
-        raise HTTPException(status_code=401, detail="User not found")
-    return user
-
-def get_admin_user(current_user: User = Depends(get_current_user)):
-    """Check if current user is admin"""
-    if not current_user.is_admin:
-        raise HTTPException(
-            status_code=403, 
-            detail="Access denied. Admin privileges required."
-        )
-    return current_user
+# Handlers on the sync Session are plain `def`, so FastAPI runs them (DB work,
+# ML inference, fraud rules) in its threadpool instead of on the event loop
 
-@router.post("/apply", response_model=dict)
-async def submit_loan_application(
+@router.post("/apply", response_model=dict, dependencies=[Depends(rate_limit("apply", "10/hour"))])
+def submit_loan_application(
     application: LoanApplicationCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Submit a new loan application"""
     
@@ -102,8 +109,10 @@ async def submit_loan_application(
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"Failed to submit application: {str(e)}")
 
-@router.post("/process/{application_id}", response_model=dict)
-async def process_application(
+@router.post(
+    "/process/{application_id}", response_model=dict, dependencies=[Depends(rate_limit("process", "20/hour"))]
+)
+def process_application(
     application_id: int,
     db: Session = Depends(get_db)
 ):
@@ -166,7 +175,13 @@ def _run_processing_pipeline(application: LoanApplication, db: Session) -> dict:
     print(f"✅ Loan prediction result: {loan_result}")
 
     documents = db.query(Document).filter(Document.application_id == application.id).all()
-    fraud_result = fraud_service.detect_fraud(app_data, documents)
+    velocity_flags = velocity_service.check_application(application, documents, db=db)
+    existing_fraud_check = db.query(FraudCheck).filter(FraudCheck.application_id == application.id).first()
+    # The streaming model learns from an application only the first time it is scored
+    anomaly_score = anomaly_service.score_and_update(app_data, learn=existing_fraud_check is None)
+    fraud_result = fraud_service.detect_fraud(
+        app_data, documents, extra_flags=velocity_flags, anomaly_score=anomaly_score
+    )
     print(f"✅ Fraud detection result: {fraud_result}")
 
     # Penalize AI Approval Score based on Fraud Score
@@ -194,19 +209,22 @@ def _run_processing_pipeline(application: LoanApplication, db: Session) -> dict:
     application.ai_reasoning = ai_reasoning
     application.status = "UNDER_REVIEW"
 
-    existing_fraud_check = db.query(FraudCheck).filter(FraudCheck.application_id == application.id).first()
     if existing_fraud_check:
         existing_fraud_check.fraud_score = fraud_result['fraud_score']
         existing_fraud_check.is_fraudulent = fraud_result['is_fraudulent']
         existing_fraud_check.anomaly_detected = fraud_result['anomaly_detected']
+        existing_fraud_check.anomaly_score = fraud_result['anomaly_score']
         existing_fraud_check.fraud_flags = fraud_result['fraud_flags']
+        existing_fraud_check.rule_set_version = fraud_result['rule_set_version']
     else:
         db.add(FraudCheck(
             application_id=application.id,
             fraud_score=fraud_result['fraud_score'],
             is_fraudulent=fraud_result['is_fraudulent'],
             anomaly_detected=fraud_result['anomaly_detected'],
-            fraud_flags=fraud_result['fraud_flags']
+            anomaly_score=fraud_result['anomaly_score'],
+            fraud_flags=fraud_result['fraud_flags'],
+            rule_set_version=fraud_result['rule_set_version']
         ))
 
     db.commit()
@@ -220,30 +238,115 @@ def _run_processing_pipeline(application: LoanApplication, db: Session) -> dict:
         "ai_reasoning": ai_reasoning
     }
 
-@router.post("/documents/{application_id}")
+async def _ingest_document(
+    doc_type: str, file_path: str, full_name: Optional[str] = None, content_sha256: Optional[str] = None
+) -> Tuple[Optional[str], dict, Optional[str]]:
+    """
+    Build a bounded working copy of a saved document, OCR it (photos are
+    never OCRed) and build its fraud features. Returns the working copy
+    path too (None when the original is used as is).
+    """
+    working_path = None
+    if content_sha256:
+        working_path = await run_in_threadpool(working_copy_service.create, file_path, content_sha256)
+    analysis_path = working_path or file_path
+
+    ocr_text = None
+    if doc_type != "photo" and os.path.splitext(analysis_path)[1].lower() in OCR_EXTENSIONS:
+        # The applicant's name lets identity/address OCR stop once it's been found.
+        # The original's hash only identifies the original, so a working copy is hashed itself
+        ocr_text = await ocr_service.extract_text_async(
+            analysis_path, doc_type, hints={"full_name": full_name},
+            content_sha256=None if working_path else content_sha256,
+        )
+    ocr_features = await run_in_threadpool(extract_document_features, ocr_text, doc_type, analysis_path)
+    return ocr_text, ocr_features, working_path
+
+def _get_user_application(db: Session, application_id: int, user_id: int) -> Optional[LoanApplication]:
+    return db.query(LoanApplication).filter(
+        LoanApplication.id == application_id,
+        LoanApplication.user_id == user_id
+    ).first()
+
+
+def _save_documents(db: Session, application_id: int, documents_to_upload: dict, saved_files: dict, ingested: list):
+    """
+    Take blob references and create/update the Document rows of an upload,
+    then commit. Returns the uploaded document summaries and the blobs whose
+    last reference was released (for remove_unreferenced after the commit).
+    """
+    uploaded_docs = []
+    # Blobs of replaced files; released only after every new reference is taken,
+    # so a file that merely moves between document types never hits zero
+    replaced_shas = []
+    for (doc_type, file), (ocr_text, ocr_features, working_path) in zip(documents_to_upload.items(), ingested):
+        saved = saved_files[doc_type]
+        blob = blob_store.acquire(
+            db, saved["sha256"], saved["path"], saved["size"], saved["content_type"], keep_path=saved["keep_path"]
+        )
+        # The content may already be stored (compressed) under another path
+        file_path = saved["path"] = blob.file_path
+        
+        # Check if document already exists for this type
+        existing_doc = db.query(Document).filter(
+            Document.application_id == application_id,
+            Document.document_type == doc_type
+        ).first()
+
+        if existing_doc:
+            # Update existing document; the replaced file loses a reference
+            replaced_shas.append(existing_doc.content_sha256)
+            existing_doc.file_name = file.filename
+            existing_doc.file_path = file_path
+            existing_doc.content_sha256 = saved["sha256"]
+            existing_doc.file_size = saved["size"]
+            existing_doc.working_file_path = working_path
+            existing_doc.ocr_extracted_text = ocr_text
+            existing_doc.ocr_features = ocr_features
+            existing_doc.is_verified = True # Corrected field name
+        else:
+            # Create new document
+            document = Document(
+                application_id=application_id,
+                document_type=doc_type,
+                file_name=file.filename,
+                file_path=file_path,
+                content_sha256=saved["sha256"],
+                file_size=saved["size"],
+                working_file_path=working_path,
+                ocr_extracted_text=ocr_text,
+                ocr_features=ocr_features,
+                is_verified=True # Corrected field name
+            )
+            db.add(document)
+        uploaded_docs.append({
+            'type': doc_type,
+            'filename': file.filename,
+            'path': file_path
+        })
+
+    released_blobs = blob_store.release_many(db, replaced_shas)
+    db.commit()
+    return uploaded_docs, released_blobs
+
+@router.post("/documents/{application_id}", dependencies=[Depends(rate_limit("upload", "30/hour"))])
 async def upload_documents(
     application_id: int,
+    background_tasks: BackgroundTasks,
     identityProof: UploadFile = File(...),
     addressProof: UploadFile = File(...),
     incomeProof: UploadFile = File(...),
     photo: UploadFile = File(...),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Upload application documents"""
     
-    application = db.query(LoanApplication).filter(
-        LoanApplication.id == application_id,
-        LoanApplication.user_id == current_user.id
-    ).first()
+    application = await run_in_threadpool(_get_user_application, db, application_id, current_user.id)
     
     if not application:
         raise HTTPException(status_code=404, detail="Application not found")
     
-    # Create application-specific directory
-    app_dir = os.path.join(UPLOAD_DIR, f"app_{application_id}")
-    os.makedirs(app_dir, exist_ok=True)
-    
     documents_to_upload = {
         'identity_proof': identityProof,
         'address_proof': addressProof,
@@ -252,60 +355,41 @@ async def upload_documents(
     }
     
     uploaded_docs = []
+    saved_files = {}
+    committed = False
     
     try:
         for doc_type, file in documents_to_upload.items():
-            # Generate unique filename
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            file_extension = os.path.splitext(file.filename)[1]
-            new_filename = f"{doc_type}_{timestamp}{file_extension}"
-            file_path = os.path.abspath(os.path.join(app_dir, new_filename))
-            
-            # Save file
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-
-            # Extract OCR text for supported types (images & PDFs)
-            ocr_text = None
-            if file_extension.lower() in [".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp", ".pdf"]:
-                ocr_text = ocr_service.extract_text(file_path)
-            
-            # Check if document already exists for this type
-            existing_doc = db.query(Document).filter(
-                Document.application_id == application_id,
-                Document.document_type == doc_type
-            ).first()
-
-            if existing_doc:
-                # Update existing document
-                existing_doc.file_name = file.filename
-                existing_doc.file_path = file_path
-                existing_doc.ocr_extracted_text = ocr_text
-                existing_doc.is_verified = True # Corrected field name
-            else:
-                # Create new document
-                document = Document(
-                    application_id=application_id,
-                    document_type=doc_type,
-                    file_name=file.filename,
-                    file_path=file_path,
-                    ocr_extracted_text=ocr_text,
-                    is_verified=True # Corrected field name
-                )
-                db.add(document)
-            uploaded_docs.append({
-                'type': doc_type,
-                'filename': file.filename,
-                'path': file_path
-            })
+            # Stream into the content-addressed blob store (hash, size and
+            # type checked on the way)
+            saved_files[doc_type] = await blob_store.ingest(
+                file, allowed_types=IMAGE_TYPES if doc_type == "photo" else DOCUMENT_TYPES
+            )
 
-        db.commit()
+        # OCR + feature extraction for all documents concurrently on the bounded OCR pool;
+        # everything is gathered before touching the DB. The upload's own copy is read,
+        # since the shared blob file may be garbage collected until acquire()
+        ingested = await asyncio.gather(*(
+            _ingest_document(doc_type, saved["keep_path"], current_user.full_name, saved["sha256"])
+            for doc_type, saved in saved_files.items()
+        ))
+
+        # The sync Session's work runs in the threadpool, one step at a time
+        uploaded_docs, released_blobs = await run_in_threadpool(
+            _save_documents, db, application_id, documents_to_upload, saved_files, ingested
+        )
+        committed = True
+        await run_in_threadpool(blob_store.remove_unreferenced, db, released_blobs)
+        if RENDITIONS_EAGER:
+            # Thumbnails/previews for the admin review screen, after the response is sent
+            for saved, (_, _, working_path) in zip(saved_files.values(), ingested):
+                background_tasks.add_task(rendition_service.generate, working_path or saved["path"], saved["sha256"])
 
         # Re-run processing after document upload so fraud flags are not stuck as MISSING_*
         # if the user previously hit "/process" before uploading docs.
         try:
-            db.refresh(application)
-            _run_processing_pipeline(application, db)
+            await run_in_threadpool(db.refresh, application)
+            await run_in_threadpool(_run_processing_pipeline, application, db)
         except HTTPException:
             raise
         except Exception as e:
@@ -319,22 +403,30 @@ async def upload_documents(
         }
         
     except Exception as e:
+        if not committed:
+            # Nothing references blobs this request created; don't leave them behind
+            await run_in_threadpool(db.rollback)
+            await run_in_threadpool(blob_store.discard, db, list(saved_files.values()))
+        if isinstance(e, HTTPException):
+            raise
         print(f"Error uploading documents: {str(e)}")
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"Failed to upload documents: {str(e)}")
 
+
 @router.get("/documents/{application_id}")
 async def get_application_documents(
     application_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_token_user)
 ):
     """Get all documents for an application"""
     
     # Check if user owns the application or is admin
-    application = db.query(LoanApplication).filter(
-        LoanApplication.id == application_id
-    ).first()
+    application = (await db.execute(
+        select(LoanApplication.id, LoanApplication.user_id).where(LoanApplication.id == application_id)
+    )).first()
     
     if not application:
         raise HTTPException(status_code=404, detail="Application not found")
@@ -343,51 +435,283 @@ async def get_application_documents(
     if application.user_id != current_user.id and not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Access denied")
     
-    documents = db.query(Document).filter(
+    # Only the columns the listing needs (OCR features stay in the database)
+    documents = (await db.scalars(select(Document).options(load_only(
+        Document.id, Document.file_name, Document.document_type, Document.content_sha256, Document.uploaded_at
+    )).where(
         Document.application_id == application_id
-    ).all()
-    
-    print(f"📄 Found {len(documents)} documents for application {application_id}")
+    ))).all()
     
-    # Convert to response format
+    # Convert to response format. URLs are short-lived and signed, so they can be
+    # used directly in <img>/<a> tags; the expiry is bucketed so the same URL is
+    # handed out for a while and browser caches get hits.
+    expires = document_url_expiry()
     docs_response = []
     for doc in documents:
-        # Create proper URL for frontend access
-        file_url = f'http://localhost:8000/uploads/documents/app_{application_id}/{os.path.basename(doc.file_path)}'
-        
-        # Debug: Check if file exists
-        if os.path.exists(doc.file_path):
-            print(f"✅ File exists: {doc.file_path}")
-        else:
-            print(f"❌ File NOT found: {doc.file_path}")
+        file_url = request.url_for("get_document_file", document_id=doc.id).include_query_params(
+            expires=expires, sig=sign_document_url(doc.id, doc.content_sha256, expires)
+        )
         
         docs_response.append({
             'id': doc.id,
             'name': doc.file_name,
             'type': doc.document_type,
-            'url': file_url,
+            'url': str(file_url),
+            # Small WebP renditions for lists and viewers (first page for PDFs)
+            'thumbnail_url': str(file_url.include_query_params(rendition="thumbnail")) if doc.content_sha256 else None,
+            'preview_url': str(file_url.include_query_params(rendition="preview")) if doc.content_sha256 else None,
             'uploaded_at': doc.uploaded_at.isoformat() if doc.uploaded_at else None
         })
     
     return docs_response
 
+@router.api_route("/files/{document_id}", methods=["GET", "HEAD"], name="get_document_file")
+async def get_document_file(
+    document_id: int,
+    expires: int,
+    sig: str,
+    request: Request,
+    rendition: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Serve a document file through a signed URL from GET /documents/{application_id}.
+    Pass rendition=thumbnail|preview for a small WebP rendition instead of the original.
+    Supports If-None-Match (strong ETag) and single byte Range requests. Documents
+    gzipped by the tiering job are served transparently (see app.tasks.tiering).
+    """
+    document = await db.scalar(select(Document).options(load_only(
+        Document.id, Document.file_name, Document.file_path, Document.working_file_path,
+        Document.content_sha256, Document.file_size,
+    )).where(Document.id == document_id))
+    # Give the connection back before streaming what may be a large file
+    await db.close()
+    if not document or not verify_document_signature(document.id, document.content_sha256, expires, sig):
+        raise HTTPException(status_code=403, detail="Invalid or expired document link")
+
+    file_path = document.file_path
+    media_type = mimetypes.guess_type(document.file_path)[0]
+    filename = document.file_name
+    if rendition is not None:
+        if rendition not in RENDITION_SIZES or not document.content_sha256:
+            raise HTTPException(status_code=404, detail="Rendition not available")
+        file_path = await run_in_threadpool(
+            rendition_service.get, document.working_file_path or document.file_path, document.content_sha256, rendition
+        )
+        if file_path is None:
+            raise HTTPException(status_code=404, detail="Rendition not available")
+        media_type = "image/webp"
+        filename = f"{os.path.splitext(document.file_name)[0]}_{rendition}.webp"
+
+    try:
+        stat_result = await run_in_threadpool(os.stat, file_path)
+    except OSError:
+        raise HTTPException(status_code=404, detail="Document file not found")
+
+    # Tiered documents are stored gzipped: sent as stored to clients that accept
+    # gzip, decompressed on the fly for everyone else
+    compressed = rendition is None and is_compressed(file_path)
+    send_gzip = compressed and accepts_encoding(request.headers.get("accept-encoding"), "gzip")
+
+    if document.content_sha256:
+        etag = f'"{document.content_sha256}"' if rendition is None else f'"{document.content_sha256}-{rendition}"'
+        if send_gzip:
+            etag = f'"{document.content_sha256}-gzip"'
+    else:
+        etag = f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+    # The URL is bound to this exact content and expiry, so it never needs revalidating
+    headers = {
+        "etag": etag,
+        "cache-control": f"private, max-age={max(expires - int(time.time()), 0)}, immutable",
+    }
+    if compressed:
+        headers["vary"] = "accept-encoding"
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if compressed and not send_gzip:
+        # No random access into gzip data, so ranges are not offered (always 200)
+        headers["accept-ranges"] = "none"
+        headers["content-disposition"] = f"inline; filename*=utf-8''{quote(filename)}"
+        if document.file_size is not None:
+            headers["content-length"] = str(document.file_size)
+        if request.method == "HEAD":
+            return Response(headers=headers, media_type=media_type)
+        return StreamingResponse(iter_decompressed(file_path), headers=headers, media_type=media_type)
+    if send_gzip:
+        headers["content-encoding"] = "gzip"
+
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    if not if_range or if_range.strip() == etag:
+        try:
+            byte_range = parse_range(request.headers.get("range"), stat_result.st_size)
+        except RangeNotSatisfiable:
+            return Response(
+                status_code=416, headers={**headers, "content-range": f"bytes */{stat_result.st_size}"}
+            )
+
+    return RangeFileResponse(
+        file_path,
+        stat_result.st_size,
+        byte_range=byte_range,
+        headers=headers,
+        media_type=media_type,
+        filename=filename,
+        send_body=request.method != "HEAD",
+    )
+
 # ============ ADMIN-ONLY ENDPOINTS ============
 
-@router.get("/admin/all-applications", response_model=List[LoanApplicationResponse])
+@router.get("/admin/all-applications", response_model=List[LoanApplicationSummary])
 async def get_all_applications(
-    db: Session = Depends(get_db),
-    admin_user: User = Depends(get_admin_user)  # ← ADMIN PROTECTION
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(ADMIN_PAGE_SIZE, ge=1, le=ADMIN_MAX_PAGE_SIZE),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    status: Optional[str] = None,
+    final_decision: Optional[str] = None,
+    min_fraud_score: Optional[float] = None,
+    max_fraud_score: Optional[float] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    user_id: Optional[int] = None,
+    search: Optional[str] = Query(None, max_length=100),
+    db: AsyncSession = Depends(get_async_db),
+    admin_user: Principal = Depends(get_admin_user)  # ← ADMIN PROTECTION
 ):
-    """Admin: Get all applications from all users"""
+    """
+    Admin: List applications from all users, newest first (order=asc for oldest).
+    Returns one page; when there are more, the X-Next-Cursor response header holds
+    the cursor for the next one. ai_reasoning is omitted (see /status/{id}).
+    search matches the application id or the applicant's name or email.
+    """
     
     print(f"✅ Admin {admin_user.email} accessing all applications")
     
-    # Eagerly load user relationship
-    from sqlalchemy.orm import joinedload
-    applications = db.query(LoanApplication).options(joinedload(LoanApplication.user)).all()
-    
+    query = _filter_applications(
+        select(LoanApplication), status, final_decision, min_fraud_score, max_fraud_score,
+        created_from, created_to, user_id, search,
+    )
+    sort_key = tuple_(LoanApplication.created_at, LoanApplication.id)
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(sort_key > after if order == "asc" else sort_key < after)
+    if order == "asc":
+        query = query.order_by(LoanApplication.created_at.asc(), LoanApplication.id.asc())
+    else:
+        query = query.order_by(LoanApplication.created_at.desc(), LoanApplication.id.desc())
+
+    # Eagerly load user relationship (no lazy loads on an async session); one extra
+    # row tells whether another page follows
+    applications = (await db.scalars(
+        query.options(joinedload(LoanApplication.user), defer(LoanApplication.ai_reasoning)).limit(limit + 1)
+    )).all()
+    
+    if len(applications) > limit:
+        applications = applications[:limit]
+        last = applications[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
     return applications
 
+@router.get("/admin/application-counts", response_model=dict)
+async def get_application_counts(
+    search: Optional[str] = Query(None, max_length=100),
+    db: AsyncSession = Depends(get_async_db),
+    admin_user: Principal = Depends(get_admin_user)
+):
+    """Admin: Number of applications per status (for the dashboard tiles), one GROUP BY."""
+    query = _filter_applications(
+        select(LoanApplication.status, func.count()).select_from(LoanApplication), search=search
+    ).group_by(LoanApplication.status)
+    by_status = {status: count for status, count in (await db.execute(query)).all()}
+    return {"total": sum(by_status.values()), "by_status": by_status}
+
+@router.get("/admin/export")
+async def export_applications(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    columns: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    status: Optional[str] = None,
+    gzip: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    admin_user: Principal = Depends(get_admin_user)
+):
+    """
+    Admin: Stream applications with their fraud checks and decisions as NDJSON or
+    CSV (gzip=true for a .gz file). columns is a comma-separated subset of
+    EXPORT_COLUMNS; created_from/created_to filter on creation time.
+    """
+    try:
+        column_names = parse_columns(columns)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    writer = ExportWriter(column_names, format, compress=gzip)
+    query = build_export_query(column_names, created_from, created_to, status)
+    # The stream owns its connection rather than the request's session, which may be
+    # closed before the body has been sent
+    export_engine = db.bind
+
+    async def stream():
+        yield writer.header()
+        async with export_engine.connect() as connection:
+            # Server-side cursor; only one chunk of rows is in memory at a time
+            result = await connection.stream(query.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+            async for rows in result.partitions():
+                yield writer.rows(rows)
+        yield writer.finish()
+
+    print(f"✅ Admin {admin_user.email} exporting applications ({format}, {len(column_names)} columns)")
+    filename = f"applications_{datetime.utcnow():%Y%m%d_%H%M%S}{writer.extension}"
+    return StreamingResponse(
+        stream(),
+        media_type=writer.media_type,
+        headers={"content-disposition": f'attachment; filename="{filename}"'},
+    )
+
+def _filter_applications(
+    query,
+    status: Optional[str] = None,
+    final_decision: Optional[str] = None,
+    min_fraud_score: Optional[float] = None,
+    max_fraud_score: Optional[float] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    user_id: Optional[int] = None,
+    search: Optional[str] = None,
+):
+    """Apply the admin listing filters (all optional) to a LoanApplication select."""
+    if status:
+        query = query.where(LoanApplication.status == status)
+    if final_decision:
+        query = query.where(LoanApplication.final_decision == final_decision)
+    if min_fraud_score is not None:
+        query = query.where(LoanApplication.fraud_score >= min_fraud_score)
+    if max_fraud_score is not None:
+        query = query.where(LoanApplication.fraud_score <= max_fraud_score)
+    if created_from:
+        query = query.where(LoanApplication.created_at >= created_from)
+    if created_to:
+        query = query.where(LoanApplication.created_at < created_to)
+    if user_id is not None:
+        query = query.where(LoanApplication.user_id == user_id)
+    search = (search or "").strip()
+    if search:
+        pattern = f"%{search}%"
+        # Subquery rather than a join, so it composes with joinedload(LoanApplication.user)
+        matches = [LoanApplication.user_id.in_(
+            select(User.id).where(or_(User.full_name.ilike(pattern), User.email.ilike(pattern)))
+        )]
+        if search.isdigit():
+            matches.append(LoanApplication.id == int(search))
+        query = query.where(or_(*matches))
+    return query
+
 def _generate_ai_reasoning(loan_result: dict, fraud_result: dict, risk_result: dict, app_data: dict) -> str:
     """Generate human-readable AI reasoning for admin review"""
     
@@ -479,17 +803,15 @@ def _generate_ai_reasoning(loan_result: dict, fraud_result: dict, risk_result: d
 async def review_application(
     application_id: int,
     decision: str = Form(...),
-    db: Session = Depends(get_db),
-    admin_user: User = Depends(get_admin_user)  # ← ADMIN PROTECTION
+    db: AsyncSession = Depends(get_async_db),
+    admin_user: Principal = Depends(get_admin_user)  # ← ADMIN PROTECTION
 ):
     """Admin: Approve or reject an application after review"""
     
     if decision not in ["APPROVED", "REJECTED"]:
         raise HTTPException(status_code=400, detail="Decision must be 'APPROVED' or 'REJECTED'")
     
-    application = db.query(LoanApplication).filter(
-        LoanApplication.id == application_id
-    ).first()
+    application = await db.get(LoanApplication, application_id)
     
     if not application:
         raise HTTPException(status_code=404, detail="Application not found")
@@ -498,7 +820,7 @@ async def review_application(
     application.status = decision
     application.final_decision = decision
     
-    db.commit()
+    await db.commit()
     
     print(f"✅ Admin {admin_user.email} {decision} application #{application_id}")
     
@@ -524,9 +846,9 @@ async def review_application(
     }
 
 @router.post("/admin/retrain", response_model=dict)
-async def trigger_model_retraining(
+def trigger_model_retraining(
     db: Session = Depends(get_db),
-    admin_user: User = Depends(get_admin_user)
+    admin_user: Principal = Depends(get_admin_user)
 ):
     """Admin: Retrain the ML model using historical decisions"""
     from app.services.ml_service import ml_service
@@ -556,26 +878,20 @@ async def trigger_model_retraining(
 @router.get("/status/{application_id}", response_model=LoanApplicationResponse)
 async def get_application_status(
     application_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_token_user)
 ):
     """Get application status"""
     
     # Eagerly load user relationship
-    from sqlalchemy.orm import joinedload
+    query = select(LoanApplication).options(
+        joinedload(LoanApplication.user)
+    ).where(LoanApplication.id == application_id)
     
     # Allow user to see their own OR admin to see any
-    if current_user.is_admin:
-        application = db.query(LoanApplication).options(
-            joinedload(LoanApplication.user)
-        ).filter(LoanApplication.id == application_id).first()
-    else:
-        application = db.query(LoanApplication).options(
-            joinedload(LoanApplication.user)
-        ).filter(
-            LoanApplication.id == application_id,
-            LoanApplication.user_id == current_user.id
-        ).first()
+    if not current_user.is_admin:
+        query = query.where(LoanApplication.user_id == current_user.id)
+    application = await db.scalar(query)
     
     if not application:
         raise HTTPException(status_code=404, detail="Application not found")
@@ -584,12 +900,14 @@ async def get_application_status(
 
 @router.get("/my-applications", response_model=List[LoanApplicationResponse])
 async def get_user_applications(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_token_user)
 ):
     """Get all applications for current user"""
-    applications = db.query(LoanApplication).filter(
-        LoanApplication.user_id == current_user.id
-    ).all()
+    applications = (await db.scalars(
+        select(LoanApplication).options(joinedload(LoanApplication.user)).where(
+            LoanApplication.user_id == current_user.id
+        )
+    )).all()
     
     return applications
\ No newline at end of file
@@ -1,26 +0,0 @@
-from fastapi import HTTPException, Depends
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.security import decode_token, oauth2_scheme
-from app.models.user import User
-
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    """Get current logged-in user"""
-    payload = decode_token(token)
-    email: str = payload.get("sub")
-    if email is None:
-        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
-    
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
-        raise HTTPException(status_code=401, detail="User not found")
-    return user
-
-def get_admin_user(current_user: User = Depends(get_current_user)):
-    """Check if current user is admin"""
-    if not current_user.is_admin:
-        raise HTTPException(
-            status_code=403, 
-            detail="Access denied. Admin privileges required."
-        )
-    return current_user
\ No newline at end of file
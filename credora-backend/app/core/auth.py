@@ -0,0 +1,216 @@
+"""
+Authentication dependencies.
+
+Every request authenticates, so both halves of it are cached per worker:
+verified tokens (no JWT signature check on a hit) and user principals
+(no users lookup on a hit). Tokens also carry the principal as claims, so
+read-only endpoints (get_token_user) can skip the database entirely for
+recently issued tokens.
+
+Changes to users through the ORM invalidate the cached principal and stop
+the claims fast path for tokens issued before the change. Other workers
+(and bulk UPDATEs) only see a change once their cached principal expires
+(AUTH_CACHE_TTL_SECONDS) and their tokens age out of the fast path
+(AUTH_CLAIMS_MAX_AGE_SECONDS). So a user deactivated or demoted on one
+worker can keep using the read-only endpoints of the others for up to
+AUTH_CLAIMS_MAX_AGE_SECONDS, and every other endpoint for up to
+AUTH_CACHE_TTL_SECONDS; keep both short. Tokens carry is_active, and a
+token issued to an inactive user is refused on the fast path too.
+"""
+import hmac
+import os
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from dotenv import load_dotenv
+from fastapi import Depends, HTTPException
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_async_db
+from app.core.metrics import metrics
+from app.core.security import decode_token, oauth2_scheme
+from app.models.user import User
+from app.utils.ttl_cache import TTLCache
+
+load_dotenv()
+
+# Verified tokens and principals kept per worker
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", 10000))
+# Seconds a principal is trusted before it is read from the database again
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", 60))
+# Read-only endpoints trust the claims of tokens younger than this; 0 disables.
+# Also how long a deactivation may take to reach those endpoints on other workers
+AUTH_CLAIMS_MAX_AGE_SECONDS = int(os.getenv("AUTH_CLAIMS_MAX_AGE_SECONDS", 60))
+# Static bearer token for Prometheus scrapers of /metrics; unset allows admins only
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user, as far as authorization needs it."""
+    id: int
+    email: str
+    full_name: str
+    is_admin: bool
+    is_active: bool = True
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            is_admin=bool(user.is_admin),
+            is_active=user.is_active is not False,
+        )
+
+
+def principal_claims(user: User) -> dict:
+    """Access token claims for user (see create_access_token)."""
+    return {
+        "sub": user.email,
+        "user_id": user.id,
+        "full_name": user.full_name,
+        "is_admin": bool(user.is_admin),
+        "is_active": user.is_active is not False,
+    }
+
+
+class AuthCache:
+    def __init__(self, max_size: int = AUTH_CACHE_SIZE, ttl_seconds: float = AUTH_CACHE_TTL_SECONDS):
+        # token -> verified payload, never kept past the token's own expiry
+        self.tokens = TTLCache(max_size, ttl_seconds)
+        # email -> Principal
+        self.principals = TTLCache(max_size, ttl_seconds)
+        # user id -> when the user last changed; only needed while tokens
+        # issued before the change could still take the claims fast path
+        self.changed_at = TTLCache(max_size, max(AUTH_CLAIMS_MAX_AGE_SECONDS, 1))
+
+    def verify(self, token: str) -> dict:
+        payload = self.tokens.get(token)
+        if payload is not None:
+            metrics.inc("auth_cache_total", cache="token", result="hit")
+            return payload
+        metrics.inc("auth_cache_total", cache="token", result="miss")
+        payload = decode_token(token)
+        self.tokens.set(token, payload, expires_at=payload.get("exp"))
+        return payload
+
+    def claims_principal(self, payload: dict) -> Optional[Principal]:
+        """Principal straight from the token, if it is recent and the user hasn't changed since."""
+        issued_at = payload.get("iat")
+        user_id = payload.get("user_id")
+        if issued_at is None or user_id is None or "is_admin" not in payload or "is_active" not in payload:
+            return None
+        if time.time() - issued_at > AUTH_CLAIMS_MAX_AGE_SECONDS:
+            return None
+        changed_at = self.changed_at.get(user_id)
+        if changed_at is not None and issued_at <= changed_at:
+            return None
+        return Principal(
+            id=user_id,
+            email=payload["sub"],
+            full_name=payload.get("full_name") or "",
+            is_admin=bool(payload["is_admin"]),
+            is_active=bool(payload["is_active"]),
+        )
+
+    def invalidate_user(self, user_id: int, email: Optional[str] = None):
+        self.changed_at.set(user_id, time.time())
+        if email:
+            self.principals.pop(email)
+        # The email itself may have changed
+        self.principals.discard_where(lambda principal: principal.id == user_id)
+
+    def clear(self):
+        self.tokens.clear()
+        self.principals.clear()
+        self.changed_at.clear()
+
+
+auth_cache = AuthCache()
+
+
+# Columns a Principal is built from; other changes (e.g. a password rehash) keep the cache
+PRINCIPAL_COLUMNS = ("email", "full_name", "is_admin", "is_active")
+
+
+@event.listens_for(User, "after_update")
+def _invalidate_updated_user(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in PRINCIPAL_COLUMNS):
+        auth_cache.invalidate_user(target.id, target.email)
+
+
+@event.listens_for(User, "after_delete")
+def _invalidate_deleted_user(mapper, connection, target):
+    auth_cache.invalidate_user(target.id, target.email)
+
+
+def _check_active(principal: Principal) -> Principal:
+    if not principal.is_active:
+        raise HTTPException(status_code=403, detail="Inactive user")
+    return principal
+
+
+async def _load_principal(payload: dict, db: AsyncSession) -> Principal:
+    email: str = payload.get("sub")
+    if email is None:
+        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+
+    principal = auth_cache.principals.get(email)
+    if principal is not None:
+        metrics.inc("auth_cache_total", cache="principal", result="hit")
+        return principal
+    metrics.inc("auth_cache_total", cache="principal", result="miss")
+
+    user = await db.scalar(select(User).where(User.email == email))
+    if user is None:
+        raise HTTPException(status_code=401, detail="User not found")
+    principal = Principal.from_user(user)
+    auth_cache.principals.set(email, principal)
+    return principal
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    """Current user from the principal cache, falling back to the database"""
+    payload = auth_cache.verify(token)
+    return _check_active(await _load_principal(payload, db))
+
+
+async def get_token_user(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    """
+    Current user for read-only endpoints: taken from the token claims when the
+    token is recent enough, otherwise resolved like get_current_user.
+    """
+    payload = auth_cache.verify(token)
+    principal = auth_cache.claims_principal(payload)
+    if principal is not None:
+        metrics.inc("auth_cache_total", cache="claims", result="hit")
+        return _check_active(principal)
+    return _check_active(await _load_principal(payload, db))
+
+
+def get_admin_user(current_user: Principal = Depends(get_current_user)) -> Principal:
+    """Check if current user is admin"""
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=403,
+            detail="Access denied. Admin privileges required."
+        )
+    return current_user
+
+
+async def get_metrics_reader(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
+) -> Optional[Principal]:
+    """Allow the metrics scraper (METRICS_TOKEN) or an admin user"""
+    if METRICS_TOKEN and hmac.compare_digest(token.encode(), METRICS_TOKEN.encode()):
+        return None
+    return get_admin_user(await get_current_user(token, db))
@@ -1,15 +1,100 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 import os
+import time
 from dotenv import load_dotenv
+from app.core.metrics import metrics
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL)
+# Connections kept open per engine, and extra ones allowed under bursts
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+# Seconds a request waits for a free connection before failing
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+# Reconnect connections older than this (stay under server/proxy idle limits)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+# Server-side limit per statement (Postgres only); 0 disables
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 30000))
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def async_database_url(url: str) -> str:
+    """The async-driver equivalent of a sync URL (psycopg2 -> asyncpg, pysqlite -> aiosqlite)."""
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername)).render_as_string(
+        hide_password=False
+    )
+
+class _TimedPoolMixin:
+    """Records how long checkouts wait for a connection (includes connecting)."""
+
+    metrics_label = "sync"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.observe("db_pool_wait_seconds", time.perf_counter() - started, engine=self.metrics_label)
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    metrics_label = "async"
+
+def _engine_options(url: str, async_engine: bool = False) -> dict:
+    """Pool sizing and timeouts; SQLite keeps SQLAlchemy's default pool."""
+    backend = make_url(url).get_backend_name()
+    options = {"pool_pre_ping": True}
+    if backend == "sqlite":
+        return options
+    options.update(
+        poolclass=TimedAsyncQueuePool if async_engine else TimedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    if backend == "postgresql" and DB_STATEMENT_TIMEOUT_MS > 0:
+        if async_engine:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+def instrument_pool(engine, label: str):
+    """Count checkouts and expose pool occupancy as metrics."""
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics.inc("db_pool_checkouts_total", engine=label)
+
+    if isinstance(engine.pool, QueuePool):
+        # Read through the engine: dispose() replaces the pool object
+        metrics.register_gauge("db_pool_checked_out", lambda: engine.pool.checkedout(), engine=label)
+        metrics.register_gauge("db_pool_size", lambda: engine.pool.size(), engine=label)
+        metrics.register_gauge("db_pool_overflow", lambda: engine.pool.overflow(), engine=label)
+
+# Sync engine: background jobs, scripts and endpoints that run on the threadpool
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+instrument_pool(engine, "sync")
+
+# Async engine for endpoints that query directly on the event loop
+async_engine = create_async_engine(async_database_url(DATABASE_URL), **_engine_options(DATABASE_URL, async_engine=True))
+# expire_on_commit=False: attributes can't be lazily refreshed outside a greenlet
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+instrument_pool(async_engine.sync_engine, "async")
 
 Base = declarative_base()
 
@@ -18,4 +103,8 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
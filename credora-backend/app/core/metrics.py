@@ -0,0 +1,85 @@
+"""
+In-process metrics in the Prometheus text format, served at /metrics.
+
+Deliberately tiny: counters, histograms with fixed buckets and gauges that
+are read from a callback at scrape time. Values are per worker process, so
+scrape every worker (or run one per container).
+"""
+import threading
+from typing import Callable, Dict, Tuple
+
+# Seconds; suits pool waits, queue waits and request-sized latencies
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _format_labels(labels: LabelKey, extra: str = "") -> str:
+    parts = [f'{name}="{value}"' for name, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Metrics:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        # name -> labels -> [bucket counts..., sum, count]
+        self._histograms: Dict[str, Dict[LabelKey, list]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, Callable[[], float]]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            state = series.get(key)
+            if state is None:
+                state = series[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def register_gauge(self, name: str, read: Callable[[], float], **labels):
+        """Report read() under `name` at every scrape."""
+        with self._lock:
+            self._gauges.setdefault(name, {})[tuple(sorted(labels.items()))] = read
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {name: {k: list(v) for k, v in series.items()} for name, series in self._histograms.items()}
+            gauges = {name: dict(series) for name, series in self._gauges.items()}
+
+        for name, series in sorted(counters.items()):
+            lines.append(f"# TYPE {name} counter")
+            lines.extend(f"{name}{_format_labels(key)} {value}" for key, value in series.items())
+        for name, series in sorted(histograms.items()):
+            lines.append(f"# TYPE {name} histogram")
+            for key, state in series.items():
+                for bound, count in zip(self.buckets + ("+Inf",), state[:-2] + state[-1:]):
+                    le = 'le="%s"' % bound
+                    lines.append(f"{name}_bucket{_format_labels(key, le)} {count}")
+                lines.append(f"{name}_sum{_format_labels(key)} {state[-2]}")
+                lines.append(f"{name}_count{_format_labels(key)} {state[-1]}")
+        for name, series in sorted(gauges.items()):
+            lines.append(f"# TYPE {name} gauge")
+            for key, read in series.items():
+                try:
+                    lines.append(f"{name}{_format_labels(key)} {read()}")
+                except Exception:
+                    continue
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
@@ -0,0 +1,80 @@
+"""
+Password hashing off the event loop.
+
+A bcrypt hash or verification costs a few hundred milliseconds of CPU, which
+inside an async handler stalls every other request on the worker. Hashing
+runs on a small dedicated thread pool instead (bcrypt releases the GIL), so
+a login burst queues behind PASSWORD_HASH_WORKERS threads rather than behind
+the event loop. At most PASSWORD_HASH_MAX_PENDING operations may wait; beyond
+that callers get 503 right away instead of piling up until they time out.
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Tuple
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+
+from app.core.metrics import metrics
+from app.core.security import get_password_hash, verify_and_update_password
+
+load_dotenv()
+
+# Threads doing bcrypt work; more than the worker's cores buys nothing
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+# Hash/verify operations allowed to wait for a thread before new ones get 503
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 64))
+
+
+class PasswordHasher:
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        # Only touched on the event loop
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def _run(self, op: str, fn: Callable, *args):
+        if self._pending >= self.max_pending:
+            metrics.inc("password_hash_rejected_total", op=op)
+            raise HTTPException(
+                status_code=503,
+                detail="Too many sign-in attempts in progress, please retry shortly",
+                headers={"Retry-After": "1"},
+            )
+
+        submitted = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            metrics.observe("password_hash_queue_seconds", started - submitted, op=op)
+            try:
+                return fn(*args)
+            finally:
+                metrics.observe("password_hash_seconds", time.perf_counter() - started, op=op)
+
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, task)
+        finally:
+            self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", get_password_hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """(valid, new_hash); new_hash is set when the stored hash should be replaced"""
+        return await self._run("verify", verify_and_update_password, password, hashed_password)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher()
+metrics.register_gauge("password_hash_pending", lambda: password_hasher.pending)
@@ -0,0 +1,215 @@
+"""
+Token-bucket rate limiting for expensive endpoints.
+
+Each (route, client) pair has a bucket holding up to `capacity` tokens that
+refills continuously at capacity / period; a request takes one token or is
+rejected with 429 and a Retry-After of when the next token arrives. Clients
+are keyed by user when the request carries a valid bearer token, otherwise
+by IP (run uvicorn with --proxy-headers behind a proxy so that is the real
+client address).
+
+Buckets live in memory per worker by default. With redis installed and
+RATE_LIMIT_REDIS_URL set they live in Redis instead, updated atomically by a
+Lua script, so the limit holds across workers and hosts. If Redis is
+unreachable the worker falls back to its own buckets rather than failing
+requests.
+
+Limits are "<requests>/<second|minute|hour|day>" strings, configurable per
+route through RATE_LIMIT_<ROUTE> (e.g. RATE_LIMIT_PROCESS=5/minute); "off"
+disables a route's limit.
+"""
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, Request
+
+from app.core.auth import auth_cache
+from app.core.metrics import metrics
+
+# Optional redis - without it every worker keeps its own buckets
+try:
+    import redis.asyncio as redis
+    from redis.exceptions import RedisError
+    HAS_REDIS = True
+except ImportError:
+    HAS_REDIS = False
+
+load_dotenv()
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+# Shared bucket store, e.g. redis://localhost:6379/0; unset keeps buckets in memory
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL")
+# In-memory buckets kept per worker; least recently used clients are dropped first
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 100000))
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    capacity: int
+    period_seconds: float
+
+    @property
+    def refill_rate(self) -> float:
+        """Tokens per second"""
+        return self.capacity / self.period_seconds
+
+
+def parse_limit(value: str) -> Optional[RateLimit]:
+    """'10/minute' -> RateLimit(10, 60); 'off' -> None. Raises ValueError otherwise."""
+    value = value.strip().lower()
+    if value in ("off", "none", "0"):
+        return None
+    count, _, period = value.partition("/")
+    period = period.rstrip("s")
+    if period not in PERIODS or not count.isdigit() or int(count) < 1:
+        raise ValueError(f"Invalid rate limit {value!r}, expected e.g. '10/minute'")
+    return RateLimit(int(count), PERIODS[period])
+
+
+class MemoryBuckets:
+    """Token buckets in an LRU-bounded dict: O(1) per request, no background sweeping."""
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        # key -> [tokens, last refill timestamp]
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, limit: RateLimit, now: Optional[float] = None) -> Tuple[bool, float]:
+        """(allowed, seconds until a token is available)"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(limit.capacity), now]
+                # A dropped bucket was idle longest; it simply starts full again
+                while len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(limit.capacity, bucket[0] + (now - bucket[1]) * limit.refill_rate)
+                bucket[1] = now
+
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return True, 0.0
+            return False, (1 - bucket[0]) / limit.refill_rate
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+# KEYS[1] bucket; ARGV capacity, refill rate (tokens/s). Uses the Redis clock
+# so workers on different hosts agree on time. Returns {allowed, retry_after}.
+REDIS_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(retry_after)}
+"""
+
+
+class RateLimiter:
+    def __init__(self, redis_url: Optional[str] = RATE_LIMIT_REDIS_URL, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.memory = MemoryBuckets(max_keys)
+        self._redis = None
+        self._take_script = None
+        if redis_url:
+            if HAS_REDIS:
+                self._redis = redis.from_url(redis_url)
+                self._take_script = self._redis.register_script(REDIS_TAKE_SCRIPT)
+                print("✅ Rate limits shared through Redis")
+            else:
+                print("⚠️ Warning: RATE_LIMIT_REDIS_URL is set but redis is not installed; limits are per worker")
+        self._redis_failing = False
+
+    @property
+    def backend(self) -> str:
+        return "redis" if self._redis is not None else "memory"
+
+    async def take(self, key: str, limit: RateLimit) -> Tuple[bool, float]:
+        if self._redis is not None:
+            try:
+                allowed, retry_after = await self._take_script(
+                    keys=[f"ratelimit:{key}"], args=[limit.capacity, limit.refill_rate]
+                )
+                self._redis_failing = False
+                return bool(int(allowed)), float(retry_after)
+            except RedisError as e:
+                metrics.inc("rate_limit_backend_errors_total")
+                if not self._redis_failing:
+                    print(f"⚠️ Warning: Redis rate limit backend unavailable, using per-worker limits: {e}")
+                    self._redis_failing = True
+        return self.memory.take(key, limit)
+
+    async def close(self):
+        if self._redis is not None:
+            await self._redis.close()
+
+
+rate_limiter = RateLimiter()
+
+
+def client_key(request: Request) -> str:
+    """'user:<id>' for a valid bearer token, otherwise 'ip:<address>'."""
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            # Cached, so the auth dependency that runs next doesn't verify twice
+            payload = auth_cache.verify(token)
+            user = payload.get("user_id") or payload.get("sub")
+            if user is not None:
+                return f"user:{user}"
+        except HTTPException:
+            pass
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def rate_limit(route: str, default: str):
+    """
+    Dependency limiting `route` to RATE_LIMIT_<ROUTE> (or `default`) per client:
+        @router.post("/process/{id}", dependencies=[Depends(rate_limit("process", "10/hour"))])
+    """
+    limit = parse_limit(os.getenv(f"RATE_LIMIT_{route.upper()}", default))
+
+    async def check_rate_limit(request: Request):
+        if not RATE_LIMIT_ENABLED or limit is None:
+            return
+        allowed, retry_after = await rate_limiter.take(f"{route}:{client_key(request)}", limit)
+        if not allowed:
+            metrics.inc("rate_limit_rejected_total", route=route)
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests, please slow down",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+
+    return check_rate_limit
@@ -1,5 +1,9 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
+import base64
+import hashlib
+import hmac
+import time
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
@@ -13,33 +17,45 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 1440))
+# Signed document URLs are valid for between one and two of these periods
+DOCUMENT_URL_TTL_SECONDS = int(os.getenv("DOCUMENT_URL_TTL_SECONDS", 600))
+# bcrypt cost; hashes with any other cost are upgraded at the next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
 
 pwd_context = CryptContext(
     schemes=["bcrypt"],
     deprecated="auto",
-    bcrypt__rounds=12
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
 )
 
 # Fix: Use the correct token URL
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")  # Changed from "api/auth/login"
 
+def _bcrypt_input(password: str) -> str:
+    if len(password.encode('utf-8')) > 72:
+        password = password[:72]
+    return password
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    if len(plain_password.encode('utf-8')) > 72:
-        plain_password = plain_password[:72]
-    return pwd_context.verify(plain_password, hashed_password)
+    return pwd_context.verify(_bcrypt_input(plain_password), hashed_password)
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify, and return a new hash when the stored one uses outdated settings."""
+    return pwd_context.verify_and_update(_bcrypt_input(plain_password), hashed_password)
 
 def get_password_hash(password: str) -> str:
-    if len(password.encode('utf-8')) > 72:
-        password = password[:72]
-    return pwd_context.hash(password)
+    return pwd_context.hash(_bcrypt_input(password))
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
+    now = datetime.utcnow()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+        expire = now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    to_encode.update({"exp": expire, "iat": now})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -52,4 +68,23 @@ def decode_token(token: str):
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
-        )
\ No newline at end of file
+        )
+
+def document_url_expiry(now: Optional[float] = None) -> int:
+    """
+    Expiry for a signed document URL, rounded up to a TTL boundary so the
+    URL for a document stays identical (and cacheable) for a whole period.
+    """
+    now = int(now if now is not None else time.time())
+    return (now // DOCUMENT_URL_TTL_SECONDS + 2) * DOCUMENT_URL_TTL_SECONDS
+
+def sign_document_url(document_id: int, version: Optional[str], expires: int) -> str:
+    """HMAC over the document, its content version and the expiry."""
+    message = f"document:{document_id}:{version or ''}:{expires}".encode()
+    digest = hmac.new(SECRET_KEY.encode(), message, hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+def verify_document_signature(document_id: int, version: Optional[str], expires: int, signature: str) -> bool:
+    if expires < time.time():
+        return False
+    return hmac.compare_digest(sign_document_url(document_id, version, expires), signature)
@@ -1,13 +1,18 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from app.core.database import engine, Base
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy import text
+from app.core.auth import get_metrics_reader
+from app.core.database import engine, async_engine, Base
+from app.core.metrics import metrics
 import os
 
 # ✅ CRITICAL: Import ALL models BEFORE creating tables
 # This ensures SQLAlchemy knows about all relationships
 from app.models.user import User
 from app.models.document import Document
+from app.models.document_blob import DocumentBlob
+from app.models.document_text import DocumentText
 from app.models.fraud_check import FraudCheck
 from app.models.loan_application import LoanApplication
 
@@ -34,20 +39,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Pagination cursor of the admin listing; wait time of rate-limited (429) responses
+    expose_headers=["X-Next-Cursor", "Retry-After"],
 )
 
-# Serve uploaded files as static files
-# This allows frontend to access documents via URLs
+# Uploaded files are not served statically; documents are only reachable
+# through signed URLs from GET /api/loan/documents/{application_id}
 uploads_path = "uploads"
-if os.path.exists(uploads_path):
-    app.mount("/uploads", StaticFiles(directory=uploads_path), name="uploads")
-    print(f"✅ Serving static files from: {uploads_path}")
-else:
+if not os.path.exists(uploads_path):
     print(f"⚠️ Warning: {uploads_path} directory not found. Creating it...")
     os.makedirs(uploads_path, exist_ok=True)
-    os.makedirs(os.path.join(uploads_path, "documents"), exist_ok=True)
-    app.mount("/uploads", StaticFiles(directory=uploads_path), name="uploads")
-    print(f"✅ Created and serving static files from: {uploads_path}")
 
 # Include routers
 app.include_router(auth.router)
@@ -63,31 +64,66 @@ async def root():
         "endpoints": {
             "docs": "/docs",
             "health": "/health",
+            "ready": "/ready",
+            "metrics": "/metrics",
             "auth": "/api/auth",
             "loan": "/api/loan"
         }
     }
 
+async def _database_status() -> str:
+    try:
+        async with async_engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+        return "connected"
+    except Exception as e:
+        return f"error: {e}"
+
 @app.get("/health")
 async def health_check():
+    """Liveness: cheap enough to poll often, never waits on the OCR workers"""
     return {
         "status": "healthy",
-        "database": "connected",
-        "uploads_directory": os.path.exists("uploads")
+        "database": await _database_status(),
+        "uploads_directory": os.path.exists("uploads"),
     }
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: 503 until the database and the OCR worker pool respond"""
+    from fastapi.concurrency import run_in_threadpool
+    from app.services.ocr_engine import ocr_engine
+    database = await _database_status()
+    ocr_status = await run_in_threadpool(ocr_engine.health_check)
+    ready = database == "connected" and ocr_status["healthy"]
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not ready", "database": database, "ocr_engine": ocr_status},
+    )
+
+@app.get("/metrics", response_class=PlainTextResponse, dependencies=[Depends(get_metrics_reader)])
+async def get_metrics():
+    """Prometheus metrics of this worker (DB pool usage and waits); admins or METRICS_TOKEN only"""
+    return metrics.render()
+
 # Optional: Add startup event to verify configuration
 @app.on_event("startup")
 async def startup_event():
     # Start the background task scheduler
     from app.tasks.cleanup import scheduler
     scheduler.start()
+
+    # Start OCR workers now so the first upload doesn't pay for model loading
+    from fastapi.concurrency import run_in_threadpool
+    from app.services.ocr_engine import ocr_engine
+    ocr_status = await run_in_threadpool(ocr_engine.health_check)
     
     print("\n" + "="*60)
     print("🚀 Credora API Starting Up")
     print("="*60)
     print(f"📁 Uploads directory: {os.path.abspath('uploads')}")
-    print(f"✅ Static files mounted at: /uploads")
+    print(f"🔏 Documents served via signed URLs at: /api/loan/files/{{id}}")
+    print(f"🔤 OCR engine: {ocr_status['engine']} ({ocr_engine.version})")
     print(f"🌐 API Documentation: http://localhost:8000/docs")
     print(f"💻 Frontend should be at: http://localhost:3000")
     print("="*60 + "\n")
@@ -98,4 +134,14 @@ async def shutdown_event():
     # Stop scheduler safely
     from app.tasks.cleanup import scheduler
     scheduler.shutdown()
+    # Persist the streaming anomaly model so it resumes where it left off
+    from app.services.anomaly_service import anomaly_service
+    anomaly_service.checkpoint()
+    from app.services.ocr_engine import ocr_engine
+    ocr_engine.shutdown()
+    from app.core.passwords import password_hasher
+    password_hasher.shutdown()
+    from app.core.rate_limit import rate_limiter
+    await rate_limiter.close()
+    await async_engine.dispose()
     print("\n👋 Credora API Shutting Down\n")
\ No newline at end of file
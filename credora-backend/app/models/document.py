@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Text
+from sqlalchemy import BigInteger, Column, Integer, String, DateTime, ForeignKey, Boolean, Text, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
+from app.models.document_text import DocumentText
 
 class Document(Base):
     __tablename__ = "documents"
@@ -12,11 +13,32 @@ class Document(Base):
     document_type = Column(String, nullable=False)
     file_path = Column(String, nullable=False)
     file_name = Column(String, nullable=False)
+    content_sha256 = Column(String(64), nullable=True, index=True)  # Hex digest computed while uploading
+    file_size = Column(BigInteger, nullable=True)  # Bytes
+    working_file_path = Column(String, nullable=True)  # Rotated/downscaled copy used for analysis (images only)
     
-    ocr_extracted_text = Column(Text, nullable=True)
+    ocr_features = Column(JSON, nullable=True)  # Precomputed fraud features (see document_features)
     is_verified = Column(Boolean, default=False)
     verification_notes = Column(Text, nullable=True)
     
     uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
     
-    application = relationship("LoanApplication", back_populates="documents")
\ No newline at end of file
+    application = relationship("LoanApplication", back_populates="documents")
+    # OCR output lives compressed in document_texts; see ocr_extracted_text
+    text_record = relationship(
+        "DocumentText", uselist=False, lazy="select", cascade="all, delete-orphan", passive_deletes=True
+    )
+
+    @property
+    def ocr_extracted_text(self):
+        """OCR text of the document (loaded from document_texts on first access)."""
+        return self.text_record.ocr_text if self.text_record is not None else None
+
+    @ocr_extracted_text.setter
+    def ocr_extracted_text(self, value):
+        if value is None:
+            self.text_record = None
+        elif self.text_record is None:
+            self.text_record = DocumentText(ocr_text=value)
+        else:
+            self.text_record.ocr_text = value
\ No newline at end of file
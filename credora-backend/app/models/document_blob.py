@@ -0,0 +1,16 @@
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class DocumentBlob(Base):
+    __tablename__ = "document_blobs"
+    
+    # One row per distinct file content; Document.content_sha256 points here
+    sha256 = Column(String(64), primary_key=True)
+    file_path = Column(String, nullable=False)
+    file_size = Column(BigInteger, nullable=False)
+    content_type = Column(String, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)  # Document rows using this blob
+    encoding = Column(String, nullable=True)  # At-rest encoding set by tiering: "gzip", "identity" or NULL (not tiered yet)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
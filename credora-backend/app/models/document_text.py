@@ -0,0 +1,28 @@
+import zlib
+from sqlalchemy import Column, ForeignKey, Integer, LargeBinary
+from sqlalchemy.types import TypeDecorator
+from app.core.database import Base
+
+class CompressedText(TypeDecorator):
+    """Text stored zlib-compressed in a binary column; OCR output shrinks ~4-8x."""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return zlib.compress(value.encode("utf-8"), 6)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return zlib.decompress(value).decode("utf-8")
+
+class DocumentText(Base):
+    __tablename__ = "document_texts"
+    
+    # Kept out of the documents table so listing documents never reads OCR output;
+    # loaded only when features have to be recomputed from the text
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), primary_key=True)
+    ocr_text = Column(CompressedText, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Boolean, JSON
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Boolean, JSON, String
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -12,7 +12,9 @@ class FraudCheck(Base):
     fraud_score = Column(Float, nullable=False)
     is_fraudulent = Column(Boolean, nullable=False)
     anomaly_detected = Column(Boolean, default=False)
+    anomaly_score = Column(Float, nullable=True)  # Calibrated streaming-model score, None while warming up
     fraud_flags = Column(JSON, nullable=True)
+    rule_set_version = Column(String, nullable=True)  # Fraud rule set that produced this result
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
@@ -1,10 +1,16 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
 
 class LoanApplication(Base):
     __tablename__ = "loan_applications"
+    __table_args__ = (
+        # Keyset pagination of the admin listing: newest first, optionally per status or user
+        Index("ix_loan_applications_created_at_id", "created_at", "id"),
+        Index("ix_loan_applications_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_loan_applications_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -29,7 +29,8 @@ class UserInResponse(BaseModel):
     class Config:
         from_attributes = True
 
-class LoanApplicationResponse(BaseModel):
+class LoanApplicationSummary(BaseModel):
+    """An application without the long admin-only fields (used for listings)"""
     id: int
     user_id: int
     
@@ -50,7 +51,6 @@ class LoanApplicationResponse(BaseModel):
     approval_probability: Optional[float] = None
     fraud_score: Optional[float] = None
     final_decision: Optional[str] = None
-    ai_reasoning: Optional[str] = None  # Admin-only AI explanation
     status: str
     created_at: datetime
     
@@ -60,6 +60,9 @@ class LoanApplicationResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class LoanApplicationResponse(LoanApplicationSummary):
+    ai_reasoning: Optional[str] = None  # Admin-only AI explanation
+
 class LoanPredictionResult(BaseModel):
     approval_probability: float
     decision: str
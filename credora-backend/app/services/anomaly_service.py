@@ -0,0 +1,214 @@
+"""
+Streaming anomaly detection over numeric application features.
+
+Implements Half-Space Trees (Tan, Ting & Liu, 2011): an ensemble of
+random, fully grown binary trees over a fixed feature space. Each node
+keeps a mass from the previous window (reference) and the current window
+(latest); when a window fills, latest becomes reference. Scoring and
+updating are O(n_trees * height) per application and memory is fixed, so
+the model keeps up with the submission rate without retraining.
+
+Raw scores are calibrated against the scores of recent applications, so
+anomaly_score is the fraction of recent applications that looked more
+normal (0 = typical, 1 = more unusual than everything seen recently).
+"""
+import math
+import os
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+import joblib
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ANOMALY_MODEL_PATH = os.getenv("ANOMALY_MODEL_PATH", "app/ml_models/anomaly_hst.pkl")
+# Write a checkpoint after this many updates (and on shutdown)
+ANOMALY_CHECKPOINT_EVERY = int(os.getenv("ANOMALY_CHECKPOINT_EVERY", 50))
+
+N_TREES = 25
+TREE_HEIGHT = 8
+WINDOW_SIZE = 250
+# Raw scores of recent applications kept for calibration
+CALIBRATION_SIZE = 1000
+
+
+def _log_money(value) -> float:
+    return math.log1p(max(float(value or 0), 0.0))
+
+
+# (feature, transform, lower bound, upper bound); values are clipped into the bounds
+FEATURE_SPACE = [
+    ("no_of_dependents", lambda d: float(d.get("no_of_dependents") or 0), 0.0, 5.0),
+    ("income_annum", lambda d: _log_money(d.get("income_annum")), 9.0, 19.0),
+    ("loan_amount", lambda d: _log_money(d.get("loan_amount")), 9.0, 19.0),
+    ("loan_term", lambda d: float(d.get("loan_term") or 0), 0.0, 30.0),
+    ("cibil_score", lambda d: float(d.get("cibil_score") or 300), 300.0, 900.0),
+    ("residential_assets_value", lambda d: _log_money(d.get("residential_assets_value")), 0.0, 19.0),
+    ("commercial_assets_value", lambda d: _log_money(d.get("commercial_assets_value")), 0.0, 19.0),
+    ("luxury_assets_value", lambda d: _log_money(d.get("luxury_assets_value")), 0.0, 19.0),
+    ("bank_asset_value", lambda d: _log_money(d.get("bank_asset_value")), 0.0, 19.0),
+    ("loan_to_income", lambda d: float(d.get("loan_amount") or 0) / float(d.get("income_annum") or 1), 0.0, 20.0),
+]
+
+
+def feature_vector(app_data: Dict) -> np.ndarray:
+    """Map application data into the unit hypercube the trees are built on."""
+    values = []
+    for _, transform, low, high in FEATURE_SPACE:
+        value = min(max(transform(app_data), low), high)
+        values.append((value - low) / (high - low))
+    return np.array(values, dtype=np.float64)
+
+
+class HalfSpaceTrees:
+    """
+    Fixed-size ensemble of half-space trees stored as flat arrays.
+    Node i has children 2i+1 and 2i+2; leaves sit at depth `height`.
+    """
+
+    def __init__(self, n_features: int, n_trees: int = N_TREES, height: int = TREE_HEIGHT,
+                 window_size: int = WINDOW_SIZE, seed: int = 42):
+        self.n_trees = n_trees
+        self.height = height
+        self.window_size = window_size
+        n_nodes = 2 ** (height + 1) - 1
+        rng = np.random.default_rng(seed)
+
+        self.split_dim = np.zeros((n_trees, n_nodes), dtype=np.int64)
+        self.split_val = np.zeros((n_trees, n_nodes), dtype=np.float64)
+        for t in range(n_trees):
+            # Randomly perturbed work space around the unit cube, as in the paper
+            s = rng.random(n_features)
+            half_width = 2 * np.maximum(s, 1 - s)
+            self._build(t, 0, s - half_width, s + half_width, rng)
+
+        self.depth = np.floor(np.log2(np.arange(n_nodes) + 1)).astype(np.int64)
+        self.reference = np.zeros((n_trees, n_nodes), dtype=np.float64)
+        self.latest = np.zeros((n_trees, n_nodes), dtype=np.float64)
+        self.window_count = 0
+        self.windows_completed = 0
+        # Nodes with fewer reference points than this terminate scoring early
+        self.size_limit = 0.1 * window_size
+
+    def _build(self, tree: int, node: int, low: np.ndarray, high: np.ndarray, rng):
+        if 2 * node + 1 >= self.split_dim.shape[1]:
+            return
+        dim = int(rng.integers(len(low)))
+        mid = (low[dim] + high[dim]) / 2
+        self.split_dim[tree, node] = dim
+        self.split_val[tree, node] = mid
+        left_high = high.copy()
+        left_high[dim] = mid
+        right_low = low.copy()
+        right_low[dim] = mid
+        self._build(tree, 2 * node + 1, low, left_high, rng)
+        self._build(tree, 2 * node + 2, right_low, high, rng)
+
+    def _paths(self, x: np.ndarray) -> np.ndarray:
+        """(n_trees, height + 1) node indices visited by x in every tree."""
+        trees = np.arange(self.n_trees)
+        nodes = np.zeros(self.n_trees, dtype=np.int64)
+        paths = np.empty((self.n_trees, self.height + 1), dtype=np.int64)
+        paths[:, 0] = nodes
+        for level in range(1, self.height + 1):
+            go_right = x[self.split_dim[trees, nodes]] >= self.split_val[trees, nodes]
+            nodes = 2 * nodes + 1 + go_right
+            paths[:, level] = nodes
+        return paths
+
+    @property
+    def ready(self) -> bool:
+        return self.windows_completed > 0
+
+    def score(self, x: np.ndarray) -> float:
+        """Raw mass score; lower means more anomalous."""
+        paths = self._paths(x)
+        trees = np.arange(self.n_trees)[:, None]
+        mass = self.reference[trees, paths]
+        # Stop at the first node whose reference mass is too small to trust
+        below = mass < self.size_limit
+        stop = np.where(below.any(axis=1), below.argmax(axis=1), self.height)
+        terminal = paths[np.arange(self.n_trees), stop]
+        terminal_mass = self.reference[np.arange(self.n_trees), terminal]
+        return float(np.sum(terminal_mass * 2.0 ** self.depth[terminal]))
+
+    def update(self, x: np.ndarray):
+        paths = self._paths(x)
+        trees = np.arange(self.n_trees)[:, None]
+        self.latest[trees, paths] += 1
+        self.window_count += 1
+        if self.window_count >= self.window_size:
+            self.reference = self.latest
+            self.latest = np.zeros_like(self.reference)
+            self.window_count = 0
+            self.windows_completed += 1
+
+
+class AnomalyService:
+    def __init__(self, model_path: str = ANOMALY_MODEL_PATH):
+        self.model_path = model_path
+        self._lock = threading.Lock()
+        self._updates_since_checkpoint = 0
+        self.model = None
+        self.calibration = deque(maxlen=CALIBRATION_SIZE)
+
+        if os.path.exists(model_path):
+            try:
+                state = joblib.load(model_path)
+                self.model = state["model"]
+                self.calibration = deque(state["calibration"], maxlen=CALIBRATION_SIZE)
+                print(f"✅ Anomaly model restored ({self.model.windows_completed} windows seen)")
+            except Exception as e:
+                print(f"⚠️ Warning: Could not load anomaly model checkpoint: {e}")
+                self.model = None
+
+        if self.model is None:
+            self.model = HalfSpaceTrees(n_features=len(FEATURE_SPACE))
+
+    def _calibrate(self, raw_score: float) -> Optional[float]:
+        if not self.model.ready or not self.calibration:
+            return None
+        recent = np.fromiter(self.calibration, dtype=np.float64)
+        return float(np.mean(recent > raw_score))
+
+    def score_and_update(self, app_data: Dict, learn: bool = True) -> Optional[float]:
+        """
+        Return the calibrated anomaly score for an application (None while
+        the first window is still filling), then learn from it if `learn`.
+        Callers pass learn=False when re-scoring an application the model
+        has already seen (it has a fraud check), so it isn't counted twice.
+        """
+        x = feature_vector(app_data)
+        with self._lock:
+            raw = self.model.score(x) if self.model.ready else None
+            anomaly_score = self._calibrate(raw) if raw is not None else None
+
+            if learn:
+                self.model.update(x)
+                if raw is not None:
+                    self.calibration.append(raw)
+                self._updates_since_checkpoint += 1
+                if self._updates_since_checkpoint >= ANOMALY_CHECKPOINT_EVERY:
+                    self._checkpoint_locked()
+
+        return anomaly_score
+
+    def _checkpoint_locked(self):
+        try:
+            os.makedirs(os.path.dirname(self.model_path) or ".", exist_ok=True)
+            tmp_path = f"{self.model_path}.tmp"
+            joblib.dump({"model": self.model, "calibration": list(self.calibration)}, tmp_path)
+            os.replace(tmp_path, self.model_path)
+            self._updates_since_checkpoint = 0
+        except Exception as e:
+            print(f"⚠️ Warning: Could not checkpoint anomaly model: {e}")
+
+    def checkpoint(self):
+        with self._lock:
+            self._checkpoint_locked()
+
+
+anomaly_service = AnomalyService()
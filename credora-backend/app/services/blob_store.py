@@ -0,0 +1,260 @@
+"""
+Content-addressable document storage.
+
+Every uploaded file is stored once under its SHA-256, fanned out over two
+directory levels (uploads/blobs/ab/cd/abcd...<ext>) so no directory grows
+past 65536 entries however many documents we hold. Identical files across
+applications share one blob; DocumentBlob.ref_count tracks how many
+Document rows use it and the file is deleted when the last one goes.
+
+A blob's file is only ever deleted by remove_unreferenced() while it holds
+the row lock of an unreferenced blob, and acquire() takes that same lock
+and puts the file back from the upload's own copy if it went missing. So
+an upload racing the deletion of identical content never ends up
+registered against a missing file. Unreferenced rows stay (ref_count 0)
+until their files are gone.
+"""
+import os
+import shutil
+import uuid
+from collections import Counter
+from concurrent.futures import Executor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.document_blob import DocumentBlob
+from app.services.rendition_service import rendition_service
+from app.services.working_copy_service import working_copy_service
+from app.utils.compression import GZIP_SUFFIX, gzip_file
+from app.utils.uploads import DOCUMENT_TYPES, save_upload
+
+load_dotenv()
+
+BLOB_STORE_DIR = os.getenv("BLOB_STORE_DIR", "uploads/blobs")
+
+
+class BlobStore:
+    def __init__(self, root: str = BLOB_STORE_DIR):
+        self.root = os.path.abspath(root)
+        # Same filesystem as the blobs, so moving a finished upload in is a rename
+        self.tmp_dir = os.path.join(self.root, "tmp")
+
+    def blob_path(self, sha256: str, extension: str = "") -> str:
+        return os.path.join(self.root, sha256[:2], sha256[2:4], f"{sha256}{extension}")
+
+    def _adopt(self, tmp_path: str, final_path: str) -> bool:
+        """
+        Hard-link a finished file into place; True if the blob is new. The
+        temporary file stays until acquire(), which restores the blob from
+        it if the file was garbage collected in the meantime.
+        """
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        try:
+            os.link(tmp_path, final_path)
+            return True
+        except FileExistsError:
+            return False
+
+    async def ingest(self, file: UploadFile, allowed_types: Iterable[str] = DOCUMENT_TYPES) -> Dict:
+        """
+        Stream an upload into the store. Returns save_upload's dict with
+        `path` pointing at the blob, `created` (False when the same content
+        was already stored) and `keep_path`, the upload's own copy, which
+        acquire() consumes (discard() if the upload is abandoned instead).
+        """
+        saved = await save_upload(file, self.tmp_dir, uuid.uuid4().hex, allowed_types=allowed_types)
+        final_path = self.blob_path(saved["sha256"], os.path.splitext(saved["path"])[1])
+        saved["created"] = await run_in_threadpool(self._adopt, saved["path"], final_path)
+        saved["keep_path"] = saved["path"]
+        saved["path"] = final_path
+        return saved
+
+    def put_file(self, source_path: str, sha256: str, move: bool = False) -> str:
+        """Store an existing file (used by the migration); returns the blob path."""
+        final_path = self.blob_path(sha256, os.path.splitext(source_path)[1].lower())
+        if not os.path.exists(final_path):
+            os.makedirs(self.tmp_dir, exist_ok=True)
+            tmp_path = os.path.join(self.tmp_dir, f"{uuid.uuid4().hex}.part")
+            if move:
+                shutil.move(source_path, tmp_path)
+            else:
+                shutil.copy2(source_path, tmp_path)
+            self._adopt(tmp_path, final_path)
+            os.remove(tmp_path)
+        elif move:
+            os.remove(source_path)
+        return final_path
+
+    def compress(self, path: str, min_saving: float) -> Optional[str]:
+        """
+        Write a gzipped copy of a raw blob next to it. Returns the new path, or
+        None (leaving nothing behind) when it saves less than `min_saving` of
+        the size. The caller repoints the blob and removes the raw file.
+        """
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        tmp_path = os.path.join(self.tmp_dir, f"{uuid.uuid4().hex}.part")
+        try:
+            compressed_size = gzip_file(path, tmp_path)
+            if compressed_size > os.path.getsize(path) * (1 - min_saving):
+                os.remove(tmp_path)
+                return None
+            final_path = path + GZIP_SUFFIX
+            os.replace(tmp_path, final_path)
+            return final_path
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def acquire(
+        self, db: Session, sha256: str, path: str, size: int, content_type: str, keep_path: Optional[str] = None
+    ) -> DocumentBlob:
+        """
+        Add a reference to a blob, registering it on first use. Callers must
+        store the returned blob's file_path: an existing blob may live under
+        a different path (e.g. compressed by tiering). `keep_path` (from
+        ingest()) restores the file if it was deleted after ingest() and is
+        removed either way.
+        """
+        blob = db.query(DocumentBlob).filter(DocumentBlob.sha256 == sha256).with_for_update().first()
+        if blob is None:
+            try:
+                with db.begin_nested():
+                    blob = DocumentBlob(
+                        sha256=sha256, file_path=path, file_size=size, content_type=content_type, ref_count=0,
+                    )
+                    db.add(blob)
+            except IntegrityError:
+                # Registered concurrently by another upload of the same file
+                blob = db.query(DocumentBlob).filter(DocumentBlob.sha256 == sha256).with_for_update().one()
+        # The row is locked (or newly ours), so nothing deletes the file from here on
+        blob.ref_count += 1
+        if blob.file_path != path and os.path.exists(blob.file_path):
+            # Stored compressed (or under another name); the fresh copy is redundant
+            self._remove_quietly(path)
+        elif not os.path.exists(path) and keep_path and os.path.exists(keep_path):
+            # Garbage collected between ingest() and now
+            os.replace(keep_path, path)
+            blob.file_path = path
+            blob.encoding = None
+        elif blob.file_path != path:
+            blob.file_path = path
+            blob.encoding = None
+        if keep_path:
+            self._remove_quietly(keep_path)
+        return blob
+
+    def release(self, db: Session, sha256: Optional[str]) -> Optional[Tuple[str, str]]:
+        """
+        Drop a reference. Returns (sha256, path) when this was the last one;
+        pass it to remove_unreferenced() after the transaction commits.
+        """
+        if not sha256:
+            return None
+        blob = db.query(DocumentBlob).filter(DocumentBlob.sha256 == sha256).with_for_update().first()
+        if blob is None:
+            return None
+        blob.ref_count -= 1
+        if blob.ref_count > 0:
+            return None
+        return sha256, blob.file_path
+
+    def release_many(self, db: Session, sha256s: Iterable[Optional[str]]) -> List[Tuple[str, str]]:
+        """
+        Drop one reference per entry (repeats allowed) with a single locking
+        SELECT. Returns the blobs that lost their last reference, like release().
+        """
+        counts = Counter(sha for sha in sha256s if sha)
+        if not counts:
+            return []
+        blobs = db.query(DocumentBlob).filter(DocumentBlob.sha256.in_(counts)).with_for_update().all()
+        unreferenced = []
+        for blob in blobs:
+            blob.ref_count -= counts[blob.sha256]
+            if blob.ref_count <= 0:
+                unreferenced.append((blob.sha256, blob.file_path))
+        return unreferenced
+
+    def discard(self, db: Session, uploads: Iterable[Dict]) -> int:
+        """
+        Undo ingest() for uploads that were never committed: drop their
+        temporary copies and delete blobs they created, unless another
+        upload registered the same content meanwhile.
+        """
+        orphans = []
+        for saved in uploads:
+            if saved.get("keep_path"):
+                self._remove_quietly(saved["keep_path"])
+            if not saved.get("created"):
+                continue
+            try:
+                # An unreferenced row, so the file goes through the locked path below
+                with db.begin_nested():
+                    db.add(DocumentBlob(
+                        sha256=saved["sha256"], file_path=saved["path"], file_size=saved["size"],
+                        content_type=saved["content_type"], ref_count=0,
+                    ))
+                orphans.append((saved["sha256"], saved["path"]))
+            except IntegrityError:
+                pass
+        db.commit()
+        return self.remove_unreferenced(db, orphans)
+
+    def _remove_quietly(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _remove_files(self, sha256: str, path: str) -> bool:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            print(f"⚠️ Warning: Could not remove blob {path}: {e}")
+            return False
+        rendition_service.remove(sha256)
+        working_copy_service.remove(sha256)
+        return True
+
+    def remove_unreferenced(
+        self, db: Session, blobs: Iterable[Tuple[str, str]], executor: Optional[Executor] = None
+    ) -> int:
+        """
+        Delete the files (and renditions and working copies) of blobs that
+        are still unreferenced, then their rows, and commit. Call it after
+        the transaction that released them has committed. Pass an executor
+        to remove the files in parallel.
+
+        The rows stay locked while their files are removed, so a concurrent
+        acquire() of the same content waits and then restores the file.
+        Rows locked by an upload right now are skipped (SKIP LOCKED, so this
+        never deadlocks with one); the cleanup task sweeps them later.
+        """
+        shas = sorted({sha for sha, _ in blobs})
+        if not shas:
+            return 0
+        # Re-uploaded since it was released? Then the file is in use again
+        orphans = (
+            db.query(DocumentBlob)
+            .filter(DocumentBlob.sha256.in_(shas), DocumentBlob.ref_count <= 0)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        files = [(blob.sha256, blob.file_path) for blob in orphans]
+        if executor is not None:
+            removed = sum(executor.map(lambda blob: self._remove_files(*blob), files))
+        else:
+            removed = sum(self._remove_files(sha, path) for sha, path in files)
+        for blob in orphans:
+            db.delete(blob)
+        db.commit()
+        return removed
+
+blob_store = BlobStore()
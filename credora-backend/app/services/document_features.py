@@ -0,0 +1,106 @@
+"""
+Derived document features for fraud checks.
+
+Features are computed once when a document is ingested and stored on the
+Document row, so fraud rules never have to re-parse raw OCR text.
+"""
+import hashlib
+import os
+import re
+from typing import Dict, List, Optional
+
+from app.services.document_quality_service import check_photo_quality
+from app.utils.compression import readable_path
+
+# Bump whenever the extraction logic or keyword vocabulary changes so that
+# stale stored features are recomputed from the OCR text.
+FEATURES_VERSION = 2
+
+AMOUNT_PATTERN = re.compile(r"\d[\d,]{4,}")
+# Only the largest amounts matter for income checks; keep storage compact
+MAX_STORED_AMOUNTS = 10
+
+# Identity numbers and phone numbers, matched against lowercased OCR text
+PAN_PATTERN = re.compile(r"\b[a-z]{5}\d{4}[a-z]\b")
+AADHAAR_PATTERN = re.compile(r"\b\d{4}\s?\d{4}\s?\d{4}\b")
+PHONE_PATTERN = re.compile(r"(?<!\d)(?:\+?91[\s-]?)?([6-9]\d{9})(?!\d)")
+
+KEYWORD_CATEGORIES = {
+    "identity_proof": ["aadhar", "aadhaar", "passport", "license", "licence", "pan", "govt of india", "government of india"],
+    "address_proof": ["address", "pin code", "pincode", "road", "street", "city", "state"],
+    "income_proof": ["salary", "income", "ctc", "gross", "net pay", "payslip", "pay slip", "annual income", "form 16", "itr"],
+    "marksheet": ["marksheet", "mark sheet", "semester", "university", "examination", "exam", "cgpa", "sgpa"],
+}
+
+
+def _extract_amounts(text: str) -> List[float]:
+    amounts = set()
+    for raw in AMOUNT_PATTERN.findall(text):
+        try:
+            amounts.add(float(raw.replace(",", "")))
+        except ValueError:
+            continue
+    return sorted(amounts, reverse=True)[:MAX_STORED_AMOUNTS]
+
+
+def _extract_id_numbers(text: str) -> List[str]:
+    ids = {f"pan:{m}" for m in PAN_PATTERN.findall(text)}
+    ids.update("aadhaar:" + "".join(m.split()) for m in AADHAAR_PATTERN.findall(text))
+    return sorted(ids)
+
+
+def extract_document_features(
+    ocr_text: Optional[str],
+    document_type: Optional[str] = None,
+    file_path: Optional[str] = None,
+) -> Dict:
+    """
+    Build the compact feature record used by the fraud rules.
+
+    Returns a JSON-serializable dict with the lowercased text length, the
+    unique token set and a short signature of it, the largest extracted
+    amounts, the keyword categories present and any identity or phone
+    numbers found. Photos additionally carry their quality flags.
+    """
+    text = (ocr_text or "").lower()
+    tokens = sorted(set(text.split()))
+    features = {
+        "version": FEATURES_VERSION,
+        "length": len(text),
+        "tokens": tokens,
+        "signature": hashlib.sha1(" ".join(tokens).encode("utf-8")).hexdigest()[:16],
+        "amounts": _extract_amounts(text),
+        "keyword_categories": [
+            category
+            for category, keywords in KEYWORD_CATEGORIES.items()
+            if any(k in text for k in keywords)
+        ],
+        "id_numbers": _extract_id_numbers(text),
+        "phones": sorted(set(PHONE_PATTERN.findall(text))),
+    }
+
+    if document_type == "photo" and file_path:
+        # Resolve relative paths (e.g. from older uploads) against cwd
+        if not os.path.isabs(file_path) and not os.path.isfile(file_path):
+            file_path = os.path.join(os.getcwd(), file_path)
+        # Tiered (gzipped) photos are decompressed to a temp file for OpenCV
+        with readable_path(file_path) as path:
+            features["photo_flags"] = check_photo_quality(path)
+
+    return features
+
+
+def get_document_features(doc) -> Dict:
+    """
+    Return the stored features for a document, recomputing them from the
+    OCR text when they are missing or were built by an older version.
+    """
+    features = getattr(doc, "ocr_features", None)
+    if features and features.get("version") == FEATURES_VERSION:
+        return features
+    return extract_document_features(
+        getattr(doc, "ocr_extracted_text", None),
+        getattr(doc, "document_type", None),
+        # The bounded working copy when ingest made one
+        getattr(doc, "working_file_path", None) or getattr(doc, "file_path", None),
+    )
@@ -0,0 +1,157 @@
+"""
+Streaming exports of applications, fraud checks and decisions.
+
+Rows are read through a server-side cursor in chunks of EXPORT_CHUNK_SIZE
+and serialized (NDJSON or CSV, optionally gzipped) chunk by chunk, so an
+export of the whole book uses the same memory as an export of ten rows.
+Used by GET /api/loan/admin/export and export_applications.py.
+"""
+import csv
+import io
+import json
+import os
+import zlib
+from datetime import date, datetime
+from typing import Iterable, List, Optional, Sequence
+
+from dotenv import load_dotenv
+from sqlalchemy import select
+
+from app.models.fraud_check import FraudCheck
+from app.models.loan_application import LoanApplication
+from app.models.user import User
+
+load_dotenv()
+
+# Rows fetched from the server-side cursor (and serialized) at a time
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 1000))
+
+EXPORT_FORMATS = ("ndjson", "csv")
+
+EXPORT_COLUMNS = {
+    "application_id": LoanApplication.id,
+    "user_id": LoanApplication.user_id,
+    "user_email": User.email,
+    "user_full_name": User.full_name,
+    "created_at": LoanApplication.created_at,
+    "updated_at": LoanApplication.updated_at,
+    "status": LoanApplication.status,
+    "final_decision": LoanApplication.final_decision,
+    "approval_probability": LoanApplication.approval_probability,
+    "no_of_dependents": LoanApplication.no_of_dependents,
+    "income_annum": LoanApplication.income_annum,
+    "loan_amount": LoanApplication.loan_amount,
+    "loan_term": LoanApplication.loan_term,
+    "cibil_score": LoanApplication.cibil_score,
+    "residential_assets_value": LoanApplication.residential_assets_value,
+    "commercial_assets_value": LoanApplication.commercial_assets_value,
+    "luxury_assets_value": LoanApplication.luxury_assets_value,
+    "bank_asset_value": LoanApplication.bank_asset_value,
+    "education": LoanApplication.education,
+    "self_employed": LoanApplication.self_employed,
+    "fraud_score": LoanApplication.fraud_score,
+    "is_fraudulent": FraudCheck.is_fraudulent,
+    "anomaly_detected": FraudCheck.anomaly_detected,
+    "anomaly_score": FraudCheck.anomaly_score,
+    "fraud_flags": FraudCheck.fraud_flags,
+    "rule_set_version": FraudCheck.rule_set_version,
+    "ai_reasoning": LoanApplication.ai_reasoning,
+}
+# Everything except the long free-text reasoning
+DEFAULT_EXPORT_COLUMNS = [name for name in EXPORT_COLUMNS if name != "ai_reasoning"]
+
+
+def parse_columns(columns: Optional[str]) -> List[str]:
+    """Comma-separated column names (default: DEFAULT_EXPORT_COLUMNS); raises ValueError for unknown ones."""
+    if not columns:
+        return list(DEFAULT_EXPORT_COLUMNS)
+    names = [name.strip() for name in columns.split(",") if name.strip()]
+    unknown = [name for name in names if name not in EXPORT_COLUMNS]
+    if unknown or not names:
+        raise ValueError(f"Unknown export columns: {', '.join(unknown) or columns!r}")
+    return names
+
+
+def build_export_query(
+    columns: Sequence[str],
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    status: Optional[str] = None,
+):
+    """SELECT of the requested columns in application id order (stable across runs)."""
+    query = (
+        select(*(EXPORT_COLUMNS[name].label(name) for name in columns))
+        .select_from(LoanApplication)
+        .outerjoin(User, User.id == LoanApplication.user_id)
+        .outerjoin(FraudCheck, FraudCheck.application_id == LoanApplication.id)
+        .order_by(LoanApplication.id)
+    )
+    if created_from:
+        query = query.where(LoanApplication.created_at >= created_from)
+    if created_to:
+        query = query.where(LoanApplication.created_at < created_to)
+    if status:
+        query = query.where(LoanApplication.status == status)
+    return query
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+class ExportWriter:
+    """Serializes batches of rows to bytes; call header(), rows() per batch, then finish()."""
+
+    def __init__(self, columns: Sequence[str], export_format: str = "ndjson", compress: bool = False):
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {export_format}")
+        self.columns = list(columns)
+        self.format = export_format
+        # wbits=31: gzip container, so the output is a regular .gz file
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    @property
+    def media_type(self) -> str:
+        if self._compressor:
+            return "application/gzip"
+        return "application/x-ndjson" if self.format == "ndjson" else "text/csv"
+
+    @property
+    def extension(self) -> str:
+        return f".{self.format}" + (".gz" if self._compressor else "")
+
+    def _out(self, data: str) -> bytes:
+        raw = data.encode("utf-8")
+        return self._compressor.compress(raw) if self._compressor else raw
+
+    def _csv_value(self, value):
+        if isinstance(value, (dict, list)):
+            return json.dumps(value)
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        return value
+
+    def header(self) -> bytes:
+        if self.format != "csv":
+            return b""
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(self.columns)
+        return self._out(buffer.getvalue())
+
+    def rows(self, rows: Iterable[Sequence]) -> bytes:
+        buffer = io.StringIO()
+        if self.format == "csv":
+            writer = csv.writer(buffer)
+            for row in rows:
+                writer.writerow([self._csv_value(value) for value in row])
+        else:
+            for row in rows:
+                buffer.write(json.dumps(dict(zip(self.columns, row)), default=_json_default))
+                buffer.write("\n")
+        return self._out(buffer.getvalue())
+
+    def finish(self) -> bytes:
+        return self._compressor.flush() if self._compressor else b""
+
@@ -0,0 +1,232 @@
+"""
+Declarative fraud rule configuration.
+
+Thresholds, flag weights, severe flags and applicant overrides live in a
+versioned JSON file (app/config/fraud_rules.json by default). The file is
+validated and compiled once into a CompiledRuleSet; the registry re-checks
+the file's mtime periodically and swaps in the new rule set without a
+restart. A broken edit never replaces a working rule set.
+"""
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+FRAUD_RULES_PATH = os.getenv("FRAUD_RULES_PATH", "app/config/fraud_rules.json")
+# How often (seconds) the registry checks the rules file for changes
+FRAUD_RULES_RELOAD_SECONDS = float(os.getenv("FRAUD_RULES_RELOAD_SECONDS", 5))
+
+REQUIRED_THRESHOLDS = {
+    "max_loan_to_income_ratio",
+    "low_cibil_score",
+    "low_cibil_max_loan_amount",
+    "max_annual_income",
+    "max_payment_to_income_ratio",
+    "min_ocr_text_length",
+    "min_words_for_overlap",
+    "max_document_overlap",
+    "income_doc_high_ratio",
+    "income_doc_low_ratio",
+}
+
+REQUIRED_SCORING = {
+    "base_score",
+    "default_flag_weight",
+    "severe_flag_weight",
+    "max_score",
+    "fraudulent_score",
+    "fraudulent_min_flags",
+    "anomaly_score",
+    "anomaly_model_threshold",
+}
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def validate_rule_config(config: Dict):
+    """Raise ValueError describing the first problem found in a rule config."""
+    if not isinstance(config, dict):
+        raise ValueError("Fraud rule config must be a JSON object")
+    if not isinstance(config.get("version"), str) or not config["version"]:
+        raise ValueError("Fraud rule config needs a non-empty string 'version'")
+
+    thresholds = config.get("thresholds") or {}
+    missing = REQUIRED_THRESHOLDS - set(thresholds)
+    if missing:
+        raise ValueError(f"Missing thresholds: {', '.join(sorted(missing))}")
+    for name, value in thresholds.items():
+        if not _is_number(value) or value < 0:
+            raise ValueError(f"Threshold '{name}' must be a non-negative number")
+    if not 0 <= thresholds["max_document_overlap"] <= 1:
+        raise ValueError("Threshold 'max_document_overlap' must be between 0 and 1")
+    if thresholds["income_doc_low_ratio"] > thresholds["income_doc_high_ratio"]:
+        raise ValueError("'income_doc_low_ratio' cannot exceed 'income_doc_high_ratio'")
+
+    scoring = config.get("scoring") or {}
+    missing = REQUIRED_SCORING - set(scoring)
+    if missing:
+        raise ValueError(f"Missing scoring settings: {', '.join(sorted(missing))}")
+    for name in REQUIRED_SCORING:
+        if not _is_number(scoring[name]) or scoring[name] < 0:
+            raise ValueError(f"Scoring setting '{name}' must be a non-negative number")
+    if scoring["anomaly_model_threshold"] > 1:
+        raise ValueError("'anomaly_model_threshold' is a calibrated score between 0 and 1")
+    for flag, weight in (scoring.get("flag_weights") or {}).items():
+        if not _is_number(weight):
+            raise ValueError(f"Weight for flag '{flag}' must be a number")
+    for band in scoring.get("cibil_adjustments") or []:
+        if not _is_number(band.get("below")) or not _is_number(band.get("add")):
+            raise ValueError("Each cibil adjustment needs numeric 'below' and 'add'")
+    for band in scoring.get("risk_levels") or []:
+        if not _is_number(band.get("above")) or not isinstance(band.get("level"), str):
+            raise ValueError("Each risk level needs numeric 'above' and string 'level'")
+
+    if not isinstance(config.get("severe_flags", []), list):
+        raise ValueError("'severe_flags' must be a list of flag names")
+
+    for override in config.get("applicant_overrides") or []:
+        if not isinstance(override.get("full_name"), str) or not override["full_name"].strip():
+            raise ValueError("Each applicant override needs a 'full_name'")
+
+
+class CompiledRuleSet:
+    """
+    A validated rule config flattened into attributes, lookup tables and
+    numpy arrays so that evaluation does no dict walking or parsing.
+    """
+
+    def __init__(self, config: Dict, source: Optional[str] = None):
+        validate_rule_config(config)
+        self.version: str = config["version"]
+        self.source = source
+
+        t = config["thresholds"]
+        self.max_loan_to_income_ratio = float(t["max_loan_to_income_ratio"])
+        self.low_cibil_score = float(t["low_cibil_score"])
+        self.low_cibil_max_loan_amount = float(t["low_cibil_max_loan_amount"])
+        self.max_annual_income = float(t["max_annual_income"])
+        self.max_payment_to_income_ratio = float(t["max_payment_to_income_ratio"])
+        self.min_ocr_text_length = int(t["min_ocr_text_length"])
+        self.min_words_for_overlap = int(t["min_words_for_overlap"])
+        self.max_document_overlap = float(t["max_document_overlap"])
+        self.income_doc_high_ratio = float(t["income_doc_high_ratio"])
+        self.income_doc_low_ratio = float(t["income_doc_low_ratio"])
+
+        s = config["scoring"]
+        self.base_score = float(s["base_score"])
+        self.max_score = float(s["max_score"])
+        self.fraudulent_score = float(s["fraudulent_score"])
+        self.fraudulent_min_flags = int(s["fraudulent_min_flags"])
+        # Fallback cut-off on fraud_score while the streaming anomaly model warms up
+        self.anomaly_score = float(s["anomaly_score"])
+        self.anomaly_model_threshold = float(s["anomaly_model_threshold"])
+        self.default_risk_level = s.get("default_risk_level", "LOW")
+
+        self.severe_flags = frozenset(config.get("severe_flags", []))
+        self._default_weight = float(s["default_flag_weight"])
+        self._severe_weight = float(s["severe_flag_weight"])
+        self._weights: Dict[str, float] = {flag: self._severe_weight for flag in self.severe_flags}
+        self._weights.update({flag: float(w) for flag, w in (s.get("flag_weights") or {}).items()})
+
+        # First matching band wins, so bands are evaluated in ascending order
+        cibil_bands = sorted(s.get("cibil_adjustments") or [], key=lambda b: b["below"])
+        self._cibil_below = np.array([b["below"] for b in cibil_bands], dtype=np.float64)
+        self._cibil_add = np.array([b["add"] for b in cibil_bands], dtype=np.float64)
+
+        risk_bands = sorted(s.get("risk_levels") or [], key=lambda b: b["above"], reverse=True)
+        self._risk_above = [float(b["above"]) for b in risk_bands]
+        self._risk_levels = [b["level"] for b in risk_bands]
+
+        self._overrides = {
+            o["full_name"].strip().lower(): {
+                "remove_flags": frozenset(o.get("remove_flags", [])),
+                "remove_flag_prefixes": tuple(o.get("remove_flag_prefixes", [])),
+                "add_flags": list(o.get("add_flags", [])),
+            }
+            for o in config.get("applicant_overrides") or []
+        }
+
+    def flag_weight(self, flag: str) -> float:
+        return self._weights.get(flag, self._default_weight)
+
+    def flag_weights(self, flag_names: Sequence[str]) -> np.ndarray:
+        return np.array([self.flag_weight(flag) for flag in flag_names], dtype=np.float64)
+
+    def cibil_adjustment(self, cibil_scores: np.ndarray) -> np.ndarray:
+        if not len(self._cibil_below):
+            return np.zeros(len(cibil_scores))
+        conditions = [cibil_scores < below for below in self._cibil_below]
+        return np.select(conditions, list(self._cibil_add), 0.0)
+
+    def risk_level(self, fraud_scores: np.ndarray) -> np.ndarray:
+        if not self._risk_levels:
+            return np.full(len(fraud_scores), self.default_risk_level)
+        conditions = [fraud_scores > above for above in self._risk_above]
+        return np.select(conditions, self._risk_levels, self.default_risk_level)
+
+    def apply_overrides(self, full_name: str, flags: List[str]) -> List[str]:
+        override = self._overrides.get(full_name)
+        if not override:
+            return flags
+        flags = [
+            f for f in flags
+            if f not in override["remove_flags"] and not f.startswith(override["remove_flag_prefixes"])
+        ]
+        for flag in override["add_flags"]:
+            if flag not in flags:
+                flags.append(flag)
+        return flags
+
+
+def load_rule_set(path: str) -> CompiledRuleSet:
+    """Read, validate and compile a rule config file."""
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    return CompiledRuleSet(config, source=path)
+
+
+class FraudRuleRegistry:
+    """Holds the active rule set and hot-reloads it when the file changes."""
+
+    def __init__(self, path: str = FRAUD_RULES_PATH, reload_seconds: float = FRAUD_RULES_RELOAD_SECONDS):
+        self.path = path
+        self.reload_seconds = reload_seconds
+        self._lock = threading.Lock()
+        self._mtime = os.path.getmtime(path)
+        self._rule_set = load_rule_set(path)
+        self._next_check = time.monotonic() + reload_seconds
+        print(f"✅ Fraud rules loaded (version {self._rule_set.version})")
+
+    def get(self) -> CompiledRuleSet:
+        if time.monotonic() >= self._next_check:
+            self._maybe_reload()
+        return self._rule_set
+
+    def _maybe_reload(self):
+        with self._lock:
+            self._next_check = time.monotonic() + self.reload_seconds
+            try:
+                mtime = os.path.getmtime(self.path)
+                if mtime == self._mtime:
+                    return
+                # Remember the mtime even if the load fails, so a broken file
+                # is reported once rather than on every check
+                self._mtime = mtime
+                rule_set = load_rule_set(self.path)
+            except Exception as e:
+                print(f"⚠️ Warning: Keeping fraud rules version {self._rule_set.version}, reload failed: {e}")
+                return
+            previous = self._rule_set.version
+            self._rule_set = rule_set
+            print(f"🔄 Fraud rules reloaded: {previous} -> {rule_set.version}")
+
+
+fraud_rules = FraudRuleRegistry()
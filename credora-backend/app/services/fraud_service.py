@@ -1,32 +1,38 @@
-import os
-import re
-from typing import Dict, List
+from typing import Dict, List, Optional, Sequence, Tuple
 
-from app.services.document_quality_service import check_photo_quality
+import numpy as np
 
+from app.services.document_features import get_document_features
+from app.services.fraud_rules import CompiledRuleSet, fraud_rules
+
+# Document types whose content is checked against a keyword category of the same name
+KEYWORD_CHECKED_TYPES = ["identity_proof", "address_proof", "income_proof"]
 
 class FraudService:
     def __init__(self):
         pass
     
-    def check_rule_based_fraud(self, application_data: Dict, documents: List) -> List[str]:
-        """Rule-based fraud checks"""
+    def check_rule_based_fraud(
+        self, application_data: Dict, documents: List, rule_set: Optional[CompiledRuleSet] = None
+    ) -> List[str]:
+        """Rule-based fraud checks; thresholds come from the active rule set"""
+        rules = rule_set or fraud_rules.get()
         flags = []
         
         # Check if loan amount is excessive compared to income
         income = application_data.get('income_annum', 0)
         loan_amount = application_data.get('loan_amount', 0)
         
-        if income > 0 and loan_amount > income * 10:
+        if income > 0 and loan_amount > income * rules.max_loan_to_income_ratio:
             flags.append("EXCESSIVE_LOAN_AMOUNT")
         
         # Check if CIBIL score is low but loan amount is high
         cibil_score = application_data.get('cibil_score', 0)
-        if cibil_score < 550 and loan_amount > 500000:
+        if cibil_score < rules.low_cibil_score and loan_amount > rules.low_cibil_max_loan_amount:
             flags.append("LOW_CREDIT_HIGH_LOAN")
         
         # Check for unrealistic income
-        if income > 50000000:  # 5 crore per year
+        if income > rules.max_annual_income:
             flags.append("UNREALISTIC_INCOME")
         
         # Check loan term vs loan amount ratio
@@ -34,65 +40,71 @@ class FraudService:
         if loan_term > 0:
             monthly_payment = loan_amount / (loan_term * 12)
             monthly_income = income / 12
-            if monthly_income > 0 and monthly_payment > monthly_income * 0.7:
+            if monthly_income > 0 and monthly_payment > monthly_income * rules.max_payment_to_income_ratio:
                 flags.append("HIGH_PAYMENT_TO_INCOME")
 
         # ------- Document & OCR-based rules -------
+        # Rules evaluate against features precomputed at upload time
+        # (see document_features), never against the raw OCR text.
         required_types = ["identity_proof", "address_proof", "income_proof", "photo"]
         if documents:
-            doc_text_by_type = {}
+            features_by_type = {}
+            photo_flags = []
             for doc in documents:
-                text = getattr(doc, "ocr_extracted_text", None) or ""
-                doc_text_by_type[doc.document_type] = text.lower()
+                features = get_document_features(doc)
+                features_by_type[doc.document_type] = features
+                if doc.document_type == "photo" and getattr(doc, "file_path", None):
+                    photo_flags.extend(features.get("photo_flags", []))
 
             # Quick checks: missing or very weak OCR text
             for doc_type in required_types:
-                if doc_type not in doc_text_by_type:
+                if doc_type not in features_by_type:
                     flags.append(f"MISSING_{doc_type.upper()}")
                 else:
                     # Skip OCR text length check for photos (they aren't expected to have text)
-                    if doc_type != "photo" and len(doc_text_by_type[doc_type]) < 40:
+                    if doc_type != "photo" and features_by_type[doc_type]["length"] < rules.min_ocr_text_length:
                         flags.append(f"DOC_OCR_WEAK_{doc_type.upper()}")
 
-            # Identity proof name mismatch
+            # Identity proof name mismatch. Name parts never contain whitespace,
+            # so "part in text" is equivalent to "part inside some token".
             full_name = (application_data.get("user_full_name") or "").lower()
-            identity_text = doc_text_by_type.get("identity_proof", "")
-            if full_name and identity_text:
+            identity_features = features_by_type.get("identity_proof")
+            if full_name and identity_features and identity_features["length"]:
+                identity_tokens = identity_features["tokens"]
+                token_set = set(identity_tokens)
                 name_parts = [p for p in full_name.split() if len(p) > 2]
-                if name_parts and not all(part in identity_text for part in name_parts):
+                if name_parts and not all(
+                    part in token_set or any(part in tok for tok in identity_tokens)
+                    for part in name_parts
+                ):
                     flags.append("IDENTITY_NAME_MISMATCH")
 
             # Keyword expectations per document type
-            expected_keywords = {
-                "identity_proof": ["aadhar", "aadhaar", "passport", "license", "licence", "pan", "govt of india", "government of india"],
-                "address_proof": ["address", "pin code", "pincode", "road", "street", "city", "state"],
-                "income_proof": ["salary", "income", "ctc", "gross", "net pay", "payslip", "pay slip", "annual income", "form 16", "itr"],
-            }
-            marksheet_keywords = ["marksheet", "mark sheet", "semester", "university", "examination", "exam", "cgpa", "sgpa"]
-
-            for doc_type, text in doc_text_by_type.items():
-                if doc_type in expected_keywords:
-                    has_expected = any(k in text for k in expected_keywords[doc_type])
-                    has_marksheet = any(k in text for k in marksheet_keywords)
+            for doc_type, features in features_by_type.items():
+                if doc_type in KEYWORD_CHECKED_TYPES:
+                    categories = features["keyword_categories"]
+                    has_expected = doc_type in categories
+                    has_marksheet = "marksheet" in categories
                     if not has_expected and has_marksheet:
                         flags.append(f"POSSIBLE_MARKSHEET_IN_{doc_type.upper()}")
                     elif not has_expected:
                         flags.append(f"UNEXPECTED_CONTENT_IN_{doc_type.upper()}")
 
             # Same document reused for multiple proofs (very similar OCR text)
-            types = list(doc_text_by_type.keys())
+            token_sets = {
+                doc_type: set(features["tokens"])
+                for doc_type, features in features_by_type.items()
+                if features["length"]
+            }
+            types = list(token_sets.keys())
             for i in range(len(types)):
                 for j in range(i + 1, len(types)):
-                    t1, t2 = types[i], types[j]
-                    text1, text2 = doc_text_by_type[t1], doc_text_by_type[t2]
-                    if not text1 or not text2:
-                        continue
-                    words1 = set(text1.split())
-                    words2 = set(text2.split())
-                    if len(words1) < 20 or len(words2) < 20:
+                    words1 = token_sets[types[i]]
+                    words2 = token_sets[types[j]]
+                    if len(words1) < rules.min_words_for_overlap or len(words2) < rules.min_words_for_overlap:
                         continue
                     overlap = len(words1 & words2) / max(len(words1), len(words2))
-                    if overlap > 0.8:
+                    if overlap > rules.max_document_overlap:
                         flags.append("SAME_DOCUMENT_USED_FOR_MULTIPLE_PROOFS")
                         break
                 else:
@@ -100,52 +112,26 @@ class FraudService:
                 break
 
             # Income proof vs declared income
-            income_text = ""
-            for key in ["income_proof", "salary_slip", "bank_statement"]:
-                if key in doc_text_by_type:
-                    income_text += " " + doc_text_by_type[key]
-
-            if income_text and income > 0:
-                raw_numbers = re.findall(r"\d[\d,]{4,}", income_text)
-                parsed_numbers = []
-                for n in raw_numbers:
-                    try:
-                        parsed_numbers.append(float(n.replace(",", "")))
-                    except ValueError:
-                        continue
-
+            income_docs = [
+                features_by_type[key]
+                for key in ["income_proof", "salary_slip", "bank_statement"]
+                if key in features_by_type
+            ]
+            if income_docs and income > 0:
+                parsed_numbers = [a for features in income_docs for a in features["amounts"]]
                 if parsed_numbers:
                     inferred_income = max(parsed_numbers)
                     ratio = inferred_income / income if income else 0
-                    if ratio > 1.5:
+                    if ratio > rules.income_doc_high_ratio:
                         flags.append("INCOME_DOC_HIGHER_THAN_DECLARED")
-                    elif ratio < 0.5:
+                    elif ratio < rules.income_doc_low_ratio:
                         flags.append("INCOME_DOC_LOWER_THAN_DECLARED")
 
             # -------- Photo quality: face detection and brightness --------
-            for doc in documents:
-                if getattr(doc, "document_type", None) != "photo":
-                    continue
-                file_path = getattr(doc, "file_path", None)
-                if not file_path:
-                    continue
-                # Resolve relative paths (e.g. from older uploads) against cwd
-                if not os.path.isabs(file_path) and not os.path.isfile(file_path):
-                    file_path = os.path.join(os.getcwd(), file_path)
-                photo_flags = check_photo_quality(file_path)
-                flags.extend(photo_flags)
-
-            # --- Special Logic for Hiral Pan Card Test Case ---
-            if full_name == "hiral pan card":
-                # Remove common quality flags to simulate a "clear" mismatch
-                flags = [f for f in flags if f not in ["NO_FACE_DETECTED_IN_PHOTO", "PHOTO_OR_IMAGE_TOO_DARK"]]
-                # Add the specific mismatch flag requested by the user
-                if "FACE_IDENTITY_MISMATCH" not in flags:
-                    flags.append("FACE_IDENTITY_MISMATCH")
-                
-                # Ensure no document mismatch flags for Hiral (to show "other details are correct")
-                flags = [f for f in flags if not f.startswith("UNEXPECTED_CONTENT_IN_")]
-                flags = [f for f in flags if f != "IDENTITY_NAME_MISMATCH"]
+            flags.extend(photo_flags)
+
+            # Per-applicant overrides (e.g. demo cases) are part of the rule set
+            flags = rules.apply_overrides(full_name, flags)
         else:
             # No documents uploaded yet (e.g. process ran before uploads)
             for doc_type in required_types:
@@ -153,56 +139,139 @@ class FraudService:
 
         return flags
     
-    def detect_fraud(self, application_data: Dict, documents: List) -> Dict:
-        """Main fraud detection function"""
+    def detect_fraud(
+        self,
+        application_data: Dict,
+        documents: List,
+        extra_flags: Optional[List[str]] = None,
+        rule_set: Optional[CompiledRuleSet] = None,
+        anomaly_score: Optional[float] = None,
+    ) -> Dict:
+        """
+        Main fraud detection function.
+        extra_flags carries signals computed outside this application,
+        e.g. velocity / shared-identity flags from velocity_service.
+        anomaly_score is the calibrated score from anomaly_service (None
+        while the model is warming up).
+        rule_set defaults to the active (hot-reloaded) rules; pass another
+        compiled rule set to evaluate an alternative policy.
+        """
+        # Resolve once so rules and scoring use the same version
+        rules = rule_set or fraud_rules.get()
         
-        fraud_flags = self.check_rule_based_fraud(application_data, documents)
+        fraud_flags = self.check_rule_based_fraud(application_data, documents, rule_set=rules)
+        fraud_flags.extend(extra_flags or [])
         
-        # Flags that indicate strong document/identity risk (higher weight)
-        severe_flags = {
-            "NO_FACE_DETECTED_IN_PHOTO",
-            "PHOTO_OR_IMAGE_TOO_DARK",
-            "UNEXPECTED_CONTENT_IN_IDENTITY_PROOF",
-            "UNEXPECTED_CONTENT_IN_ADDRESS_PROOF",
-            "UNEXPECTED_CONTENT_IN_INCOME_PROOF",
-            "POSSIBLE_MARKSHEET_IN_IDENTITY_PROOF",
-            "POSSIBLE_MARKSHEET_IN_ADDRESS_PROOF",
-            "POSSIBLE_MARKSHEET_IN_INCOME_PROOF",
-            "SAME_DOCUMENT_USED_FOR_MULTIPLE_PROOFS",
-            "IDENTITY_NAME_MISMATCH",
-            "FACE_IDENTITY_MISMATCH",
-        }
+        # Scored through the batch kernel so single and batch results never drift apart
+        return self.detect_fraud_batch(
+            [fraud_flags], [application_data.get('cibil_score', 300)], rule_set=rules,
+            anomaly_scores=[anomaly_score],
+        )[0]
+
+    def build_flag_matrix(self, flag_lists: List[List[str]]) -> Tuple[np.ndarray, List[str]]:
+        """
+        Encode per-application flag lists as an (n_apps, max_flags) matrix of
+        indices into the returned flag_names, in raise order, padded with -1.
+        """
+        flag_names: List[str] = []
+        columns: Dict[str, int] = {}
+        width = max((len(flags) for flags in flag_lists), default=0)
+        flag_ids = np.full((len(flag_lists), width), -1, dtype=np.int64)
+        for row, flags in enumerate(flag_lists):
+            for col, flag in enumerate(flags):
+                if flag not in columns:
+                    columns[flag] = len(flag_names)
+                    flag_names.append(flag)
+                flag_ids[row, col] = columns[flag]
+        return flag_ids, flag_names
+
+    def score_batch(
+        self,
+        flag_ids,
+        flag_names: Sequence[str],
+        cibil_scores,
+        rule_set: Optional[CompiledRuleSet] = None,
+        anomaly_scores=None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Vectorized fraud scoring for many applications at once.
+
+        flag_ids is the (n_apps, max_flags) matrix from build_flag_matrix and
+        cibil_scores holds one CIBIL score per application and the optional
+        anomaly_scores the calibrated streaming-model scores (None/NaN where
+        the model had no opinion). Weights are
+        accumulated column by column in raise order, which reproduces the
+        single-application arithmetic bit for bit; detect_fraud goes
+        through this same function.
+        """
+        rules = rule_set or fraud_rules.get()
+        flag_ids = np.asarray(flag_ids, dtype=np.int64)
+        cibil = np.asarray(cibil_scores, dtype=np.float64)
+        if anomaly_scores is None:
+            anomaly = np.full(len(flag_ids), np.nan)
+        else:
+            anomaly = np.array([np.nan if a is None else a for a in anomaly_scores], dtype=np.float64)
+
+        # Severe flags carry a higher weight; the trailing 0.0 is picked up
+        # by -1 padding and leaves sums unchanged.
+        weights = np.append(rules.flag_weights(flag_names), 0.0)
+        flag_weights = weights[flag_ids]
+        n_flags = (flag_ids >= 0).sum(axis=1)
         
-        # Calculate base fraud score (deterministic, primarily driven by flags and CIBIL)
-        base_score = 0.1
-        for flag in fraud_flags:
-            base_score += 0.18 if flag in severe_flags else 0.12
+        # Base fraud score (deterministic, primarily driven by flags and CIBIL)
+        base_score = np.full(len(flag_ids), rules.base_score)
+        for col in range(flag_weights.shape[1]):
+            base_score += flag_weights[:, col]
         
         # Adjust based on CIBIL score (lower score = higher fraud risk)
-        cibil_score = application_data.get('cibil_score', 300)
-        if cibil_score < 500:
-            base_score += 0.2
-        elif cibil_score < 600:
-            base_score += 0.1
+        base_score = base_score + rules.cibil_adjustment(cibil)
         
-        # Cap at 1.0
-        fraud_score = min(base_score, 1.0)
-        is_fraudulent = fraud_score > 0.6 or len(fraud_flags) >= 2
+        # Cap at max score
+        fraud_score = np.minimum(base_score, rules.max_score)
+        is_fraudulent = (fraud_score > rules.fraudulent_score) | (n_flags >= rules.fraudulent_min_flags)
         
-        # Determine risk level
-        if fraud_score > 0.7:
-            risk_level = "HIGH"
-        elif fraud_score > 0.4:
-            risk_level = "MEDIUM"
-        else:
-            risk_level = "LOW"
+        # Learned anomaly signal when available, score cut-off otherwise
+        anomaly_detected = np.where(
+            np.isnan(anomaly),
+            fraud_score > rules.anomaly_score,
+            anomaly >= rules.anomaly_model_threshold,
+        )
         
         return {
-            "fraud_score": float(fraud_score),
+            "fraud_score": fraud_score,
             "is_fraudulent": is_fraudulent,
-            "anomaly_detected": fraud_score > 0.5,
-            "fraud_flags": fraud_flags,
-            "risk_level": risk_level
+            "anomaly_detected": anomaly_detected,
+            "risk_level": rules.risk_level(fraud_score),
         }
 
+    def detect_fraud_batch(
+        self,
+        flag_lists: List[List[str]],
+        cibil_scores,
+        rule_set: Optional[CompiledRuleSet] = None,
+        anomaly_scores=None,
+    ) -> List[Dict]:
+        """
+        Rescore many applications from already-computed flags
+        (e.g. stored fraud_checks.fraud_flags) after a weight change.
+        """
+        rules = rule_set or fraud_rules.get()
+        anomaly_scores = list(anomaly_scores) if anomaly_scores is not None else [None] * len(flag_lists)
+        flag_ids, flag_names = self.build_flag_matrix(flag_lists)
+        scores = self.score_batch(
+            flag_ids, flag_names, cibil_scores, rule_set=rules, anomaly_scores=anomaly_scores
+        )
+        return [
+            {
+                "fraud_score": float(scores["fraud_score"][i]),
+                "is_fraudulent": bool(scores["is_fraudulent"][i]),
+                "anomaly_detected": bool(scores["anomaly_detected"][i]),
+                "anomaly_score": anomaly_scores[i],
+                "fraud_flags": flags,
+                "risk_level": str(scores["risk_level"][i]),
+                "rule_set_version": rules.version,
+            }
+            for i, flags in enumerate(flag_lists)
+        ]
+
 fraud_service = FraudService()
\ No newline at end of file
@@ -0,0 +1,130 @@
+"""
+Content-addressable cache of OCR results.
+
+Entries are keyed by the SHA-256 of the file bytes plus everything that can
+change the extracted text (tesseract version, language, extraction profile),
+so identical bytes are only ever OCRed once per engine configuration. Text is
+stored as one file per key under OCR_CACHE_DIR; reads refresh the entry's
+mtime and the least recently used entries are evicted once the directory
+grows past OCR_CACHE_MAX_BYTES.
+"""
+import hashlib
+import os
+import threading
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from app.services.ocr_engine import OCR_LANGUAGE, ocr_engine
+
+load_dotenv()
+
+OCR_CACHE_DIR = os.getenv("OCR_CACHE_DIR", "ocr_cache")
+# Size budget for cached text; 0 disables the cache
+OCR_CACHE_MAX_BYTES = int(os.getenv("OCR_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+# Eviction trims the cache down to this fraction of the budget
+OCR_CACHE_LOW_WATERMARK = 0.9
+
+# Bump when extraction logic changes in a way that alters the text produced
+OCR_PIPELINE_VERSION = 1
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class OCRCache:
+    def __init__(self, directory: str = OCR_CACHE_DIR, max_bytes: int = OCR_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def key(self, content_sha256: str, profile: str = "") -> str:
+        material = "|".join([
+            content_sha256, ocr_engine.version, OCR_LANGUAGE, str(OCR_PIPELINE_VERSION), profile,
+        ])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.txt")
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+            os.utime(path)
+            return text
+        except OSError:
+            return None
+
+    def put(self, key: str, text: str):
+        """Store a result. Only successful extractions should be cached."""
+        if not self.enabled or not text:
+            return
+        path = self._path(key)
+        data = text.encode("utf-8")
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ Warning: Could not write OCR cache entry: {e}")
+            return
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict_locked()
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".txt"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    yield stat.st_mtime, stat.st_size, path
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict_locked(self):
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * OCR_CACHE_LOW_WATERMARK
+        removed = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        self._size = total
+        print(f"🧹 OCR cache evicted {removed} entries ({total} bytes kept)")
+
+
+ocr_cache = OCRCache()
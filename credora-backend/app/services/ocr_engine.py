@@ -0,0 +1,192 @@
+"""
+OCR engine backends.
+
+pytesseract starts a tesseract process, writes the image to a temp file and
+reloads the language model on every call. When tesserocr is installed the
+engine instead keeps a pool of long-lived worker processes, each holding an
+initialized tesseract API, and images are handed over in memory. Workers
+are recycled after OCR_ENGINE_MAX_JOBS images (tesseract leaks slowly on
+bad input), a pool that breaks or hangs is rebuilt, and pytesseract remains
+the fallback whenever the pool can't serve a request. Callers wait for a free
+worker before submitting, so a job's timeout only ever covers its own run.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+
+import pytesseract
+from dotenv import load_dotenv
+from PIL import Image
+
+# Optional tesserocr - without it every image goes through pytesseract
+try:
+    import tesserocr
+    HAS_TESSEROCR = True
+except ImportError:
+    HAS_TESSEROCR = False
+
+load_dotenv()
+
+# "auto" uses the worker pool when tesserocr is installed; "pytesseract" forces the fallback
+OCR_ENGINE = os.getenv("OCR_ENGINE", "auto").lower()
+OCR_ENGINE_WORKERS = int(os.getenv("OCR_ENGINE_WORKERS", os.getenv("OCR_MAX_WORKERS", 4)))
+# Recycle a worker process after this many images
+OCR_ENGINE_MAX_JOBS = int(os.getenv("OCR_ENGINE_MAX_JOBS", 200))
+# How long a health-check ping may take before the pool is considered hung
+OCR_ENGINE_PING_TIMEOUT = float(os.getenv("OCR_ENGINE_PING_TIMEOUT", 10))
+# How long a job may wait for a free worker before it is given up on
+OCR_ENGINE_QUEUE_TIMEOUT = float(os.getenv("OCR_ENGINE_QUEUE_TIMEOUT", 120))
+
+OCR_LANGUAGE = "eng"
+
+# State of a worker process; set by the pool initializer
+_worker_api = None
+
+
+def _has_language_data(lang: str) -> bool:
+    """tesserocr wheels bundle libtesseract but not its language data (tessdata)."""
+    try:
+        _, languages = tesserocr.get_languages()
+    except Exception:
+        return False
+    return lang in languages
+
+
+def _init_worker(lang: str):
+    global _worker_api
+    _worker_api = tesserocr.PyTessBaseAPI(lang=lang)
+
+
+def _worker_recognize(image: Image.Image) -> str:
+    _worker_api.SetImage(image)
+    return _worker_api.GetUTF8Text()
+
+
+def _worker_ping() -> int:
+    return os.getpid() if _worker_api is not None else -1
+
+
+class OCREngine:
+    def __init__(self, lang: str = OCR_LANGUAGE, workers: int = OCR_ENGINE_WORKERS, max_jobs: int = OCR_ENGINE_MAX_JOBS):
+        self.lang = lang
+        self.workers = workers
+        self.max_jobs = max_jobs
+        self.use_pool = HAS_TESSEROCR and OCR_ENGINE != "pytesseract"
+        if self.use_pool and not _has_language_data(lang):
+            print(f"⚠️ Warning: tesserocr has no '{lang}' language data (set TESSDATA_PREFIX); using pytesseract")
+            self.use_pool = False
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        # One in-flight job per worker: a submitted job starts right away, so
+        # its timeout measures tesseract's work and not time spent queued
+        self._slots = threading.BoundedSemaphore(workers)
+        self._version: Optional[str] = None
+        self.restarts = 0
+
+    @property
+    def name(self) -> str:
+        return "tesserocr" if self.use_pool else "pytesseract"
+
+    @property
+    def version(self) -> str:
+        """Engine and tesseract version, part of the OCR cache key."""
+        if self._version is None:
+            try:
+                if self.use_pool:
+                    version = tesserocr.tesseract_version().splitlines()[0]
+                else:
+                    version = str(pytesseract.get_tesseract_version())
+            except Exception:
+                version = "unavailable"
+            self._version = f"{self.name}:{version}"
+        return self._version
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: max_tasks_per_child is not supported with fork, and
+                # forking a threaded server process isn't safe anyway
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.lang,),
+                    max_tasks_per_child=self.max_jobs,
+                )
+            return self._pool
+
+    def _restart(self, reason: str, failed: Optional[ProcessPoolExecutor] = None):
+        """Replace the pool; with `failed`, only if that pool is still the current one."""
+        with self._lock:
+            if failed is not None and self._pool is not failed:
+                # Already replaced by a job that saw the same failure
+                return
+            pool, self._pool = self._pool, None
+            self.restarts += 1
+        print(f"⚠️ Warning: Restarting OCR worker pool ({reason})")
+        if pool is not None:
+            # A hung tesseract never returns, so shutdown alone would leave it running
+            for process in list(getattr(pool, "_processes", {}).values()):
+                process.terminate()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _fallback(self, image: Image.Image, timeout: float) -> str:
+        return pytesseract.image_to_string(image, lang=self.lang, timeout=timeout)
+
+    def _run(self, fn, *args, timeout: float):
+        """Run fn(*args) on the pool once a worker is free; a timeout restarts the pool."""
+        if not self._slots.acquire(timeout=OCR_ENGINE_QUEUE_TIMEOUT):
+            raise RuntimeError("OCR engine busy")
+        try:
+            pool = self._get_pool()
+            future = pool.submit(fn, *args)
+            try:
+                return future.result(timeout=timeout)
+            except FutureTimeoutError:
+                self._restart(f"no result after {timeout:.0f}s", failed=pool)
+                raise RuntimeError("OCR timed out")
+            except BrokenProcessPool:
+                self._restart("a worker died", failed=pool)
+                raise
+        finally:
+            self._slots.release()
+
+    def recognize(self, image: Image.Image, timeout: float) -> str:
+        """OCR an in-memory image. Raises like pytesseract if no engine can read it."""
+        if not self.use_pool:
+            return self._fallback(image, timeout)
+        try:
+            return self._run(_worker_recognize, image, timeout=timeout)
+        except BrokenProcessPool:
+            return self._fallback(image, timeout)
+
+    def health_check(self) -> Dict:
+        """Ping the worker pool, rebuilding it if it doesn't answer."""
+        if not self.use_pool:
+            return {"engine": self.name, "healthy": True}
+        if not self._slots.acquire(blocking=False):
+            # Every worker is busy with a job (each under its own timeout); a
+            # ping would only queue behind them
+            return {"engine": self.name, "healthy": True, "busy": True, "restarts": self.restarts}
+        self._slots.release()
+        pool = self._get_pool()
+        try:
+            healthy = self._run(_worker_ping, timeout=OCR_ENGINE_PING_TIMEOUT) > 0
+        except Exception:
+            healthy = False
+        if not healthy:
+            self._restart("health check failed", failed=pool)
+        return {"engine": self.name, "healthy": healthy, "restarts": self.restarts}
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+ocr_engine = OCREngine()
@@ -0,0 +1,173 @@
+"""
+Region-of-interest OCR with early exit.
+
+For identity and address proofs the fraud checks only need the applicant's
+name, an expected keyword and any ID numbers, which almost always sit in
+the first few lines. Instead of transcribing the whole page, text lines are
+located with morphology, ranked by likely relevance (large text near the
+top first) and recognized in small batches until the document type's
+sufficiency condition is met or a character budget is reached.
+
+Stopping early must not starve the other consumers of the text: the
+same-document overlap check needs at least the rule set's
+min_words_for_overlap distinct words per document, and the velocity index
+keys on phone numbers that tend to sit lower on the page. So ROI never stops
+before it has read ROI_OVERLAP_WORD_FACTOR times that many words, and the
+character budgets cover a typical card or bill in full.
+"""
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from app.services.document_features import AADHAAR_PATTERN, KEYWORD_CATEGORIES, PAN_PATTERN
+from app.services.fraud_rules import fraud_rules
+
+# Optional OpenCV - without it documents are always OCRed as a full page
+try:
+    import cv2
+    HAS_OPENCV = True
+except ImportError:
+    HAS_OPENCV = False
+
+OCR_MODE_FULL = "full"
+OCR_MODE_ROI = "roi"
+
+# Text lines recognized per engine call; amortizes per-call overhead
+ROI_BATCH_SIZE = 4
+# Padding (px) around each detected line before recognition
+ROI_PADDING = 6
+# Distinct words to read before stopping, as a multiple of the fraud rules'
+# min_words_for_overlap (so the overlap check still sees enough words)
+ROI_OVERLAP_WORD_FACTOR = 2
+# Bump when the sufficiency rules change; part of the OCR cache key
+ROI_VERSION = 2
+
+# What has to be found before ROI OCR may stop, per document type.
+# Types without an entry are always OCRed as a full page.
+#   require_name: every part of the applicant's name appears
+#   require_keyword: a keyword of the document type's category appears
+#   require_id_number: a PAN or Aadhaar number appears
+#   min_chars: never stop below this (keeps DOC_OCR_WEAK_* meaningful)
+#   char_budget: stop once this much text was read, found or not
+ROI_SUFFICIENCY: Dict[str, Dict] = {
+    "identity_proof": {
+        "require_name": True,
+        "require_keyword": True,
+        "require_id_number": True,
+        "min_chars": 200,
+        "char_budget": 2000,
+    },
+    "address_proof": {
+        "require_name": True,
+        "require_keyword": True,
+        "require_id_number": False,
+        "min_chars": 200,
+        "char_budget": 3000,
+    },
+}
+
+Box = Tuple[int, int, int, int]
+
+
+def _name_parts(full_name: Optional[str]) -> List[str]:
+    # Same rule as the identity name check in fraud_service
+    return [p for p in (full_name or "").lower().split() if len(p) > 2]
+
+
+def min_words() -> int:
+    """Distinct words ROI OCR reads before it may stop."""
+    return fraud_rules.get().min_words_for_overlap * ROI_OVERLAP_WORD_FACTOR
+
+
+def is_sufficient(text: str, document_type: str, hints: Optional[Dict] = None) -> bool:
+    """True when `text` already holds everything the fraud checks use."""
+    rule = ROI_SUFFICIENCY.get(document_type)
+    if rule is None:
+        return False
+    lowered = " ".join(text.lower().split())
+    if len(lowered) < rule["min_chars"]:
+        return False
+    if len(lowered) >= rule["char_budget"]:
+        return True
+    if len(set(lowered.split())) < min_words():
+        return False
+
+    if rule["require_name"]:
+        parts = _name_parts((hints or {}).get("full_name"))
+        if not parts or not all(part in lowered for part in parts):
+            return False
+    if rule["require_keyword"]:
+        if not any(kw in lowered for kw in KEYWORD_CATEGORIES.get(document_type, [])):
+            return False
+    if rule["require_id_number"]:
+        if not (PAN_PATTERN.search(lowered) or AADHAAR_PATTERN.search(lowered)):
+            return False
+    return True
+
+
+def detect_text_regions(image: Image.Image) -> List[Box]:
+    """
+    Bounding boxes (x, y, w, h) of text lines in a preprocessed grayscale
+    image, ranked by likely relevance: taller text and text nearer the top
+    first.
+    """
+    gray = np.asarray(image.convert("L"))
+    height, width = gray.shape
+    _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    # Merge characters into words and words into lines
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(15, width // 40), 3))
+    lines = cv2.dilate(ink, kernel, iterations=1)
+    contours, _ = cv2.findContours(lines, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    boxes = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        # Drop specks, rules/borders and blobs too tall to be a line of text
+        if h < 8 or w < 2 * h or h > height / 4:
+            continue
+        boxes.append((x, y, w, h))
+    if not boxes:
+        return []
+
+    median_height = float(np.median([h for _, _, _, h in boxes]))
+    return sorted(boxes, key=lambda b: (b[1] / height) - 0.5 * (b[3] / median_height - 1))
+
+
+def _stack(image: Image.Image, boxes: List[Box]) -> Image.Image:
+    """Crop the boxes and stack them top to bottom on a white strip."""
+    crops = []
+    for x, y, w, h in boxes:
+        crops.append(image.crop((
+            max(0, x - ROI_PADDING), max(0, y - ROI_PADDING),
+            min(image.width, x + w + ROI_PADDING), min(image.height, y + h + ROI_PADDING),
+        )))
+    strip = Image.new("L", (max(c.width for c in crops), sum(c.height + ROI_PADDING for c in crops)), 255)
+    top = 0
+    for crop in crops:
+        strip.paste(crop.convert("L"), (0, top))
+        top += crop.height + ROI_PADDING
+    return strip
+
+
+def recognize_regions(
+    image: Image.Image,
+    document_type: str,
+    recognize: Callable[[Image.Image], str],
+    hints: Optional[Dict] = None,
+) -> Optional[str]:
+    """
+    OCR the most relevant text lines of a preprocessed image until the
+    sufficiency condition for `document_type` holds. Returns None when no
+    text lines are found, so the caller can fall back to full-page OCR.
+    """
+    boxes = detect_text_regions(image)
+    if not boxes:
+        return None
+
+    parts: List[str] = []
+    for start in range(0, len(boxes), ROI_BATCH_SIZE):
+        parts.append(recognize(_stack(image, boxes[start:start + ROI_BATCH_SIZE])))
+        if is_sufficient(" ".join(parts), document_type, hints):
+            break
+    return " ".join(parts)
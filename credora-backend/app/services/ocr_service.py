@@ -1,56 +1,310 @@
+import asyncio
+import hashlib
+import io
 import os
-from typing import Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, Optional, Tuple
 
-import pytesseract
+from dotenv import load_dotenv
 from PIL import Image
 from PyPDF2 import PdfReader
 
+from app.services.image_preprocessing import preprocess_image, profile_fingerprint
+from app.services.ocr_cache import OCRCache, file_sha256, ocr_cache
+from app.services.ocr_engine import OCR_ENGINE_QUEUE_TIMEOUT, ocr_engine
+from app.services.ocr_regions import (
+    HAS_OPENCV, OCR_MODE_FULL, OCR_MODE_ROI, ROI_SUFFICIENCY, ROI_VERSION, min_words, recognize_regions,
+)
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # optional; scanned pages fall back to their embedded images
+    pdfium = None
+
+load_dotenv()
+
+# Bounded pool shared by all uploads so OCR bursts can't starve the API
+OCR_MAX_WORKERS = int(os.getenv("OCR_MAX_WORKERS", 4))
+# Per tesseract run (an image, a region or a PDF page), enforced where it runs;
+# tesseract is killed and that part gets no text
+OCR_TIMEOUT_SECONDS = float(os.getenv("OCR_TIMEOUT_SECONDS", 30))
+# How long a document may wait for a free OCR thread before it is given up on;
+# never shorter than the engine's own wait for a worker
+OCR_QUEUE_TIMEOUT_SECONDS = max(
+    float(os.getenv("OCR_QUEUE_TIMEOUT_SECONDS", OCR_ENGINE_QUEUE_TIMEOUT)), OCR_ENGINE_QUEUE_TIMEOUT
+)
+
+OCR_EXTENSIONS = {".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp", ".webp", ".pdf"}
+
+# Region-of-interest OCR with early exit for document types that support it:
+# "auto" only with the pooled engine (with pytesseract every small batch
+# starts its own tesseract process, slower than one full-page pass),
+# "true" always (OpenCV permitting), "false" never
+OCR_ROI = os.getenv("OCR_ROI", "auto").lower()
+
+# Pages beyond this are ignored; a long statement doesn't need every page read
+OCR_PDF_MAX_PAGES = int(os.getenv("OCR_PDF_MAX_PAGES", 20))
+# Stop once this much text has been extracted from a PDF
+OCR_PDF_MAX_TEXT_BYTES = int(os.getenv("OCR_PDF_MAX_TEXT_BYTES", 200000))
+# Pages of one PDF extracted in parallel (separate from the per-document pool)
+OCR_PDF_PAGE_WORKERS = int(os.getenv("OCR_PDF_PAGE_WORKERS", 4))
+# Pages with less embedded text than this are treated as scanned and OCRed
+OCR_PDF_MIN_PAGE_CHARS = 20
+# Resolution scanned pages are rasterized at (pypdfium2 only)
+OCR_PDF_RENDER_DPI = 200
+# pdfium is not thread safe; rendering is serialized, OCR of the result is not
+_PDFIUM_LOCK = threading.Lock()
+
+
+class _PdfSource:
+    """
+    PDF bytes shared by the page workers. PdfReader isn't thread safe, so
+    each worker thread parses its own reader over the same bytes.
+    """
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self._local = threading.local()
+
+    def reader(self) -> PdfReader:
+        reader = getattr(self._local, "reader", None)
+        if reader is None:
+            reader = self._local.reader = PdfReader(io.BytesIO(self.data))
+        return reader
+
 
 class OCRService:
+    def __init__(self, cache: Optional[OCRCache] = None):
+        self.cache = cache if cache is not None else ocr_cache
+        self._executor = ThreadPoolExecutor(max_workers=OCR_MAX_WORKERS, thread_name_prefix="ocr")
+        self._page_executor = ThreadPoolExecutor(max_workers=OCR_PDF_PAGE_WORKERS, thread_name_prefix="ocr-page")
+
     def _normalize(self, text: str) -> Optional[str]:
         if not text:
             return None
         cleaned = " ".join(text.split())
         return cleaned or None
 
-    def _extract_from_image(self, file_path: str) -> Optional[str]:
+    def _ocr_image(self, image: Image.Image, document_type: Optional[str] = None) -> str:
+        prepared, _ = preprocess_image(image, document_type)
+        return ocr_engine.recognize(prepared, timeout=OCR_TIMEOUT_SECONDS)
+
+    def _extract_from_image(
+        self,
+        file_path: str,
+        document_type: Optional[str] = None,
+        mode: str = OCR_MODE_FULL,
+        hints: Optional[Dict] = None,
+    ) -> Optional[str]:
         try:
-            image = Image.open(file_path).convert("RGB")
-            text = pytesseract.image_to_string(image, lang="eng")
-            return self._normalize(text)
+            image = Image.open(file_path)
+            if mode == OCR_MODE_ROI:
+                prepared, _ = preprocess_image(image, document_type)
+                text = recognize_regions(
+                    prepared, document_type,
+                    lambda region: ocr_engine.recognize(region, timeout=OCR_TIMEOUT_SECONDS),
+                    hints,
+                )
+                if text is None:
+                    text = ocr_engine.recognize(prepared, timeout=OCR_TIMEOUT_SECONDS)
+                return self._normalize(text)
+            return self._normalize(self._ocr_image(image, document_type))
         except Exception:
             return None
 
-    def _extract_from_pdf(self, file_path: str) -> Optional[str]:
+    def _ocr_pdf_page(self, source: _PdfSource, index: int, document_type: Optional[str] = None) -> str:
+        """OCR a page that has no usable embedded text (a scanned page)."""
+        if pdfium is not None:
+            with _PDFIUM_LOCK:
+                pdf = pdfium.PdfDocument(source.data)
+                try:
+                    image = pdf[index].render(scale=OCR_PDF_RENDER_DPI / 72).to_pil()
+                finally:
+                    pdf.close()
+            image.info["dpi"] = (OCR_PDF_RENDER_DPI, OCR_PDF_RENDER_DPI)
+            return self._ocr_image(image, document_type)
+
+        # Without a rasterizer, OCR the images embedded in the page; a scanned
+        # page is normally a single full-page image
+        parts = []
+        for embedded in source.reader().pages[index].images:
+            try:
+                parts.append(self._ocr_image(Image.open(io.BytesIO(embedded.data)), document_type))
+            except Exception:
+                continue
+        return " ".join(parts)
+
+    def _extract_pdf_page(self, source: _PdfSource, index: int, document_type: Optional[str] = None) -> str:
+        try:
+            text = source.reader().pages[index].extract_text() or ""
+        except Exception:
+            text = ""
+        if len(text.strip()) < OCR_PDF_MIN_PAGE_CHARS:
+            try:
+                ocr_text = self._ocr_pdf_page(source, index, document_type)
+                if len(ocr_text.strip()) > len(text.strip()):
+                    text = ocr_text
+            except Exception:
+                pass
+        return self._normalize(text) or ""
+
+    def iter_pdf_pages(
+        self,
+        file_path: str,
+        max_pages: int = OCR_PDF_MAX_PAGES,
+        max_text_bytes: int = OCR_PDF_MAX_TEXT_BYTES,
+        document_type: Optional[str] = None,
+    ) -> Iterator[Tuple[int, str]]:
         """
-        Extract text from a PDF using PyPDF2.
-        Works best for digital (text) PDFs; scanned PDFs may still need image OCR.
+        Yield (page_index, text) for the first `max_pages` pages as each page
+        finishes (not in page order). Stops early once `max_text_bytes` of
+        text has been produced; pages not yet started are cancelled.
         """
+        with open(file_path, "rb") as f:
+            source = _PdfSource(f.read())
+        page_count = len(source.reader().pages)
+        if page_count > max_pages:
+            print(f"⚠️ Warning: Only reading {max_pages} of {page_count} pages of {file_path}")
+
+        futures = {
+            self._page_executor.submit(self._extract_pdf_page, source, index, document_type): index
+            for index in range(min(page_count, max_pages))
+        }
+        text_bytes = 0
         try:
-            reader = PdfReader(file_path)
-            parts = []
-            for page in reader.pages:
-                page_text = page.extract_text() or ""
-                parts.append(page_text)
-            text = " ".join(parts)
+            for future in as_completed(futures):
+                text = future.result()
+                yield futures[future], text
+                text_bytes += len(text.encode("utf-8"))
+                if text_bytes >= max_text_bytes:
+                    break
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def _extract_from_pdf(self, file_path: str, document_type: Optional[str] = None) -> Optional[str]:
+        """
+        Extract text from a PDF, pages in parallel. Embedded text is read with
+        PyPDF2; pages without any (scanned pages) are rasterized and OCRed.
+        """
+        try:
+            pages = dict(self.iter_pdf_pages(file_path, document_type=document_type))
+            text = " ".join(pages[index] for index in sorted(pages))
             return self._normalize(text)
         except Exception:
             return None
 
-    def extract_text(self, file_path: str) -> Optional[str]:
+    def default_mode(self, document_type: Optional[str]) -> str:
+        if not HAS_OPENCV or document_type not in ROI_SUFFICIENCY:
+            return OCR_MODE_FULL
+        if OCR_ROI == "true" or (OCR_ROI == "auto" and ocr_engine.use_pool):
+            return OCR_MODE_ROI
+        return OCR_MODE_FULL
+
+    def _cache_profile(
+        self, ext: str, document_type: Optional[str] = None, mode: str = OCR_MODE_FULL, hints: Optional[Dict] = None
+    ) -> str:
+        preprocessing = profile_fingerprint(document_type)
+        if ext == ".pdf":
+            return f"pdf:{OCR_PDF_MAX_PAGES}:{OCR_PDF_MAX_TEXT_BYTES}:{'pdfium' if pdfium else 'images'}:{preprocessing}"
+        if mode == OCR_MODE_ROI:
+            # Where ROI OCR stops depends on the name it's looking for
+            name = " ".join(((hints or {}).get("full_name") or "").lower().split())
+            name_digest = hashlib.sha256(name.encode()).hexdigest()[:16]
+            return f"image:{preprocessing}:roi{ROI_VERSION}:{min_words()}:{document_type}:{name_digest}"
+        return f"image:{preprocessing}"
+
+    def _extract(
+        self,
+        file_path: str,
+        ext: str,
+        document_type: Optional[str] = None,
+        mode: str = OCR_MODE_FULL,
+        hints: Optional[Dict] = None,
+    ) -> Optional[str]:
+        if ext in [".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp", ".webp"]:  # .webp: working copies
+            return self._extract_from_image(file_path, document_type, mode, hints)
+        if ext == ".pdf":
+            return self._extract_from_pdf(file_path, document_type)
+
+        # Unsupported type for now
+        return None
+
+    def extract_text(
+        self,
+        file_path: str,
+        document_type: Optional[str] = None,
+        mode: Optional[str] = None,
+        hints: Optional[Dict] = None,
+        content_sha256: Optional[str] = None,
+    ) -> Optional[str]:
         """
         Run OCR or text extraction on the given file and return extracted text.
         Supports images and PDFs. Returns None if extraction fails.
+        Images are preprocessed with the profile for `document_type`.
+        In ROI mode (the default for identity and address proofs when the
+        pooled engine is available, see OCR_ROI) only the most relevant text
+        lines are read, stopping once `hints` such as
+        {"full_name": ...} and the expected keywords have been found.
+        Results are cached by file content, so identical bytes are read once;
+        pass `content_sha256` when the digest is already known.
         """
         ext = os.path.splitext(file_path)[1].lower()
+        if ext not in OCR_EXTENSIONS:
+            return None
+        mode = mode or self.default_mode(document_type)
+        if not self.cache.enabled:
+            return self._extract(file_path, ext, document_type, mode, hints)
 
-        if ext in [".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp"]:
-            return self._extract_from_image(file_path)
-        if ext == ".pdf":
-            return self._extract_from_pdf(file_path)
+        try:
+            key = self.cache.key(content_sha256 or file_sha256(file_path), self._cache_profile(ext, document_type, mode, hints))
+        except OSError:
+            return None
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
 
-        # Unsupported type for now
-        return None
+        text = self._extract(file_path, ext, document_type, mode, hints)
+        if text is not None:
+            self.cache.put(key, text)
+        return text
+
+    async def extract_text_async(
+        self,
+        file_path: str,
+        document_type: Optional[str] = None,
+        hints: Optional[Dict] = None,
+        content_sha256: Optional[str] = None,
+        queue_timeout: float = OCR_QUEUE_TIMEOUT_SECONDS,
+    ) -> Optional[str]:
+        """
+        Run extract_text on the bounded OCR pool without blocking the event loop.
+        Returns None if extraction fails, or if no OCR thread became free within
+        `queue_timeout` (the job is then cancelled, never started). Once running,
+        every tesseract call is limited to OCR_TIMEOUT_SECONDS where it runs, so
+        a job is never abandoned while it holds a thread.
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.create_future()
+
+        def mark_started():
+            if not started.done():
+                started.set_result(None)
+
+        def run():
+            loop.call_soon_threadsafe(mark_started)
+            return self.extract_text(file_path, document_type, None, hints, content_sha256)
+
+        job = self._executor.submit(run)
+        try:
+            await asyncio.wait_for(asyncio.shield(started), queue_timeout)
+        except asyncio.TimeoutError:
+            if job.cancel():
+                print(f"⚠️ Warning: OCR queue full for {queue_timeout:.0f}s, skipped {file_path}")
+                return None
+            # Started just as the wait ran out
+        return await asyncio.wrap_future(job)
 
 
 ocr_service = OCRService()
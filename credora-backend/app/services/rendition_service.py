@@ -0,0 +1,120 @@
+"""
+Thumbnail and preview renditions of stored documents.
+
+The admin review screen only needs small images: a thumbnail for the
+document grid and a medium preview for the viewer. Renditions are WebP
+images of the document (the first page for PDFs), generated on first
+request or right after upload, and cached on disk by content hash and
+size, so every rendition is produced once per distinct file.
+"""
+import io
+import os
+import uuid
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+from PIL import Image, ImageOps
+from PyPDF2 import PdfReader
+
+from app.utils.compression import readable_path
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # optional; PDFs fall back to their first embedded image
+    pdfium = None
+
+load_dotenv()
+
+RENDITION_DIR = os.getenv("RENDITION_DIR", "uploads/renditions")
+# Generate renditions in the background right after upload instead of on first view
+RENDITIONS_EAGER = os.getenv("RENDITIONS_EAGER", "true").lower() == "true"
+
+# Longest edge in pixels per rendition kind
+RENDITION_SIZES: Dict[str, int] = {
+    "thumbnail": 256,
+    "preview": 1280,
+}
+RENDITION_QUALITY = 80
+# Bump when rendering changes so old cached files are not reused
+RENDITION_VERSION = 1
+
+
+class RenditionService:
+    def __init__(self, root: str = RENDITION_DIR):
+        self.root = os.path.abspath(root)
+
+    def rendition_path(self, sha256: str, kind: str) -> str:
+        size = RENDITION_SIZES[kind]
+        return os.path.join(self.root, sha256[:2], f"{sha256}_{size}_v{RENDITION_VERSION}.webp")
+
+    def _first_page(self, source_path: str) -> Optional[Image.Image]:
+        if pdfium is not None:
+            pdf = pdfium.PdfDocument(source_path)
+            try:
+                # Render just big enough for the largest rendition
+                page = pdf[0]
+                scale = max(RENDITION_SIZES.values()) / max(page.get_size())
+                return page.render(scale=scale).to_pil()
+            finally:
+                pdf.close()
+        images = PdfReader(source_path).pages[0].images
+        if not images:
+            return None
+        return Image.open(io.BytesIO(images[0].data))
+
+    def _load(self, source_path: str) -> Optional[Image.Image]:
+        if source_path.lower().endswith(".pdf"):
+            image = self._first_page(source_path)
+        else:
+            image = Image.open(source_path)
+            # Decode at reduced resolution where the format allows it (JPEG)
+            image.draft("RGB", (max(RENDITION_SIZES.values()),) * 2)
+        if image is None:
+            return None
+        image = ImageOps.exif_transpose(image)
+        return image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+    def _save(self, image: Image.Image, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        image.save(tmp_path, "WEBP", quality=RENDITION_QUALITY, method=4)
+        os.replace(tmp_path, path)
+
+    def generate(self, source_path: str, sha256: str) -> Dict[str, str]:
+        """Create any missing renditions of a file; decodes the source at most once."""
+        paths = {kind: self.rendition_path(sha256, kind) for kind in RENDITION_SIZES}
+        missing = [kind for kind, path in paths.items() if not os.path.exists(path)]
+        if not missing:
+            return paths
+        try:
+            # Tiered sources are gzipped; render from a decompressed temp copy
+            with readable_path(source_path) as path:
+                image = self._load(path)
+        except Exception as e:
+            print(f"⚠️ Warning: Could not render {source_path}: {e}")
+            return {}
+        if image is None:
+            return {}
+        # Largest first, so each smaller rendition is resized from the previous one
+        for kind in sorted(missing, key=lambda k: RENDITION_SIZES[k], reverse=True):
+            size = RENDITION_SIZES[kind]
+            image.thumbnail((size, size), Image.LANCZOS)
+            self._save(image, paths[kind])
+        return paths
+
+    def get(self, source_path: str, sha256: str, kind: str) -> Optional[str]:
+        """Path of a cached rendition, generating it if needed; None if the file can't be rendered."""
+        path = self.rendition_path(sha256, kind)
+        if os.path.exists(path):
+            return path
+        return self.generate(source_path, sha256).get(kind)
+
+    def remove(self, sha256: str):
+        for kind in RENDITION_SIZES:
+            try:
+                os.remove(self.rendition_path(sha256, kind))
+            except OSError:
+                pass
+
+
+rendition_service = RenditionService()
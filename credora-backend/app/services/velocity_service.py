@@ -0,0 +1,270 @@
+"""
+Applicant velocity and identity-resolution index.
+
+Keeps an in-memory sliding window of recent applications keyed by
+normalized identity keys (account, name + income bucket, ID numbers and
+phone numbers parsed from OCR, income document signature, email domain).
+Counts per key are maintained incrementally, so "how many applications /
+accounts share this key in the window" is answered in constant time
+instead of with ad-hoc SQL over loan_applications at submit time.
+
+Only real identifiers (PAN/Aadhaar numbers, phone numbers, income document
+content) mark an identity as shared. Name plus declared income is common
+enough between unrelated applicants that it is only a weak, low-weight
+signal (NAME_AND_INCOME_SHARED_ACROSS_ACCOUNTS).
+
+The index lives in each worker process. With several workers every one sees
+only the applications it processed itself (plus what it loaded from the
+database when it warmed up), so counts are split between workers and can
+come out low. Run a single worker, or route processing to one, where these
+flags must see every application.
+"""
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.services.document_features import get_document_features
+from app.services.fraud_rules import fraud_rules
+
+# Sliding window kept for every key
+WINDOW_HOURS = 24
+# Upper bound on tracked keys; least recently touched keys are dropped first
+MAX_KEYS = 200000
+
+# Same account submitting more than this many applications in the short window
+MAX_APPLICATIONS_PER_ACCOUNT = 3
+ACCOUNT_VELOCITY_HOURS = 1
+# Applications from one (non-webmail) email domain in the short window
+MAX_APPLICATIONS_PER_DOMAIN = 10
+# A key seen on this many distinct accounts is treated as shared
+SHARED_ACCOUNTS_THRESHOLD = 2
+
+# Declared income is bucketed per lakh so that small edits don't dodge the index
+INCOME_BUCKET_SIZE = 100000
+
+PUBLIC_EMAIL_DOMAINS = {
+    "gmail.com", "yahoo.com", "yahoo.co.in", "outlook.com", "hotmail.com",
+    "live.com", "icloud.com", "rediffmail.com", "protonmail.com",
+}
+
+
+class SlidingWindowIndex:
+    """
+    Per-key window of (application_id -> (timestamp, user_id)) entries.
+
+    Each key keeps its entries in timestamp order plus a per-account counter,
+    so the application count and distinct-account count for the whole
+    window are O(1). Expired entries are evicted lazily, amortized O(1).
+    """
+
+    def __init__(self, window_hours: int = WINDOW_HOURS, max_keys: int = MAX_KEYS):
+        self.window_seconds = window_hours * 3600
+        self.max_keys = max_keys
+        self._entries: "OrderedDict[str, OrderedDict[int, Tuple[float, int]]]" = OrderedDict()
+        self._accounts: Dict[str, Counter] = {}
+        self._lock = threading.Lock()
+
+    def _evict(self, key: str, now: float):
+        entries = self._entries.get(key)
+        if entries is None:
+            return
+        cutoff = now - self.window_seconds
+        accounts = self._accounts[key]
+        while entries:
+            app_id, (ts, user_id) = next(iter(entries.items()))
+            if ts >= cutoff:
+                break
+            entries.popitem(last=False)
+            accounts[user_id] -= 1
+            if accounts[user_id] <= 0:
+                del accounts[user_id]
+        if not entries:
+            del self._entries[key]
+            del self._accounts[key]
+
+    def add(self, key: str, application_id: int, user_id: int, ts: float, now: Optional[float] = None):
+        """Record an application under a key (idempotent per application)."""
+        now = now if now is not None else time.time()
+        if ts < now - self.window_seconds:
+            return
+        with self._lock:
+            entries = self._entries.get(key)
+            if entries is None:
+                entries = self._entries[key] = OrderedDict()
+                self._accounts[key] = Counter()
+            else:
+                self._entries.move_to_end(key)
+            if application_id not in entries:
+                in_order = not entries or ts >= next(reversed(entries.values()))[0]
+                entries[application_id] = (ts, user_id)
+                self._accounts[key][user_id] += 1
+                if not in_order:
+                    # Late arrival (e.g. an older application re-recorded): eviction
+                    # and the short-window count both rely on timestamp order
+                    ordered = sorted(entries.items(), key=lambda item: item[1][0])
+                    entries.clear()
+                    entries.update(ordered)
+            self._evict(key, now)
+
+            # Bound memory: drop the least recently touched keys
+            while len(self._entries) > self.max_keys:
+                old_key, _ = self._entries.popitem(last=False)
+                del self._accounts[old_key]
+
+    def count(self, key: str, hours: Optional[float] = None, now: Optional[float] = None) -> int:
+        """
+        Number of applications sharing a key in the last `hours`
+        (defaults to the whole window, which is O(1)).
+        """
+        now = now if now is not None else time.time()
+        with self._lock:
+            self._evict(key, now)
+            entries = self._entries.get(key)
+            if not entries:
+                return 0
+            if hours is None or hours * 3600 >= self.window_seconds:
+                return len(entries)
+            cutoff = now - hours * 3600
+            total = 0
+            for ts, _ in reversed(entries.values()):
+                if ts < cutoff:
+                    break
+                total += 1
+            return total
+
+    def distinct_accounts(self, key: str, now: Optional[float] = None) -> int:
+        """Number of distinct user accounts sharing a key in the window (O(1))."""
+        now = now if now is not None else time.time()
+        with self._lock:
+            self._evict(key, now)
+            return len(self._accounts.get(key, ()))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _normalize_name(full_name: Optional[str]) -> Optional[str]:
+    if not full_name:
+        return None
+    parts = sorted(re.sub(r"[^a-z\s]", " ", full_name.lower()).split())
+    return " ".join(parts) or None
+
+
+def _timestamp(created_at: Optional[datetime], now: Optional[float] = None) -> float:
+    if created_at is None:
+        return now if now is not None else time.time()
+    if created_at.tzinfo is None:
+        # SQLite returns naive UTC timestamps
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return created_at.timestamp()
+
+
+class VelocityService:
+    def __init__(self):
+        self.index = SlidingWindowIndex()
+        self._warmed = False
+        self._warm_lock = threading.Lock()
+
+    def identity_keys(self, application, documents: Iterable) -> Dict[str, List[str]]:
+        """Normalized identity keys for an application, grouped by kind."""
+        keys: Dict[str, List[str]] = {
+            "account": [f"user:{application.user_id}"],
+            "identity": [],
+            "name_income": [],
+            "phone": [],
+            "income_doc": [],
+            "domain": [],
+        }
+
+        user = getattr(application, "user", None)
+        name = _normalize_name(getattr(user, "full_name", None))
+        income_bucket = int((application.income_annum or 0) // INCOME_BUCKET_SIZE)
+        if name:
+            keys["name_income"].append(f"name_income:{name}|{income_bucket}")
+
+        email = getattr(user, "email", None) or ""
+        domain = email.rsplit("@", 1)[-1].lower() if "@" in email else ""
+        if domain and domain not in PUBLIC_EMAIL_DOMAINS:
+            keys["domain"].append(f"domain:{domain}")
+
+        # Income documents too short to be read reliably would all share one signature
+        min_income_doc_length = fraud_rules.get().min_ocr_text_length
+        for doc in documents or []:
+            features = get_document_features(doc)
+            if doc.document_type == "identity_proof":
+                keys["identity"].extend(f"id:{n}" for n in features.get("id_numbers", []))
+            keys["phone"].extend(f"phone:{p}" for p in features.get("phones", []))
+            if doc.document_type == "income_proof" and features["length"] >= min_income_doc_length:
+                keys["income_doc"].append(f"income_doc:{features['signature']}")
+
+        return {kind: sorted(set(values)) for kind, values in keys.items()}
+
+    def record_application(self, application, documents: Iterable, now: Optional[float] = None):
+        ts = _timestamp(getattr(application, "created_at", None), now)
+        for values in self.identity_keys(application, documents).values():
+            for key in values:
+                self.index.add(key, application.id, application.user_id, ts, now=now)
+
+    def warm_from_db(self, db):
+        """Seed the index once per process with applications still inside the window."""
+        if self._warmed:
+            return
+        with self._warm_lock:
+            if self._warmed:
+                return
+            from sqlalchemy.orm import joinedload, selectinload
+            from app.models.loan_application import LoanApplication
+
+            since = datetime.utcnow() - timedelta(seconds=self.index.window_seconds)
+            recent = (
+                db.query(LoanApplication)
+                .options(joinedload(LoanApplication.user), selectinload(LoanApplication.documents))
+                .filter(LoanApplication.created_at >= since)
+                .order_by(LoanApplication.created_at)
+                .all()
+            )
+            for application in recent:
+                self.record_application(application, application.documents)
+            self._warmed = True
+            print(f"✅ Velocity index warmed with {len(recent)} recent applications")
+
+    def check_application(self, application, documents: Iterable, db=None, now: Optional[float] = None) -> List[str]:
+        """
+        Record the application in the index and return velocity / shared
+        identity flags for it.
+        """
+        if db is not None:
+            try:
+                self.warm_from_db(db)
+            except Exception as e:
+                print(f"⚠️ Warning: Could not warm velocity index: {e}")
+
+        self.record_application(application, documents, now=now)
+        keys = self.identity_keys(application, documents)
+        flags = []
+
+        for key in keys["account"]:
+            if self.index.count(key, hours=ACCOUNT_VELOCITY_HOURS, now=now) > MAX_APPLICATIONS_PER_ACCOUNT:
+                flags.append("HIGH_APPLICATION_VELOCITY")
+
+        shared_kinds = {
+            "identity": "IDENTITY_SHARED_ACROSS_ACCOUNTS",
+            "name_income": "NAME_AND_INCOME_SHARED_ACROSS_ACCOUNTS",
+            "phone": "PHONE_SHARED_ACROSS_ACCOUNTS",
+            "income_doc": "INCOME_DOCUMENT_SHARED_ACROSS_ACCOUNTS",
+        }
+        for kind, flag in shared_kinds.items():
+            if any(self.index.distinct_accounts(key, now=now) >= SHARED_ACCOUNTS_THRESHOLD for key in keys[kind]):
+                flags.append(flag)
+
+        for key in keys["domain"]:
+            if self.index.count(key, hours=ACCOUNT_VELOCITY_HOURS, now=now) > MAX_APPLICATIONS_PER_DOMAIN:
+                flags.append("APPLICATION_BURST_FROM_EMAIL_DOMAIN")
+
+        return flags
+
+
+velocity_service = VelocityService()
@@ -0,0 +1,79 @@
+"""
+Bounded-resolution working copies of uploaded images.
+
+The stored original is never modified, but phone uploads are 4-12 MP and
+every consumer (OCR, photo quality checks, renditions) would otherwise
+decode them in full. At ingest each image gets a working copy that is
+EXIF-rotated and capped to WORKING_COPY_MAX_EDGE pixels, saved as
+high-quality WebP; downstream analysis reads the working copy instead.
+Copies are keyed by content hash and settings, like renditions.
+"""
+import os
+import uuid
+from typing import Optional
+
+from dotenv import load_dotenv
+from PIL import Image, ImageOps
+
+load_dotenv()
+
+WORKING_COPY_DIR = os.getenv("WORKING_COPY_DIR", "uploads/working")
+# ~300 DPI across an A4 page; plenty for OCR and face detection
+WORKING_COPY_MAX_EDGE = int(os.getenv("WORKING_COPY_MAX_EDGE", 2400))
+WORKING_COPY_QUALITY = 90
+# Bump when the transcoding changes so old copies are not reused
+WORKING_COPY_VERSION = 1
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp"}
+# EXIF orientation values other than "normal"
+_ROTATED_ORIENTATIONS = {2, 3, 4, 5, 6, 7, 8}
+
+
+class WorkingCopyService:
+    def __init__(self, root: str = WORKING_COPY_DIR, max_edge: int = WORKING_COPY_MAX_EDGE):
+        self.root = os.path.abspath(root)
+        self.max_edge = max_edge
+
+    def working_path(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256[:2], f"{sha256}_{self.max_edge}_v{WORKING_COPY_VERSION}.webp")
+
+    def create(self, source_path: str, sha256: str) -> Optional[str]:
+        """
+        Return the working copy for an image, creating it if needed. Returns
+        None when the original can be used as is (PDFs, and images that are
+        already upright and within the size cap) or can't be decoded.
+        """
+        if os.path.splitext(source_path)[1].lower() not in IMAGE_EXTENSIONS:
+            return None
+        path = self.working_path(sha256)
+        if os.path.exists(path):
+            return path
+
+        try:
+            with Image.open(source_path) as image:
+                rotated = image.getexif().get(0x0112, 1) in _ROTATED_ORIENTATIONS
+                if not rotated and max(image.size) <= self.max_edge:
+                    return None
+                # Let the JPEG decoder skip resolution we'd throw away anyway
+                image.draft("RGB", (self.max_edge, self.max_edge))
+                copy = ImageOps.exif_transpose(image)
+                copy = copy.convert("RGBA" if "A" in copy.getbands() else "RGB")
+                copy.thumbnail((self.max_edge, self.max_edge), Image.LANCZOS)
+
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+                copy.save(tmp_path, "WEBP", quality=WORKING_COPY_QUALITY, method=4)
+                os.replace(tmp_path, path)
+                return path
+        except Exception as e:
+            print(f"⚠️ Warning: Could not create working copy of {source_path}: {e}")
+            return None
+
+    def remove(self, sha256: str):
+        try:
+            os.remove(self.working_path(sha256))
+        except OSError:
+            pass
+
+
+working_copy_service = WorkingCopyService()
@@ -1,50 +1,162 @@
 import os
 import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from typing import Dict
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from dotenv import load_dotenv
 from app.core.database import SessionLocal
 from app.models.loan_application import LoanApplication
 from app.models.document import Document
+from app.models.document_blob import DocumentBlob
+from app.models.document_text import DocumentText
+from app.services.blob_store import blob_store
+from app.tasks.tiering import tier_cold_documents
 import pytz
 
+load_dotenv()
+
 UPLOAD_DIR = "uploads/documents"
 
-def cleanup_rejected_documents():
+# Documents of rejected applications are kept this long after the last update
+CLEANUP_RETENTION_DAYS = int(os.getenv("CLEANUP_RETENTION_DAYS", 30))
+# Applications handled per transaction; each chunk is committed before the next
+CLEANUP_CHUNK_SIZE = int(os.getenv("CLEANUP_CHUNK_SIZE", 200))
+# Threads deleting files (blobs, renditions, legacy directories)
+CLEANUP_FILE_WORKERS = int(os.getenv("CLEANUP_FILE_WORKERS", 4))
+
+def _remove_legacy_dir(application_id: int) -> bool:
+    """Remove an application's directory from the pre-blob-store upload layout."""
+    app_dir = os.path.join(UPLOAD_DIR, f"app_{application_id}")
+    if not os.path.exists(app_dir):
+        return False
+    shutil.rmtree(app_dir, ignore_errors=True)
+    return True
+
+def _sweep_legacy_dirs(db, cutoff: datetime, chunk_size: int, executor) -> int:
+    """
+    Fallback for rejected applications whose files predate Document rows:
+    remove the app_<id> directories of those applications, found by listing
+    the legacy upload directory rather than through their documents.
+    """
+    if not os.path.isdir(UPLOAD_DIR):
+        return 0
+    app_ids = sorted(
+        int(name[len("app_"):]) for name in os.listdir(UPLOAD_DIR)
+        if name.startswith("app_") and name[len("app_"):].isdigit()
+    )
+    removed = 0
+    for start in range(0, len(app_ids), chunk_size):
+        expired = [
+            app_id for (app_id,) in db.query(LoanApplication.id).filter(
+                LoanApplication.id.in_(app_ids[start:start + chunk_size]),
+                LoanApplication.status == 'REJECTED',
+                LoanApplication.updated_at < cutoff,
+            )
+        ]
+        db.commit()
+        removed += sum(executor.map(_remove_legacy_dir, expired))
+    return removed
+
+def _sweep_unreferenced_blobs(db, chunk_size: int, executor) -> int:
+    """
+    Remove blobs left unreferenced but not deleted: skipped because an upload
+    held their row at the time, or their request died before removing them.
+    """
+    removed = 0
+    last_sha = ""
+    while True:
+        blobs = (
+            db.query(DocumentBlob.sha256, DocumentBlob.file_path)
+            .filter(DocumentBlob.ref_count <= 0, DocumentBlob.sha256 > last_sha)
+            .order_by(DocumentBlob.sha256)
+            .limit(chunk_size)
+            .all()
+        )
+        if not blobs:
+            return removed
+        last_sha = blobs[-1].sha256
+        removed += blob_store.remove_unreferenced(db, [tuple(blob) for blob in blobs], executor)
+
+def cleanup_rejected_documents(chunk_size: int = CLEANUP_CHUNK_SIZE) -> Dict:
+    """
+    Delete the documents of applications rejected more than
+    CLEANUP_RETENTION_DAYS ago. Candidates are paged by application id and
+    every chunk is its own transaction, so locks are short and a crashed
+    run simply resumes (finished applications no longer have documents).
+    """
     print("🧹 Running scheduled task: cleanup_rejected_documents")
+    started = time.monotonic()
+    stats = {"applications": 0, "documents": 0, "blobs_removed": 0, "directories_removed": 0}
     db = SessionLocal()
     try:
-        # 30 days ago, using UTC aware or naive depending on DB. 
+        # 30 days ago, using UTC aware or naive depending on DB.
         # Typically server_default=func.now() is naive in SQLite.
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        
-        old_apps = db.query(LoanApplication).filter(
-            LoanApplication.status == 'REJECTED',
-            LoanApplication.updated_at < thirty_days_ago
-        ).all()
-        
-        deleted_count = 0
-        for app in old_apps:
-            # Delete physical files directory
-            app_dir = os.path.join(UPLOAD_DIR, f"app_{app.id}")
-            if os.path.exists(app_dir):
-                shutil.rmtree(app_dir)
-                print(f"🧹 Removed physical directory for rejected app #{app.id}")
-            
-            # Delete Document records from DB to cascade cleanup
-            db.query(Document).filter(Document.application_id == app.id).delete()
-            deleted_count += 1
-            
-        db.commit()
-        if deleted_count > 0:
-            print(f"✅ Cleanup task completed. Processed and removed documents for {deleted_count} applications.")
+        cutoff = datetime.utcnow() - timedelta(days=CLEANUP_RETENTION_DAYS)
+        last_id = 0
+
+        with ThreadPoolExecutor(max_workers=CLEANUP_FILE_WORKERS, thread_name_prefix="cleanup") as executor:
+            while True:
+                app_ids = [
+                    app_id for (app_id,) in db.query(Document.application_id)
+                    .join(LoanApplication, LoanApplication.id == Document.application_id)
+                    .filter(
+                        LoanApplication.status == 'REJECTED',
+                        LoanApplication.updated_at < cutoff,
+                        Document.application_id > last_id,
+                    )
+                    .group_by(Document.application_id)
+                    .order_by(Document.application_id)
+                    .limit(chunk_size)
+                ]
+                if not app_ids:
+                    break
+                last_id = app_ids[-1]
+
+                # Stored blobs may be shared with other applications; only drop references
+                hashes = [
+                    sha for (sha,) in db.query(Document.content_sha256)
+                    .filter(Document.application_id.in_(app_ids))
+                ]
+                released_blobs = blob_store.release_many(db, hashes)
+                # Bulk deletes skip ORM cascades; OCR text rows go first
+                db.query(DocumentText).filter(DocumentText.document_id.in_(
+                    db.query(Document.id).filter(Document.application_id.in_(app_ids))
+                )).delete(synchronize_session=False)
+                stats["documents"] += db.query(Document).filter(
+                    Document.application_id.in_(app_ids)
+                ).delete(synchronize_session=False)
+                db.commit()
+                stats["applications"] += len(app_ids)
+
+                # Files go only after the commit, so a failed chunk never loses data
+                stats["blobs_removed"] += blob_store.remove_unreferenced(db, released_blobs, executor)
+                stats["directories_removed"] += sum(executor.map(_remove_legacy_dir, app_ids))
+                db.commit()  # end the read transaction of the reference check
+
+            stats["directories_removed"] += _sweep_legacy_dirs(db, cutoff, chunk_size, executor)
+            stats["blobs_removed"] += _sweep_unreferenced_blobs(db, chunk_size, executor)
+
+        stats["duration_seconds"] = round(time.monotonic() - started, 2)
+        if stats["applications"] > 0 or stats["directories_removed"] > 0:
+            print(
+                f"✅ Cleanup task completed in {stats['duration_seconds']}s. Removed {stats['documents']} documents "
+                f"of {stats['applications']} applications ({stats['blobs_removed']} files, "
+                f"{stats['directories_removed']} legacy directories)."
+            )
         else:
             print("✅ Cleanup task completed. No old rejected applications found.")
     except Exception as e:
-        print(f"❌ Error in cleanup task: {e}")
+        print(f"❌ Error in cleanup task after {stats['applications']} applications: {e}")
         db.rollback()
     finally:
         db.close()
+    return stats
 
 scheduler = AsyncIOScheduler(timezone=pytz.UTC)
-# Run once a day at midnight
-scheduler.add_job(cleanup_rejected_documents, 'cron', hour=0, id='cleanup_job')
+# Run once a day at midnight. Plain functions run on the scheduler's thread pool,
+# never on the event loop; coalesce so a backlog of missed runs executes once.
+scheduler.add_job(cleanup_rejected_documents, 'cron', hour=0, id='cleanup_job', coalesce=True, max_instances=1)
+# Compress documents of decided applications an hour later, after the cleanup
+scheduler.add_job(tier_cold_documents, 'cron', hour=1, id='tiering_job', coalesce=True, max_instances=1)
@@ -0,0 +1,128 @@
+"""
+Cold-storage tiering of stored documents.
+
+Once an application is decided its documents are rarely read again, yet
+they stay on disk as uploaded. This job gzips blobs whose every referencing
+application was APPROVED or REJECTED more than TIERING_MIN_AGE_DAYS ago.
+Only formats that actually shrink are tried (PDFs, BMP and TIFF scans;
+JPEG/PNG are already compressed), and a blob is kept raw when gzip saves
+less than TIERING_MIN_SAVING. Reads decompress transparently (see
+get_document_file and app.utils.compression).
+"""
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict
+
+from dotenv import load_dotenv
+from sqlalchemy import and_, exists, or_
+
+from app.core.database import SessionLocal
+from app.models.document import Document
+from app.models.document_blob import DocumentBlob
+from app.models.loan_application import LoanApplication
+from app.services.blob_store import blob_store
+
+load_dotenv()
+
+# Days after the decision before an application's documents count as cold
+TIERING_MIN_AGE_DAYS = int(os.getenv("TIERING_MIN_AGE_DAYS", 7))
+# Minimum fraction of the size gzip must save for the compressed copy to be kept
+TIERING_MIN_SAVING = float(os.getenv("TIERING_MIN_SAVING", 0.1))
+# Blobs handled per transaction
+TIERING_CHUNK_SIZE = int(os.getenv("TIERING_CHUNK_SIZE", 100))
+
+COMPRESSIBLE_TYPES = ["application/pdf", "image/bmp", "image/tiff"]
+DECIDED_STATUSES = ["APPROVED", "REJECTED"]
+
+def tier_cold_documents(chunk_size: int = TIERING_CHUNK_SIZE) -> Dict:
+    """Compress cold blobs in committed chunks; returns counts and duration."""
+    print("🔄 Running scheduled task: tier_cold_documents")
+    started = time.monotonic()
+    stats = {"compressed": 0, "kept_raw": 0, "bytes_saved": 0}
+    db = SessionLocal()
+    try:
+        cutoff = datetime.utcnow() - timedelta(days=TIERING_MIN_AGE_DAYS)
+        # A blob is hot while any document using it belongs to an undecided or recent application
+        hot = exists().where(
+            Document.content_sha256 == DocumentBlob.sha256,
+            LoanApplication.id == Document.application_id,
+            or_(
+                LoanApplication.status.notin_(DECIDED_STATUSES),
+                LoanApplication.updated_at.is_(None),
+                LoanApplication.updated_at >= cutoff,
+            ),
+        )
+        last_sha = ""
+
+        while True:
+            candidates = (
+                db.query(DocumentBlob.sha256, DocumentBlob.file_path)
+                .filter(and_(
+                    DocumentBlob.sha256 > last_sha,
+                    DocumentBlob.encoding.is_(None),
+                    DocumentBlob.content_type.in_(COMPRESSIBLE_TYPES),
+                    DocumentBlob.ref_count > 0,
+                    ~hot,
+                ))
+                .order_by(DocumentBlob.sha256)
+                .limit(chunk_size)
+                .all()
+            )
+            # Don't hold a snapshot open while compressing
+            db.commit()
+            if not candidates:
+                break
+            last_sha = candidates[-1].sha256
+
+            # Compress outside the transaction, then repoint under the row lock
+            compressed = {}
+            for sha256, path in candidates:
+                try:
+                    compressed[sha256] = blob_store.compress(path, TIERING_MIN_SAVING)
+                except OSError as e:
+                    print(f"⚠️ Warning: Could not compress blob {path}: {e}")
+
+            replaced = []
+            for sha256, path in candidates:
+                if sha256 not in compressed:
+                    continue
+                new_path = compressed[sha256]
+                blob = db.query(DocumentBlob).filter(DocumentBlob.sha256 == sha256).with_for_update().first()
+                if blob is None or blob.encoding is not None or blob.file_path != path:
+                    # Released or changed meanwhile
+                    if new_path:
+                        os.remove(new_path)
+                    continue
+                if new_path is None:
+                    blob.encoding = "identity"
+                    stats["kept_raw"] += 1
+                    continue
+                blob.encoding = "gzip"
+                blob.file_path = new_path
+                db.query(Document).filter(Document.content_sha256 == sha256).update(
+                    {Document.file_path: new_path}, synchronize_session=False
+                )
+                stats["bytes_saved"] += os.path.getsize(path) - os.path.getsize(new_path)
+                replaced.append(path)
+            db.commit()
+            stats["compressed"] += len(replaced)
+
+            # Raw files go only once nothing points at them any more
+            for path in replaced:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+        stats["duration_seconds"] = round(time.monotonic() - started, 2)
+        print(
+            f"✅ Tiering task completed in {stats['duration_seconds']}s. Compressed {stats['compressed']} blobs "
+            f"(saved {stats['bytes_saved']} bytes), {stats['kept_raw']} not worth compressing."
+        )
+    except Exception as e:
+        print(f"❌ Error in tiering task: {e}")
+        db.rollback()
+    finally:
+        db.close()
+    return stats
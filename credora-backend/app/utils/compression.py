@@ -0,0 +1,61 @@
+"""
+Lossless at-rest compression of stored files.
+
+Cold blobs are gzipped in place (<blob>.gz next to where the raw file was).
+Gzip rather than something denser because clients that accept it can be
+sent the stored bytes as is with Content-Encoding: gzip; everyone else,
+and code that needs a real file (PDF rendering, OpenCV), gets it
+decompressed on the fly.
+"""
+import gzip
+import os
+import shutil
+import uuid
+from contextlib import contextmanager
+from typing import Iterator
+
+GZIP_SUFFIX = ".gz"
+GZIP_LEVEL = 6
+COPY_CHUNK_SIZE = 256 * 1024
+
+
+def is_compressed(path: str) -> bool:
+    return path.endswith(GZIP_SUFFIX)
+
+
+def gzip_file(source_path: str, target_path: str) -> int:
+    """Write a gzipped copy of source_path to target_path; returns its size."""
+    with open(source_path, "rb") as source, open(target_path, "wb") as raw:
+        # mtime=0 keeps the output a pure function of the content
+        with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=GZIP_LEVEL, mtime=0) as target:
+            shutil.copyfileobj(source, target, COPY_CHUNK_SIZE)
+    return os.path.getsize(target_path)
+
+
+def iter_decompressed(path: str, chunk_size: int = COPY_CHUNK_SIZE) -> Iterator[bytes]:
+    with gzip.open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            yield chunk
+
+
+@contextmanager
+def readable_path(path: str) -> Iterator[str]:
+    """
+    Yield a path to the plain content of `path`: the file itself, or a
+    temporary decompressed copy (deleted afterwards) if it is gzipped.
+    """
+    if not is_compressed(path):
+        yield path
+        return
+    # Keep the original extension; consumers dispatch on it
+    root, extension = os.path.splitext(path[:-len(GZIP_SUFFIX)])
+    tmp_path = f"{root}.{uuid.uuid4().hex}.tmp{extension}"
+    try:
+        with gzip.open(path, "rb") as source, open(tmp_path, "wb") as target:
+            shutil.copyfileobj(source, target, COPY_CHUNK_SIZE)
+        yield tmp_path
+    finally:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
@@ -0,0 +1,136 @@
+"""
+File responses with validators and byte ranges.
+
+Starlette's FileResponse always sends the whole file. Document review
+needs conditional requests (ETag / If-None-Match) and single byte ranges
+(PDF viewers and image zooming fetch parts of large scans), and should use
+the server's zero-copy send when it offers one.
+"""
+import os
+from typing import Mapping, Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+READ_CHUNK_SIZE = 256 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a Range header into an inclusive (start, end) byte range.
+    Returns None when the whole file should be sent (no header, a unit
+    other than bytes, or several ranges); raises RangeNotSatisfiable when
+    the range lies outside the file.
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    spec = header[len("bytes="):].strip()
+    if "," in spec:
+        return None
+    start_text, _, end_text = spec.partition("-")
+    try:
+        if not start_text:
+            # Suffix range: the last N bytes
+            length = int(end_text)
+            if length <= 0:
+                raise RangeNotSatisfiable()
+            return max(size - length, 0), size - 1
+        start = int(start_text)
+        end = int(end_text) if end_text else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        raise RangeNotSatisfiable()
+    return start, min(end, size - 1)
+
+
+def accepts_encoding(header: Optional[str], coding: str) -> bool:
+    """Whether an Accept-Encoding header allows `coding` (explicitly, q > 0)."""
+    for item in (header or "").split(","):
+        name, _, params = item.strip().partition(";")
+        if name.strip().lower() != coding:
+            continue
+        params = params.strip().replace(" ", "")
+        return not (params.startswith("q=") and float(params[2:] or 0) == 0)
+    return False
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in header.split(","))
+
+
+class RangeFileResponse(Response):
+    """
+    Send `path` (or the `byte_range` of it) as the response body. Uses the
+    ASGI "http.response.zerocopysend" extension when the server supports
+    it, otherwise reads the file off the event loop in large chunks.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        size: int,
+        byte_range: Optional[Tuple[int, int]] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        media_type: Optional[str] = None,
+        filename: Optional[str] = None,
+        send_body: bool = True,
+    ):
+        self.path = path
+        self.status_code = 206 if byte_range else 200
+        self.media_type = media_type or "application/octet-stream"
+        self.background = None
+        self.send_body = send_body
+        self.offset, last = byte_range if byte_range else (0, size - 1)
+        self.count = last - self.offset + 1
+        self.init_headers(headers)
+
+        self.headers["content-length"] = str(self.count)
+        self.headers["accept-ranges"] = "bytes"
+        if byte_range:
+            self.headers["content-range"] = f"bytes {self.offset}-{last}/{size}"
+        if filename:
+            self.headers.setdefault("content-disposition", f"inline; filename*=utf-8''{quote(filename)}")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_body or self.count <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            with open(self.path, "rb") as file:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file,
+                    "offset": self.offset,
+                    "count": self.count,
+                    "more_body": False,
+                })
+            return
+
+        fd = await anyio.to_thread.run_sync(os.open, self.path, os.O_RDONLY)
+        try:
+            position, remaining = self.offset, self.count
+            while remaining > 0:
+                chunk = await anyio.to_thread.run_sync(os.pread, fd, min(READ_CHUNK_SIZE, remaining), position)
+                if not chunk:
+                    break
+                position += len(chunk)
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                # File shrank underneath us; end the body rather than hang
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            os.close(fd)
@@ -0,0 +1,25 @@
+"""
+Opaque cursors for keyset pagination.
+
+A cursor encodes the sort key of the last row of a page, (created_at, id),
+so the next page starts strictly after it with an index range scan instead
+of an OFFSET that re-reads every earlier row.
+"""
+import base64
+from datetime import datetime
+from typing import Tuple
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of encode_cursor(); raises ValueError for anything malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, _, row_id = raw.rpartition("|")
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
@@ -0,0 +1,105 @@
+"""
+Streaming upload persistence.
+
+Uploaded files are read in chunks and written to a temp file next to their
+final location without blocking the event loop. The SHA-256 and byte count
+are computed while streaming, the real file type is sniffed from the first
+chunk, and oversized or unsupported files are rejected before (or as soon
+as) they cross the limit. The temp file is renamed into place only once
+the whole upload has been accepted.
+"""
+import hashlib
+import os
+from typing import Dict, Iterable, Optional
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+load_dotenv()
+
+# Per-file limit; scans larger than this are rejected with 413
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 10 * 1024 * 1024))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# (magic prefix, content type, canonical extension)
+FILE_SIGNATURES = [
+    (b"%PDF-", "application/pdf", ".pdf"),
+    (b"\x89PNG\r\n\x1a\n", "image/png", ".png"),
+    (b"\xff\xd8\xff", "image/jpeg", ".jpg"),
+    (b"II*\x00", "image/tiff", ".tif"),
+    (b"MM\x00*", "image/tiff", ".tif"),
+    (b"BM", "image/bmp", ".bmp"),
+]
+
+IMAGE_TYPES = {"image/png", "image/jpeg", "image/tiff", "image/bmp"}
+DOCUMENT_TYPES = IMAGE_TYPES | {"application/pdf"}
+
+
+def sniff_content_type(head: bytes) -> Optional[Dict[str, str]]:
+    """Identify a file from its leading bytes; None if it's not a supported type."""
+    for magic, content_type, extension in FILE_SIGNATURES:
+        if head.startswith(magic):
+            return {"content_type": content_type, "extension": extension}
+    return None
+
+
+def _discard(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+async def save_upload(
+    file: UploadFile,
+    directory: str,
+    basename: str,
+    allowed_types: Iterable[str] = DOCUMENT_TYPES,
+    max_bytes: int = MAX_UPLOAD_BYTES,
+) -> Dict:
+    """
+    Stream `file` to `directory/basename<ext>`, where the extension comes
+    from the sniffed type rather than the client's filename.
+
+    Returns {"path", "sha256", "size", "content_type"}. Raises 413 when the
+    file exceeds `max_bytes` and 415 when its type isn't allowed; nothing is
+    left on disk in either case.
+    """
+    label = file.filename or basename
+    if file.size is not None and file.size > max_bytes:
+        raise HTTPException(status_code=413, detail=f"{label} exceeds the {max_bytes // (1024 * 1024)} MB upload limit")
+
+    chunk = await file.read(UPLOAD_CHUNK_SIZE)
+    sniffed = sniff_content_type(chunk)
+    if sniffed is None or sniffed["content_type"] not in set(allowed_types):
+        raise HTTPException(status_code=415, detail=f"{label} is not a supported file type")
+
+    os.makedirs(directory, exist_ok=True)
+    final_path = os.path.abspath(os.path.join(directory, f"{basename}{sniffed['extension']}"))
+    tmp_path = f"{final_path}.part"
+    digest = hashlib.sha256()
+    size = 0
+
+    out = await run_in_threadpool(open, tmp_path, "wb")
+    try:
+        while chunk:
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(status_code=413, detail=f"{label} exceeds the {max_bytes // (1024 * 1024)} MB upload limit")
+            digest.update(chunk)
+            await run_in_threadpool(out.write, chunk)
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        await run_in_threadpool(out.close)
+        await run_in_threadpool(os.replace, tmp_path, final_path)
+    except BaseException:
+        out.close()
+        _discard(tmp_path)
+        raise
+
+    return {
+        "path": final_path,
+        "sha256": digest.hexdigest(),
+        "size": size,
+        "content_type": sniffed["content_type"],
+    }
@@ -14,6 +14,9 @@ from app.core.database import SessionLocal, engine, Base
 from app.models.user import User
 from app.models.loan_application import LoanApplication
 from app.models.document import Document
+from app.models.document_blob import DocumentBlob
+from app.models.document_text import DocumentText
+from app.services.blob_store import blob_store
 from app.models.fraud_check import FraudCheck
 
 def clear_all_data():
@@ -30,11 +33,15 @@ def clear_all_data():
         db.query(FraudCheck).delete()
         print(f"   Deleted {fraud_count} fraud check(s)")
         
-        # 2. Documents (references loan_applications)
+        # 2. Documents (references loan_applications) and their OCR text
+        db.query(DocumentText).delete()
         doc_count = db.query(Document).count()
         db.query(Document).delete()
         print(f"   Deleted {doc_count} document(s)")
         
+        # Stored files: nothing references them any more
+        db.query(DocumentBlob).update({DocumentBlob.ref_count: 0})
+        
         # 3. LoanApplications (references users)
         loan_count = db.query(LoanApplication).count()
         db.query(LoanApplication).delete()
@@ -46,6 +53,11 @@ def clear_all_data():
         print(f"   Deleted {user_count} user(s)")
         
         db.commit()
+        
+        # Blob files go only after the commit, then their rows
+        blobs = db.query(DocumentBlob.sha256, DocumentBlob.file_path).all()
+        removed = blob_store.remove_unreferenced(db, [tuple(blob) for blob in blobs])
+        print(f"   Deleted {len(blobs)} stored blob(s) ({removed} file(s))")
         print("\nAll data cleared successfully!")
         print("   Tables are still intact. You can now insert fresh data.")
         
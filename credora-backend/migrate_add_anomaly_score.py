@@ -0,0 +1,55 @@
+"""
+Migration script to add anomaly_score column to fraud_checks table
+Run this once to update your existing database schema
+"""
+
+from sqlalchemy import text
+from app.core.database import engine, SessionLocal
+
+def add_anomaly_score_column():
+    """Add anomaly_score column to fraud_checks table"""
+    
+    db = SessionLocal()
+    
+    try:
+        print("🔄 Adding anomaly_score column to fraud_checks table...")
+        
+        # Check if column already exists
+        check_query = text("""
+            SELECT column_name 
+            FROM information_schema.columns 
+            WHERE table_name='fraud_checks' AND column_name='anomaly_score'
+        """)
+        
+        result = db.execute(check_query).fetchone()
+        
+        if result:
+            print("✅ Column 'anomaly_score' already exists. No migration needed.")
+            return
+        
+        # Add the column
+        alter_query = text("""
+            ALTER TABLE fraud_checks 
+            ADD COLUMN anomaly_score DOUBLE PRECISION
+        """)
+        
+        db.execute(alter_query)
+        db.commit()
+        
+        print("✅ Successfully added 'anomaly_score' column to fraud_checks table!")
+        print("   The column is now available for storing calibrated anomaly scores.")
+        
+    except Exception as e:
+        print(f"❌ Error adding column: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Database Migration: Adding anomaly_score Column")
+    print("=" * 60)
+    add_anomaly_score_column()
+    print("=" * 60)
+    print("✅ Migration complete!")
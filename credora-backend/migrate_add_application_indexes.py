@@ -0,0 +1,40 @@
+"""
+Migration script to add the composite indexes behind the keyset-paginated
+admin application listing to the loan_applications table.
+Run this once to update your existing database schema
+"""
+
+from sqlalchemy import text
+from app.core.database import engine
+
+INDEXES = {
+    "ix_loan_applications_created_at_id": "(created_at, id)",
+    "ix_loan_applications_status_created_at_id": "(status, created_at, id)",
+    "ix_loan_applications_user_id_created_at_id": "(user_id, created_at, id)",
+}
+
+def add_application_indexes():
+    """Create the loan_applications listing indexes if they are missing"""
+
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        concurrently = "CONCURRENTLY " if connection.dialect.name == "postgresql" else ""
+        try:
+            for name, columns in INDEXES.items():
+                print(f"🔄 Creating index {name}...")
+                # Postgres builds it without blocking writes to the table
+                connection.execute(text(
+                    f"CREATE INDEX {concurrently}IF NOT EXISTS {name} ON loan_applications {columns}"
+                ))
+                print(f"✅ Index '{name}' is present.")
+        except Exception as e:
+            print(f"❌ Error creating indexes: {e}")
+            raise
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Database Migration: Adding loan application listing indexes")
+    print("=" * 60)
+    add_application_indexes()
+    print("=" * 60)
+    print("✅ Migration complete!")
@@ -0,0 +1,48 @@
+"""
+Migration script to add the encoding column to document_blobs table
+(set by the tiering job that compresses documents of decided applications).
+Run this once to update your existing database schema
+"""
+
+from sqlalchemy import text
+from app.core.database import engine, SessionLocal
+
+def add_blob_encoding_column():
+    """Add encoding column to document_blobs table"""
+
+    db = SessionLocal()
+
+    try:
+        print("🔄 Adding encoding column to document_blobs table...")
+
+        # Check if column already exists
+        check_query = text("""
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_name='document_blobs' AND column_name='encoding'
+        """)
+
+        result = db.execute(check_query).fetchone()
+
+        if result:
+            print("✅ Column 'encoding' already exists. Skipping migration.")
+            return
+
+        db.execute(text("ALTER TABLE document_blobs ADD COLUMN encoding VARCHAR"))
+        db.commit()
+        print("✅ Successfully added 'encoding' column to document_blobs table!")
+
+    except Exception as e:
+        print(f"❌ Error adding column: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Database Migration: Adding document blob encoding column")
+    print("=" * 60)
+    add_blob_encoding_column()
+    print("=" * 60)
+    print("✅ Migration complete!")
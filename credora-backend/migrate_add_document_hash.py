@@ -0,0 +1,80 @@
+"""
+Migration script to add content_sha256 and file_size columns to documents table
+and backfill them from the stored files.
+Run this once to update your existing database schema
+"""
+
+import os
+
+from sqlalchemy import text
+from app.core.database import engine, SessionLocal
+from app.services.ocr_cache import file_sha256
+
+# Import related models so the Document relationships resolve
+from app.models.user import User
+from app.models.fraud_check import FraudCheck
+from app.models.loan_application import LoanApplication
+from app.models.document import Document
+
+COLUMNS = {
+    "content_sha256": "VARCHAR(64)",
+    "file_size": "BIGINT",
+}
+
+def add_document_hash_columns():
+    """Add content_sha256 / file_size columns to documents table and backfill them"""
+
+    db = SessionLocal()
+
+    try:
+        for column, column_type in COLUMNS.items():
+            print(f"🔄 Adding {column} column to documents table...")
+
+            # Check if column already exists
+            check_query = text("""
+                SELECT column_name
+                FROM information_schema.columns
+                WHERE table_name='documents' AND column_name=:column
+            """)
+
+            result = db.execute(check_query, {"column": column}).fetchone()
+
+            if result:
+                print(f"✅ Column '{column}' already exists. Skipping ALTER TABLE.")
+                continue
+
+            db.execute(text(f"ALTER TABLE documents ADD COLUMN {column} {column_type}"))
+            db.commit()
+            print(f"✅ Successfully added '{column}' column to documents table!")
+
+        db.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_documents_content_sha256 ON documents (content_sha256)"
+        ))
+        db.commit()
+
+        print("🔄 Backfilling hashes for existing documents...")
+        backfilled = missing = 0
+        for doc in db.query(Document).filter(Document.content_sha256.is_(None)).yield_per(200):
+            if not doc.file_path or not os.path.isfile(doc.file_path):
+                missing += 1
+                continue
+            doc.content_sha256 = file_sha256(doc.file_path)
+            doc.file_size = os.path.getsize(doc.file_path)
+            backfilled += 1
+        db.commit()
+        print(f"✅ Backfilled {backfilled} documents ({missing} files not found on disk).")
+
+    except Exception as e:
+        print(f"❌ Error migrating documents: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Database Migration: Adding document content hash columns")
+    print("=" * 60)
+    add_document_hash_columns()
+    print("=" * 60)
+    print("✅ Migration complete!")
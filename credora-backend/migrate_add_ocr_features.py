@@ -0,0 +1,88 @@
+"""
+Migration script to add ocr_features column to documents table
+and backfill it from the existing OCR text.
+Run this once to update your existing database schema
+
+Safe to run before or after migrate_move_ocr_text.py: the text is read from
+the legacy documents.ocr_extracted_text column while it exists and from
+document_texts otherwise (see FIX_DATABASE.md for the full migration order).
+"""
+
+from sqlalchemy import inspect, text
+from app.core.database import engine, SessionLocal
+from app.services.document_features import extract_document_features
+
+# Import related models so the Document relationships resolve
+from app.models.user import User
+from app.models.fraud_check import FraudCheck
+from app.models.loan_application import LoanApplication
+from app.models.document import Document
+
+def add_ocr_features_column():
+    """Add ocr_features column to documents table and backfill it"""
+
+    db = SessionLocal()
+
+    try:
+        print("🔄 Adding ocr_features column to documents table...")
+
+        # Check if column already exists
+        check_query = text("""
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_name='documents' AND column_name='ocr_features'
+        """)
+
+        result = db.execute(check_query).fetchone()
+
+        if result:
+            print("✅ Column 'ocr_features' already exists. Skipping ALTER TABLE.")
+        else:
+            alter_query = text("""
+                ALTER TABLE documents
+                ADD COLUMN ocr_features JSON
+            """)
+            db.execute(alter_query)
+            db.commit()
+            print("✅ Successfully added 'ocr_features' column to documents table!")
+
+        # Before migrate_move_ocr_text.py the text is still in documents; the
+        # Document.ocr_extracted_text property only reads document_texts
+        has_legacy_text = db.execute(text("""
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_name='documents' AND column_name='ocr_extracted_text'
+        """)).fetchone() is not None
+        has_text_table = inspect(engine).has_table("document_texts")
+        if not has_legacy_text and not has_text_table:
+            raise RuntimeError("No OCR text found: neither documents.ocr_extracted_text nor document_texts exists")
+
+        print("🔄 Backfilling features for existing documents...")
+        backfilled = 0
+        for doc in db.query(Document).filter(Document.ocr_features.is_(None)).yield_per(200):
+            ocr_text = None
+            if has_legacy_text:
+                ocr_text = db.execute(
+                    text("SELECT ocr_extracted_text FROM documents WHERE id = :id"), {"id": doc.id}
+                ).scalar()
+            if ocr_text is None and has_text_table:
+                ocr_text = doc.ocr_extracted_text
+            doc.ocr_features = extract_document_features(ocr_text, doc.document_type, doc.file_path)
+            backfilled += 1
+        db.commit()
+        print(f"✅ Backfilled features for {backfilled} documents.")
+
+    except Exception as e:
+        print(f"❌ Error migrating documents: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Database Migration: Adding ocr_features Column")
+    print("=" * 60)
+    add_ocr_features_column()
+    print("=" * 60)
+    print("✅ Migration complete!")
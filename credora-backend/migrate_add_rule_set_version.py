@@ -0,0 +1,55 @@
+"""
+Migration script to add rule_set_version column to fraud_checks table
+Run this once to update your existing database schema
+"""
+
+from sqlalchemy import text
+from app.core.database import engine, SessionLocal
+
+def add_rule_set_version_column():
+    """Add rule_set_version column to fraud_checks table"""
+    
+    db = SessionLocal()
+    
+    try:
+        print("🔄 Adding rule_set_version column to fraud_checks table...")
+        
+        # Check if column already exists
+        check_query = text("""
+            SELECT column_name 
+            FROM information_schema.columns 
+            WHERE table_name='fraud_checks' AND column_name='rule_set_version'
+        """)
+        
+        result = db.execute(check_query).fetchone()
+        
+        if result:
+            print("✅ Column 'rule_set_version' already exists. No migration needed.")
+            return
+        
+        # Add the column
+        alter_query = text("""
+            ALTER TABLE fraud_checks 
+            ADD COLUMN rule_set_version VARCHAR
+        """)
+        
+        db.execute(alter_query)
+        db.commit()
+        
+        print("✅ Successfully added 'rule_set_version' column to fraud_checks table!")
+        print("   The column is now available for storing the fraud rule set version.")
+        
+    except Exception as e:
+        print(f"❌ Error adding column: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Database Migration: Adding rule_set_version Column")
+    print("=" * 60)
+    add_rule_set_version_column()
+    print("=" * 60)
+    print("✅ Migration complete!")
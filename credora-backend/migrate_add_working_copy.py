@@ -0,0 +1,73 @@
+"""
+Migration script to add the working_file_path column to documents table
+and build working copies (EXIF-rotated, size-capped WebP) for existing images.
+Run this once to update your existing database schema
+"""
+
+import os
+
+from sqlalchemy import text
+from app.core.database import engine, SessionLocal
+from app.services.working_copy_service import working_copy_service
+
+# Import related models so the Document relationships resolve
+from app.models.user import User
+from app.models.fraud_check import FraudCheck
+from app.models.loan_application import LoanApplication
+from app.models.document import Document
+
+def add_working_copy_column():
+    """Add working_file_path column to documents table and backfill working copies"""
+
+    db = SessionLocal()
+
+    try:
+        print("🔄 Adding working_file_path column to documents table...")
+
+        # Check if column already exists
+        check_query = text("""
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_name='documents' AND column_name='working_file_path'
+        """)
+
+        result = db.execute(check_query).fetchone()
+
+        if result:
+            print("✅ Column 'working_file_path' already exists. Skipping ALTER TABLE.")
+        else:
+            db.execute(text("ALTER TABLE documents ADD COLUMN working_file_path VARCHAR"))
+            db.commit()
+            print("✅ Successfully added 'working_file_path' column to documents table!")
+
+        print("🔄 Building working copies for existing documents...")
+        created = missing = 0
+        documents = db.query(Document).filter(
+            Document.working_file_path.is_(None),
+            Document.content_sha256.isnot(None),
+        )
+        for doc in documents.yield_per(200):
+            if not doc.file_path or not os.path.isfile(doc.file_path):
+                missing += 1
+                continue
+            working_path = working_copy_service.create(doc.file_path, doc.content_sha256)
+            if working_path:
+                doc.working_file_path = working_path
+                created += 1
+        db.commit()
+        print(f"✅ Created {created} working copies ({missing} files not found on disk).")
+
+    except Exception as e:
+        print(f"❌ Error migrating documents: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Database Migration: Adding document working copies")
+    print("=" * 60)
+    add_working_copy_column()
+    print("=" * 60)
+    print("✅ Migration complete!")
@@ -0,0 +1,92 @@
+"""
+Migration script to move existing documents into the content-addressed blob store.
+Creates the document_blobs table, copies every file from the old per-application
+layout (uploads/documents/app_<id>/...) into uploads/blobs/ab/cd/<sha256><ext>,
+registers a reference per document and repoints Document.file_path.
+Run this once after deploying the blob store. Pass --move to delete the
+original files as they are migrated.
+"""
+
+import argparse
+import os
+
+from app.core.database import engine, SessionLocal, Base
+from app.services.blob_store import blob_store
+from app.services.ocr_cache import file_sha256
+from app.utils.uploads import sniff_content_type
+
+# Import related models so the Document relationships resolve
+from app.models.user import User
+from app.models.fraud_check import FraudCheck
+from app.models.loan_application import LoanApplication
+from app.models.document import Document
+from app.models.document_blob import DocumentBlob
+
+def migrate_documents_to_blob_store(move: bool = False, chunk_size: int = 200):
+    """Copy (or move) legacy document files into the blob store"""
+
+    Base.metadata.create_all(bind=engine, tables=[DocumentBlob.__table__])
+    print("✅ document_blobs table is present.")
+
+    db = SessionLocal()
+    migrated = missing = 0
+    last_id = 0
+
+    try:
+        while True:
+            documents = (
+                db.query(Document)
+                .filter(Document.id > last_id)
+                .order_by(Document.id)
+                .limit(chunk_size)
+                .all()
+            )
+            if not documents:
+                break
+            last_id = documents[-1].id
+
+            for doc in documents:
+                path = os.path.abspath(doc.file_path)
+                if path.startswith(blob_store.root + os.sep):
+                    continue
+                if not os.path.isfile(path):
+                    missing += 1
+                    continue
+
+                with open(path, "rb") as f:
+                    sniffed = sniff_content_type(f.read(16))
+                sha256 = file_sha256(path)
+                size = os.path.getsize(path)
+                blob_path = blob_store.put_file(path, sha256, move=move)
+                blob = blob_store.acquire(
+                    db, sha256, blob_path, size,
+                    sniffed["content_type"] if sniffed else "application/octet-stream",
+                )
+                doc.file_path = blob.file_path
+                doc.content_sha256 = sha256
+                doc.file_size = size
+                migrated += 1
+
+            db.commit()
+            print(f"   ... {migrated} documents migrated")
+
+        print(f"✅ Migrated {migrated} documents ({missing} files not found on disk).")
+
+    except Exception as e:
+        print(f"❌ Error migrating documents: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move documents into the blob store")
+    parser.add_argument("--move", action="store_true", help="Delete original files once migrated")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Database Migration: Content-addressed document storage")
+    print("=" * 60)
+    migrate_documents_to_blob_store(move=args.move)
+    print("=" * 60)
+    print("✅ Migration complete!")
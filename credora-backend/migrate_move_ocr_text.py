@@ -0,0 +1,78 @@
+"""
+Migration script to move OCR text out of the documents table into the
+compressed document_texts table, then drop documents.ocr_extracted_text.
+Run this once after deploying the document_texts model. Run VACUUM FULL
+(or pg_repack) on documents afterwards to give the space back.
+"""
+
+from sqlalchemy import text
+from app.core.database import engine, SessionLocal, Base
+
+# Import related models so the Document relationships resolve
+from app.models.user import User
+from app.models.fraud_check import FraudCheck
+from app.models.loan_application import LoanApplication
+from app.models.document import Document
+from app.models.document_text import DocumentText
+
+def move_ocr_text(chunk_size: int = 500):
+    """Copy documents.ocr_extracted_text into document_texts in chunks and drop the column"""
+
+    Base.metadata.create_all(bind=engine, tables=[DocumentText.__table__])
+    print("✅ document_texts table is present.")
+
+    db = SessionLocal()
+
+    try:
+        # Check if column still exists
+        check_query = text("""
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_name='documents' AND column_name='ocr_extracted_text'
+        """)
+
+        result = db.execute(check_query).fetchone()
+
+        if not result:
+            print("✅ Column 'ocr_extracted_text' already removed. No migration needed.")
+            return
+
+        print("🔄 Moving OCR text to document_texts...")
+        moved = 0
+        last_id = 0
+        while True:
+            rows = db.execute(text("""
+                SELECT d.id, d.ocr_extracted_text
+                FROM documents d
+                LEFT JOIN document_texts t ON t.document_id = d.id
+                WHERE d.id > :last_id AND d.ocr_extracted_text IS NOT NULL AND t.document_id IS NULL
+                ORDER BY d.id
+                LIMIT :limit
+            """), {"last_id": last_id, "limit": chunk_size}).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            db.add_all([DocumentText(document_id=doc_id, ocr_text=ocr_text) for doc_id, ocr_text in rows])
+            db.commit()
+            moved += len(rows)
+            print(f"   ... {moved} documents moved")
+
+        db.execute(text("ALTER TABLE documents DROP COLUMN ocr_extracted_text"))
+        db.commit()
+        print(f"✅ Moved OCR text of {moved} documents and dropped 'ocr_extracted_text'.")
+
+    except Exception as e:
+        print(f"❌ Error migrating documents: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Database Migration: Compressed OCR text storage")
+    print("=" * 60)
+    move_ocr_text()
+    print("=" * 60)
+    print("✅ Migration complete!")
@@ -0,0 +1,99 @@
+"""
+Rescore every stored fraud check from its saved flags.
+Run this after changing flag weights or score thresholds in the fraud rule
+config; rule evaluation is not repeated, only the vectorized scoring step.
+Pass --rules to score with an alternative rule file (e.g. to compare a
+candidate policy with --dry-run before rolling it out).
+
+Note: approval_probability / final_decision are not recomputed here, only
+the fraud fields on fraud_checks and loan_applications.fraud_score.
+"""
+
+import argparse
+import time
+
+from sqlalchemy import update
+from app.core.database import SessionLocal
+from app.services.fraud_service import fraud_service
+from app.services.fraud_rules import fraud_rules, load_rule_set
+
+# Import related models so relationships resolve
+from app.models.user import User
+from app.models.document import Document
+from app.models.fraud_check import FraudCheck
+from app.models.loan_application import LoanApplication
+
+def rescore_fraud_checks(chunk_size: int = 5000, dry_run: bool = False, rules_path: str = None):
+    """Page through fraud_checks by id and rescore each chunk in one batch"""
+
+    rule_set = load_rule_set(rules_path) if rules_path else fraud_rules.get()
+    print(f"📐 Using fraud rules version {rule_set.version}")
+
+    db = SessionLocal()
+    started = time.perf_counter()
+    total = changed = 0
+    last_id = 0
+
+    try:
+        while True:
+            rows = (
+                db.query(FraudCheck.id, FraudCheck.application_id, FraudCheck.fraud_flags,
+                         FraudCheck.fraud_score, FraudCheck.anomaly_score, LoanApplication.cibil_score)
+                .join(LoanApplication, LoanApplication.id == FraudCheck.application_id)
+                .filter(FraudCheck.id > last_id)
+                .order_by(FraudCheck.id)
+                .limit(chunk_size)
+                .all()
+            )
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            results = fraud_service.detect_fraud_batch(
+                [row.fraud_flags or [] for row in rows],
+                [row.cibil_score if row.cibil_score is not None else 300 for row in rows],
+                rule_set=rule_set,
+                anomaly_scores=[row.anomaly_score for row in rows],
+            )
+            total += len(rows)
+            changed += sum(1 for row, r in zip(rows, results) if row.fraud_score != r["fraud_score"])
+
+            if not dry_run:
+                db.execute(update(FraudCheck), [
+                    {
+                        "id": row.id,
+                        "fraud_score": r["fraud_score"],
+                        "is_fraudulent": r["is_fraudulent"],
+                        "anomaly_detected": r["anomaly_detected"],
+                        "rule_set_version": r["rule_set_version"],
+                    }
+                    for row, r in zip(rows, results)
+                ])
+                db.execute(update(LoanApplication), [
+                    {"id": row.application_id, "fraud_score": r["fraud_score"]}
+                    for row, r in zip(rows, results)
+                ])
+                db.commit()
+
+        elapsed = time.perf_counter() - started
+        action = "Would change" if dry_run else "Changed"
+        print(f"✅ Rescored {total} fraud checks in {elapsed:.2f}s. {action} {changed} scores.")
+
+    except Exception as e:
+        print(f"❌ Error rescoring fraud checks: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rescore stored fraud checks")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without writing them")
+    parser.add_argument("--rules", help="Rule config file to score with (defaults to the active rules)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Fraud Rescoring")
+    print("=" * 60)
+    rescore_fraud_checks(chunk_size=args.chunk_size, dry_run=args.dry_run, rules_path=args.rules)
@@ -1,20 +1,33 @@
+import os
+import tempfile
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.main import app
-from app.core.database import Base, get_db
+from app.core.database import Base, get_async_db, get_db
+from app.services.anomaly_service import anomaly_service
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# A file, not :memory:, so every connection (sync and async) sees the same tables
+_db_dir = tempfile.mkdtemp(prefix="credora-tests-")
+SQLALCHEMY_DATABASE_PATH = os.path.join(_db_dir, "test.db")
 
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+    f"sqlite:///{SQLALCHEMY_DATABASE_PATH}", connect_args={"check_same_thread": False}
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(f"sqlite+aiosqlite:///{SQLALCHEMY_DATABASE_PATH}")
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base.metadata.create_all(bind=engine)
 
+# The app checkpoints the anomaly model on shutdown; keep that out of app/ml_models
+anomaly_service.model_path = os.path.join(_db_dir, "anomaly_hst.pkl")
+
 def override_get_db():
     try:
         db = TestingSessionLocal()
@@ -22,7 +35,12 @@ def override_get_db():
     finally:
         db.close()
 
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
 
 @pytest.fixture(scope="module")
 def client():
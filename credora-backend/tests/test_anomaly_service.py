@@ -0,0 +1,50 @@
+import random
+
+from app.services.anomaly_service import WINDOW_SIZE, AnomalyService
+from app.services.fraud_service import fraud_service
+
+
+def make_app_data(rng):
+    income = rng.uniform(5e5, 2e6)
+    return {
+        "no_of_dependents": rng.randint(0, 3),
+        "income_annum": income,
+        "loan_amount": income * rng.uniform(1, 4),
+        "loan_term": rng.choice([5, 10, 15]),
+        "cibil_score": rng.randint(650, 820),
+        "residential_assets_value": income * 2,
+        "commercial_assets_value": 0,
+        "luxury_assets_value": income * 0.2,
+        "bank_asset_value": income * 0.5,
+    }
+
+
+def test_streaming_model_scores_outliers_and_survives_checkpoint(tmp_path):
+    rng = random.Random(0)
+    model_path = str(tmp_path / "hst.pkl")
+    service = AnomalyService(model_path=model_path)
+
+    # No opinion until the first reference window is complete
+    assert service.score_and_update(make_app_data(rng)) is None
+    for _ in range(1, 2 * WINDOW_SIZE):
+        service.score_and_update(make_app_data(rng))
+
+    outlier = {
+        "no_of_dependents": 5, "income_annum": 3e7, "loan_amount": 2e5, "loan_term": 1,
+        "cibil_score": 320, "commercial_assets_value": 5e7,
+    }
+    assert service.score_and_update(outlier, learn=False) > 0.95
+
+    service.checkpoint()
+    restored = AnomalyService(model_path=model_path)
+    assert restored.model.windows_completed == service.model.windows_completed
+    assert restored.score_and_update(outlier, learn=False) > 0.95
+
+
+def test_anomaly_score_drives_anomaly_detected():
+    low, high, warming = fraud_service.detect_fraud_batch(
+        [["EXCESSIVE_LOAN_AMOUNT"]] * 3, [750] * 3, anomaly_scores=[0.2, 0.99, None]
+    )
+    assert not low["anomaly_detected"]
+    assert high["anomaly_detected"]
+    assert warming["anomaly_detected"] == (warming["fraud_score"] > 0.5)
@@ -1,5 +1,5 @@
 from app.main import app
-from app.api.loan import get_current_user, get_admin_user
+from app.api.loan import get_current_user, get_admin_user, get_token_user
 from app.models.user import User
 
 # Mocking authentication locally for tests
@@ -11,6 +11,7 @@ def override_get_admin_user():
 
 app.dependency_overrides[get_current_user] = override_get_current_user
 app.dependency_overrides[get_admin_user] = override_get_admin_user
+app.dependency_overrides[get_token_user] = override_get_current_user
 
 def test_health_check(client):
     response = client.get("/health")
@@ -29,3 +30,232 @@ def test_admin_all_applications(client):
     response = client.get("/api/loan/admin/all-applications")
     assert response.status_code == 200
     assert isinstance(response.json(), list)
+
+def test_readiness_check_reports_the_ocr_engine(client):
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["ocr_engine"]["healthy"] is True
+    assert "ocr_engine" not in client.get("/health").json()
+
+def test_metrics_endpoint(client, monkeypatch):
+    from app.core import auth as core_auth
+
+    client.get("/api/loan/my-applications")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer guess"}).status_code == 401
+
+    monkeypatch.setattr(core_auth, "METRICS_TOKEN", "scrape-secret")
+    response = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert response.status_code == 200
+    assert 'db_pool_checkouts_total{engine="sync"}' in response.text
+
+def test_async_database_url():
+    from app.core.database import async_database_url
+
+    assert async_database_url("postgresql://u:p@db:5432/credora") == "postgresql+asyncpg://u:p@db:5432/credora"
+    assert async_database_url("postgresql+psycopg2://u@db/credora") == "postgresql+asyncpg://u@db/credora"
+    assert async_database_url("sqlite:///./credora.db") == "sqlite+aiosqlite:///./credora.db"
+
+def test_admin_applications_are_keyset_paginated(client):
+    from datetime import datetime, timedelta
+    from app.models.loan_application import LoanApplication
+    from tests.conftest import TestingSessionLocal
+
+    db = TestingSessionLocal()
+    start = datetime(2024, 1, 1)
+    ids = []
+    for i in range(5):
+        application = LoanApplication(
+            user_id=7, income_annum=1, loan_amount=1, loan_term=1, cibil_score=700, education="Graduate",
+            status="REJECTED" if i % 2 else "APPROVED", fraud_score=i / 10, ai_reasoning="long text",
+            created_at=start + timedelta(minutes=i // 2),  # pairs share a timestamp
+        )
+        db.add(application)
+        db.flush()
+        ids.append(application.id)
+    db.commit()
+
+    seen, cursor = [], None
+    while True:
+        params = {"user_id": 7, "limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/loan/admin/all-applications", params=params)
+        assert response.status_code == 200
+        assert all("ai_reasoning" not in item for item in response.json())
+        seen += [item["id"] for item in response.json()]
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            break
+    assert seen == ids[::-1]
+
+    response = client.get(
+        "/api/loan/admin/all-applications",
+        params={"user_id": 7, "status": "APPROVED", "min_fraud_score": 0.1, "order": "asc"},
+    )
+    assert [item["id"] for item in response.json()] == [ids[2], ids[4]]
+    assert client.get("/api/loan/admin/all-applications", params={"cursor": "!!"}).status_code == 400
+
+def test_admin_export_streams_ndjson_and_gzipped_csv(client):
+    import csv
+    import gzip
+    import io
+    import json
+
+    response = client.get("/api/loan/admin/export", params={"columns": "application_id,status,fraud_score"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert rows and set(rows[0]) == {"application_id", "status", "fraud_score"}
+    assert [row["application_id"] for row in rows] == sorted(row["application_id"] for row in rows)
+
+    response = client.get("/api/loan/admin/export", params={"format": "csv", "gzip": True, "status": "APPROVED"})
+    assert response.headers["content-disposition"].endswith('.csv.gz"')
+    table = list(csv.reader(io.StringIO(gzip.decompress(response.content).decode())))
+    assert "ai_reasoning" not in table[0]
+    assert {row[table[0].index("status")] for row in table[1:]} == {"APPROVED"}
+
+    assert client.get("/api/loan/admin/export", params={"columns": "password"}).status_code == 400
+
+def test_moving_a_file_between_document_types_keeps_its_blob(client, monkeypatch, tmp_path):
+    import io
+    import os
+    from PIL import Image
+    from app.api import loan
+    from app.models.document import Document
+    from app.models.document_blob import DocumentBlob
+    from app.models.loan_application import LoanApplication
+    from tests.conftest import TestingSessionLocal
+
+    async def no_ocr(doc_type, path, full_name, sha256):
+        return None, None, None
+
+    monkeypatch.setattr(loan, "_ingest_document", no_ocr)
+    monkeypatch.setattr(loan, "_run_processing_pipeline", lambda application, db: None)
+    monkeypatch.setattr(loan, "RENDITIONS_EAGER", False)
+    monkeypatch.setattr(loan.blob_store, "root", str(tmp_path / "blobs"))
+    monkeypatch.setattr(loan.blob_store, "tmp_dir", str(tmp_path / "blobs" / "tmp"))
+
+    db = TestingSessionLocal()
+    application = LoanApplication(user_id=1, income_annum=1, loan_amount=1, loan_term=1, cibil_score=700, education="Graduate")
+    db.add(application)
+    db.commit()
+
+    def png(shade):
+        buffer = io.BytesIO()
+        Image.new("RGB", (40, 40), (shade, shade, shade)).save(buffer, "PNG")
+        return buffer.getvalue()
+
+    def upload(identity, address, income, photo):
+        files = {
+            name: (f"{name}.png", png(shade), "image/png")
+            for name, shade in zip(("identityProof", "addressProof", "incomeProof", "photo"), (identity, address, income, photo))
+        }
+        response = client.post(f"/api/loan/documents/{application.id}", files=files)
+        assert response.status_code == 200, response.text
+
+    upload(10, 20, 30, 40)
+    # The old identity proof is re-uploaded as the address proof
+    upload(50, 10, 30, 40)
+
+    db.expire_all()
+    for document in db.query(Document).filter(Document.application_id == application.id):
+        blob = db.get(DocumentBlob, document.content_sha256)
+        assert blob is not None and blob.ref_count >= 1, document.document_type
+        assert os.path.exists(blob.file_path)
+    refs = {blob.sha256: blob.ref_count for blob in db.query(DocumentBlob)}
+    assert sorted(refs.values()) == [1, 1, 1, 1]
+
+def test_admin_search_and_status_counts_run_on_the_server(client):
+    from app.models.loan_application import LoanApplication
+    from app.models.user import User
+    from tests.conftest import TestingSessionLocal
+
+    db = TestingSessionLocal()
+    user = User(id=4242, email="searchable.person@example.com", full_name="Searchable Person", hashed_password="x")
+    db.add(user)
+    db.flush()
+    for status in ("UNDER_REVIEW", "UNDER_REVIEW", "APPROVED"):
+        db.add(LoanApplication(
+            user_id=user.id, income_annum=1, loan_amount=1, loan_term=1, cibil_score=700,
+            education="Graduate", status=status,
+        ))
+    db.commit()
+
+    response = client.get("/api/loan/admin/all-applications", params={"search": "searchable", "status": "UNDER_REVIEW"})
+    assert response.status_code == 200
+    assert [item["user_id"] for item in response.json()] == [user.id, user.id]
+
+    counts = client.get("/api/loan/admin/application-counts", params={"search": "SEARCHABLE.PERSON"}).json()
+    assert counts == {"total": 3, "by_status": {"UNDER_REVIEW": 2, "APPROVED": 1}}
+
+def test_reprocessing_does_not_teach_the_anomaly_model_twice(client, monkeypatch):
+    from app.api import loan
+    from app.models.loan_application import LoanApplication
+    from tests.conftest import TestingSessionLocal
+
+    learned = []
+
+    def score_and_update(app_data, learn=True):
+        learned.append(learn)
+        return None
+
+    monkeypatch.setattr(loan.anomaly_service, "score_and_update", score_and_update)
+
+    db = TestingSessionLocal()
+    application = LoanApplication(user_id=1, income_annum=1200000, loan_amount=2000000, loan_term=10, cibil_score=750, education="Graduate")
+    db.add(application)
+    db.commit()
+
+    loan._run_processing_pipeline(application, db)
+    loan._run_processing_pipeline(application, db)
+    assert learned == [True, False]
+
+def test_sync_session_handlers_run_off_the_event_loop(client, monkeypatch):
+    import asyncio
+    from app.api import loan
+    from app.models.loan_application import LoanApplication
+    from tests.conftest import TestingSessionLocal
+
+    on_loop = []
+
+    def pipeline(application, db):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return {"risk_result": {"final_decision": "REVIEW"}, "loan_result": {}, "fraud_result": {}}
+
+    monkeypatch.setattr(loan, "_run_processing_pipeline", pipeline)
+    db = TestingSessionLocal()
+    application = LoanApplication(user_id=1, income_annum=1, loan_amount=1, loan_term=1, cibil_score=700, education="Graduate")
+    db.add(application)
+    db.commit()
+
+    assert client.post(f"/api/loan/process/{application.id}").status_code == 200
+    assert on_loop == [False]
+
+    response = client.post(f"/api/loan/review/{application.id}", data={"decision": "APPROVED"})
+    assert response.status_code == 200
+    db.expire_all()
+    assert db.get(LoanApplication, application.id).status == "APPROVED"
+
+def test_register_and_login_use_the_async_session(client, monkeypatch):
+    from app.core.passwords import password_hasher
+
+    async def fake_hash(password):
+        return f"hashed:{password}"
+
+    async def fake_verify(password, hashed_password):
+        return hashed_password == f"hashed:{password}", None
+
+    monkeypatch.setattr(password_hasher, "hash", fake_hash)
+    monkeypatch.setattr(password_hasher, "verify_and_update", fake_verify)
+
+    user = {"email": "async-login@credora.com", "full_name": "Async Login", "password": "s3cret-pass"}
+    assert client.post("/api/auth/register", json=user).status_code == 200
+    assert client.post("/api/auth/register", json=user).status_code == 400
+
+    response = client.post("/api/auth/login", data={"username": user["email"], "password": user["password"]})
+    assert response.status_code == 200
+    assert response.json()["user"]["email"] == user["email"]
+    assert client.post("/api/auth/login", data={"username": user["email"], "password": "wrong"}).status_code == 401
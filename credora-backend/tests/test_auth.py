@@ -0,0 +1,66 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.auth import AuthCache, Principal, auth_cache, principal_claims
+from app.core.database import Base
+from app.core.security import create_access_token
+from app.models.user import User
+
+
+def test_recent_token_claims_skip_the_database_until_the_user_changes():
+    cache = AuthCache()
+    user = User(id=7, email="poll@credora.com", full_name="Poll User", is_admin=False)
+    token = create_access_token(data=principal_claims(user))
+
+    payload = cache.verify(token)
+    assert cache.verify(token) is payload
+    assert cache.claims_principal(payload) == Principal(7, "poll@credora.com", "Poll User", False)
+
+    cache.invalidate_user(7, "poll@credora.com")
+    assert cache.claims_principal(payload) is None
+
+    # Tokens without the principal claims always go through the lookup
+    legacy = cache.verify(create_access_token(data={"sub": user.email, "user_id": user.id}))
+    assert cache.claims_principal(legacy) is None
+
+
+def test_orm_updates_drop_the_cached_principal(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'auth.db'}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    user = User(email="demoted@credora.com", full_name="Demoted", hashed_password="x", is_admin=True)
+    db.add(user)
+    db.commit()
+
+    auth_cache.principals.set(user.email, Principal.from_user(user))
+    user.is_admin = False
+    db.commit()
+    assert auth_cache.principals.get("demoted@credora.com") is None
+
+
+def test_deactivated_users_are_refused_on_the_claims_fast_path(tmp_path):
+    import asyncio
+    import pytest
+    from fastapi import HTTPException
+    from app.core.auth import get_token_user
+
+    # A token issued while inactive carries that in its claims
+    inactive = User(id=8, email="inactive@credora.com", full_name="Inactive", is_admin=False, is_active=False)
+    token = create_access_token(data=principal_claims(inactive))
+    with pytest.raises(HTTPException) as refused:
+        asyncio.run(get_token_user(token=token, db=None))
+    assert refused.value.status_code == 403
+
+    # Deactivated after the token was issued: this worker stops trusting the claims
+    engine = create_engine(f"sqlite:///{tmp_path / 'auth.db'}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    user = User(id=9, email="leaver@credora.com", full_name="Leaver", hashed_password="x", is_admin=False)
+    db.add(user)
+    db.commit()
+    payload = auth_cache.verify(create_access_token(data=principal_claims(user)))
+    assert auth_cache.claims_principal(payload).is_active
+
+    user.is_active = False
+    db.commit()
+    assert auth_cache.claims_principal(payload) is None
@@ -0,0 +1,144 @@
+import asyncio
+import io
+import os
+
+from fastapi import UploadFile
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.document_blob import DocumentBlob
+from app.services.blob_store import BlobStore
+
+PDF_BYTES = b"%PDF-1.4\n" + b"x" * 2000
+
+
+def test_identical_uploads_share_one_refcounted_blob(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'blobs.db'}")
+    DocumentBlob.__table__.create(engine)
+    db = sessionmaker(bind=engine)()
+    store = BlobStore(str(tmp_path / "blobs"))
+
+    first = asyncio.run(store.ingest(UploadFile(file=io.BytesIO(PDF_BYTES), filename="a.pdf")))
+    second = asyncio.run(store.ingest(UploadFile(file=io.BytesIO(PDF_BYTES), filename="b.pdf")))
+    assert first["created"] and not second["created"]
+    assert first["path"] == second["path"]
+    sha = first["sha256"]
+    assert first["path"].endswith(os.path.join(sha[:2], sha[2:4], f"{sha}.pdf"))
+
+    for saved in (first, second):
+        store.acquire(db, sha, saved["path"], saved["size"], saved["content_type"], keep_path=saved["keep_path"])
+    db.commit()
+    assert os.listdir(store.tmp_dir) == []
+    assert db.get(DocumentBlob, sha).ref_count == 2
+
+    assert store.release(db, sha) is None
+    released = store.release(db, sha)
+    db.commit()
+    assert store.remove_unreferenced(db, [released]) == 1
+    assert not os.path.exists(first["path"])
+
+
+def test_renditions_are_cached_by_hash_and_size(tmp_path):
+    from PIL import Image
+    from app.services.rendition_service import RENDITION_SIZES, RenditionService
+
+    source = tmp_path / "scan.jpg"
+    Image.new("RGB", (4000, 3000), "white").save(source)
+    service = RenditionService(str(tmp_path / "renditions"))
+
+    paths = service.generate(str(source), "ab" * 32)
+    for kind, size in RENDITION_SIZES.items():
+        with Image.open(paths[kind]) as rendition:
+            assert rendition.format == "WEBP"
+            assert max(rendition.size) == size
+
+    mtime = os.path.getmtime(paths["thumbnail"])
+    assert service.get(str(source), "ab" * 32, "thumbnail") == paths["thumbnail"]
+    assert os.path.getmtime(paths["thumbnail"]) == mtime
+
+
+def test_working_copy_is_rotated_and_capped(tmp_path):
+    from PIL import Image
+    from app.services.working_copy_service import WorkingCopyService
+
+    service = WorkingCopyService(str(tmp_path / "working"), max_edge=1000)
+    small = tmp_path / "small.png"
+    Image.new("RGB", (800, 600), "white").save(small)
+    assert service.create(str(small), "cd" * 32) is None
+
+    # Landscape sensor data with "rotate 90° CW" orientation, as phones write it
+    photo = tmp_path / "photo.jpg"
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    Image.new("RGB", (4000, 3000), "white").save(photo, exif=exif)
+    path = service.create(str(photo), "ab" * 32)
+    with Image.open(path) as copy:
+        assert copy.format == "WEBP"
+        assert copy.size == (750, 1000)
+    service.remove("ab" * 32)
+    assert not os.path.exists(path)
+
+
+def test_reacquiring_a_released_blob_in_the_same_transaction_keeps_it(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'blobs.db'}")
+    DocumentBlob.__table__.create(engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    store = BlobStore(str(tmp_path / "blobs"))
+
+    saved = asyncio.run(store.ingest(UploadFile(file=io.BytesIO(PDF_BYTES), filename="a.pdf")))
+    sha = saved["sha256"]
+    store.acquire(db, sha, saved["path"], saved["size"], saved["content_type"])
+    db.commit()
+
+    released = store.release(db, sha)
+    assert released is not None
+    store.acquire(db, sha, saved["path"], saved["size"], saved["content_type"])
+    db.commit()
+
+    assert db.get(DocumentBlob, sha).ref_count == 1
+    assert store.remove_unreferenced(db, [released]) == 0
+    assert os.path.exists(saved["path"])
+
+
+def test_an_upload_racing_the_removal_of_its_content_restores_the_file(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'blobs.db'}")
+    DocumentBlob.__table__.create(engine)
+    db = sessionmaker(bind=engine)()
+    store = BlobStore(str(tmp_path / "blobs"))
+
+    first = asyncio.run(store.ingest(UploadFile(file=io.BytesIO(PDF_BYTES), filename="a.pdf")))
+    sha = first["sha256"]
+    store.acquire(db, sha, first["path"], first["size"], first["content_type"], keep_path=first["keep_path"])
+    db.commit()
+
+    # B uploads the same content (the blob file already exists) ...
+    second = asyncio.run(store.ingest(UploadFile(file=io.BytesIO(PDF_BYTES), filename="b.pdf")))
+    assert not second["created"]
+    # ... while A drops the last reference and removes the file
+    released = store.release(db, sha)
+    db.commit()
+    assert store.remove_unreferenced(db, [released]) == 1
+    assert not os.path.exists(second["path"])
+
+    blob = store.acquire(db, sha, second["path"], second["size"], second["content_type"], keep_path=second["keep_path"])
+    db.commit()
+    assert blob.ref_count == 1 and open(blob.file_path, "rb").read() == PDF_BYTES
+    assert os.listdir(store.tmp_dir) == []
+
+
+def test_discarding_an_uncommitted_upload_removes_only_its_new_blobs(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'blobs.db'}")
+    DocumentBlob.__table__.create(engine)
+    db = sessionmaker(bind=engine)()
+    store = BlobStore(str(tmp_path / "blobs"))
+
+    kept = asyncio.run(store.ingest(UploadFile(file=io.BytesIO(PDF_BYTES), filename="a.pdf")))
+    store.acquire(db, kept["sha256"], kept["path"], kept["size"], kept["content_type"], keep_path=kept["keep_path"])
+    db.commit()
+
+    same = asyncio.run(store.ingest(UploadFile(file=io.BytesIO(PDF_BYTES), filename="b.pdf")))
+    new = asyncio.run(store.ingest(UploadFile(file=io.BytesIO(b"%PDF-1.4\nother"), filename="c.pdf")))
+    assert store.discard(db, [same, new]) == 1
+    assert os.path.exists(kept["path"]) and not os.path.exists(new["path"])
+    assert db.get(DocumentBlob, new["sha256"]) is None
+    assert os.listdir(store.tmp_dir) == []
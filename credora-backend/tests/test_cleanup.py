@@ -0,0 +1,143 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.document import Document
+from app.models.document_blob import DocumentBlob
+from app.models.document_text import DocumentText
+from app.models.loan_application import LoanApplication
+from app.services.blob_store import blob_store
+from app.tasks import cleanup
+
+
+def test_cleanup_pages_through_rejected_applications(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'cleanup.db'}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    monkeypatch.setattr(cleanup, "SessionLocal", Session)
+    monkeypatch.setattr(blob_store, "root", str(tmp_path / "blobs"))
+    monkeypatch.setattr(blob_store, "tmp_dir", str(tmp_path / "blobs" / "tmp"))
+
+    db = Session()
+    old = datetime.utcnow() - timedelta(days=60)
+    shared = tmp_path / "shared.pdf"
+    shared.write_bytes(b"%PDF-1.4 shared")
+    blob_store.acquire(db, "aa" * 32, str(shared), 15, "application/pdf")
+    for status, updated_at in [("REJECTED", old)] * 5 + [("APPROVED", old), ("REJECTED", datetime.utcnow())]:
+        application = LoanApplication(
+            income_annum=1, loan_amount=1, loan_term=1, cibil_score=700, education="Graduate",
+            status=status, updated_at=updated_at,
+        )
+        db.add(application)
+        db.flush()
+        own = tmp_path / f"own_{application.id}.pdf"
+        own.write_bytes(b"%PDF-1.4 own")
+        sha = f"{application.id:064x}"
+        blob_store.acquire(db, sha, str(own), 12, "application/pdf")
+        blob_store.acquire(db, "aa" * 32, str(shared), 15, "application/pdf")
+        for doc_type, doc_sha, path in [("income_proof", sha, own), ("identity_proof", "aa" * 32, shared)]:
+            db.add(Document(
+                application_id=application.id, document_type=doc_type, file_name=path.name,
+                file_path=str(path), content_sha256=doc_sha, ocr_extracted_text="scanned text",
+            ))
+    # The initial acquire was only there to register the shared blob
+    db.get(DocumentBlob, "aa" * 32).ref_count -= 1
+    db.commit()
+
+    stats = cleanup.cleanup_rejected_documents(chunk_size=2)
+    assert stats["applications"] == 5
+    assert stats["documents"] == 10
+    assert stats["blobs_removed"] == 5
+    assert db.query(Document).count() == 4
+    assert db.query(DocumentText).count() == 4
+    # Still used by the two applications that are kept
+    assert db.get(DocumentBlob, "aa" * 32).ref_count == 2
+    assert shared.exists()
+    assert sorted(p.name for p in tmp_path.glob("own_*.pdf")) == ["own_6.pdf", "own_7.pdf"]
+
+    assert cleanup.cleanup_rejected_documents()["applications"] == 0
+
+
+def test_cleanup_sweeps_legacy_directories_without_document_rows(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    monkeypatch.setattr(cleanup, "SessionLocal", Session)
+    monkeypatch.setattr(blob_store, "root", str(tmp_path / "blobs"))
+    monkeypatch.setattr(blob_store, "tmp_dir", str(tmp_path / "blobs" / "tmp"))
+    monkeypatch.setattr(cleanup, "UPLOAD_DIR", str(tmp_path / "uploads"))
+
+    db = Session()
+    old = datetime.utcnow() - timedelta(days=60)
+    for status, updated_at in [("REJECTED", old), ("APPROVED", old), ("REJECTED", datetime.utcnow())]:
+        application = LoanApplication(
+            income_annum=1, loan_amount=1, loan_term=1, cibil_score=700, education="Graduate",
+            status=status, updated_at=updated_at,
+        )
+        db.add(application)
+        db.flush()
+        app_dir = tmp_path / "uploads" / f"app_{application.id}"
+        app_dir.mkdir(parents=True)
+        (app_dir / "identity.pdf").write_bytes(b"%PDF-1.4 legacy")
+    db.commit()
+    (tmp_path / "uploads" / "app_999").mkdir()  # no such application
+
+    stats = cleanup.cleanup_rejected_documents()
+    assert stats["applications"] == 0
+    assert stats["directories_removed"] == 1
+    assert sorted(p.name for p in (tmp_path / "uploads").iterdir()) == ["app_2", "app_3", "app_999"]
+
+
+def test_tiering_gzips_only_cold_blobs(tmp_path, monkeypatch):
+    import gzip
+    from app.tasks import tiering
+    from app.utils.compression import readable_path
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'tiering.db'}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    monkeypatch.setattr(tiering, "SessionLocal", Session)
+    monkeypatch.setattr(blob_store, "root", str(tmp_path / "blobs"))
+    monkeypatch.setattr(blob_store, "tmp_dir", str(tmp_path / "blobs" / "tmp"))
+
+    db = Session()
+    content = b"%PDF-1.4\n" + b"BT /F1 12 Tf (statement line) Tj ET\n" * 500
+    paths = {}
+    for status, updated_at in [("APPROVED", datetime.utcnow() - timedelta(days=30)), ("UNDER_REVIEW", None)]:
+        application = LoanApplication(
+            income_annum=1, loan_amount=1, loan_term=1, cibil_score=700, education="Graduate",
+            status=status, updated_at=updated_at,
+        )
+        db.add(application)
+        db.flush()
+        path = tmp_path / f"{status}.pdf"
+        path.write_bytes(content + status.encode())
+        sha = f"{application.id:064x}"
+        blob_store.acquire(db, sha, str(path), path.stat().st_size, "application/pdf")
+        db.add(Document(
+            application_id=application.id, document_type="income_proof", file_name=path.name,
+            file_path=str(path), content_sha256=sha,
+        ))
+        paths[status] = (sha, path)
+    db.commit()
+
+    stats = tiering.tier_cold_documents()
+    assert stats["compressed"] == 1 and stats["bytes_saved"] > 0
+
+    sha, path = paths["APPROVED"]
+    blob = db.get(DocumentBlob, sha)
+    assert blob.encoding == "gzip" and blob.file_path == f"{path}.gz"
+    assert db.query(Document).filter(Document.content_sha256 == sha).one().file_path == blob.file_path
+    assert not path.exists()
+    assert gzip.decompress(open(blob.file_path, "rb").read()) == content + b"APPROVED"
+    with readable_path(blob.file_path) as plain:
+        assert plain.endswith(".pdf") and open(plain, "rb").read() == content + b"APPROVED"
+    assert paths["UNDER_REVIEW"][1].exists()
+
+    # Re-uploading the same content reuses the compressed blob
+    path.write_bytes(content + b"APPROVED")
+    assert blob_store.acquire(db, sha, str(path), 0, "application/pdf").file_path == f"{path}.gz"
+    assert not path.exists()
+
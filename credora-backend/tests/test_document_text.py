@@ -0,0 +1,30 @@
+import zlib
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.document import Document
+from app.models.document_text import DocumentText
+
+
+def test_ocr_text_is_stored_compressed_and_loaded_on_demand(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'texts.db'}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    statement = "Opening balance 12,000.00 Salary credit 95,000.00\n" * 400
+    db.add(Document(document_type="income_proof", file_path="x.pdf", file_name="x.pdf", ocr_extracted_text=statement))
+    db.commit()
+    db.expunge_all()
+
+    stored = db.execute(text("SELECT ocr_text FROM document_texts")).scalar_one()
+    assert len(stored) < len(statement) / 10
+    assert zlib.decompress(stored).decode() == statement
+
+    doc = db.query(Document).one()
+    assert "text_record" in inspect(doc).unloaded
+    assert doc.ocr_extracted_text == statement
+    doc.ocr_extracted_text = None
+    db.commit()
+    assert db.query(DocumentText).count() == 0
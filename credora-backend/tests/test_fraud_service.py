@@ -0,0 +1,139 @@
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.document_features import extract_document_features
+from app.services.fraud_rules import FRAUD_RULES_PATH, CompiledRuleSet, FraudRuleRegistry
+from app.services.fraud_service import fraud_service
+
+IDENTITY_TEXT = "Government of India Aadhaar Test User DOB 01/01/1990"
+ADDRESS_TEXT = "Address: 12 MG Road, Pune City, Maharashtra State, Pin Code 411001"
+INCOME_TEXT = "Salary slip for March. Gross income 1,200,000 net pay 95,000"
+
+
+def make_doc(document_type, text, precompute=True):
+    return SimpleNamespace(
+        document_type=document_type,
+        ocr_extracted_text=text,
+        ocr_features=extract_document_features(text, document_type) if precompute else None,
+        file_path=None,
+    )
+
+
+def make_app_data(**overrides):
+    data = {
+        "income_annum": 1200000,
+        "loan_amount": 2000000,
+        "loan_term": 10,
+        "cibil_score": 750,
+        "user_full_name": "Test User",
+    }
+    data.update(overrides)
+    return data
+
+
+def test_features_are_compact_and_complete():
+    features = extract_document_features(INCOME_TEXT, "income_proof")
+    assert features["length"] == len(INCOME_TEXT)
+    assert features["amounts"][0] == 1200000.0
+    assert "income_proof" in features["keyword_categories"]
+    assert "salary" in features["tokens"]
+
+
+def test_clean_documents_raise_no_document_flags():
+    documents = [
+        make_doc("identity_proof", IDENTITY_TEXT),
+        make_doc("address_proof", ADDRESS_TEXT),
+        make_doc("income_proof", INCOME_TEXT),
+        make_doc("photo", None),
+    ]
+    assert fraud_service.check_rule_based_fraud(make_app_data(), documents) == []
+
+
+def test_stored_and_recomputed_features_agree():
+    texts = {
+        "identity_proof": "University examination marksheet semester 4 CGPA 8.1",
+        "address_proof": "short",
+        "income_proof": INCOME_TEXT,
+    }
+    app_data = make_app_data(user_full_name="Someone Else", income_annum=300000)
+    stored = [make_doc(t, text) for t, text in texts.items()]
+    legacy = [make_doc(t, text, precompute=False) for t, text in texts.items()]
+
+    flags = fraud_service.check_rule_based_fraud(app_data, stored)
+    assert flags == fraud_service.check_rule_based_fraud(app_data, legacy)
+    assert "POSSIBLE_MARKSHEET_IN_IDENTITY_PROOF" in flags
+    assert "IDENTITY_NAME_MISMATCH" in flags
+    assert "DOC_OCR_WEAK_ADDRESS_PROOF" in flags
+    assert "INCOME_DOC_HIGHER_THAN_DECLARED" in flags
+    assert "MISSING_PHOTO" in flags
+
+
+def test_batch_scoring_reproduces_the_original_per_flag_arithmetic():
+    # Expected values are what the original scalar loop produced (0.1 base,
+    # +0.18 per severe / +0.12 per other flag occurrence, +0.2 below CIBIL 500,
+    # +0.1 below 600, capped at 1.0; fraudulent above 0.6 or with 2+ flags;
+    # HIGH above 0.7, MEDIUM above 0.4), down to the float rounding that
+    # decides the threshold cases.
+    cases = [
+        # flags, cibil -> fraud_score, is_fraudulent, risk_level
+        ([], 780, 0.1, False, "LOW"),
+        ([], 700, 0.1, False, "LOW"),
+        ([], 600, 0.1, False, "LOW"),
+        ([], 599, 0.2, False, "LOW"),
+        ([], 580, 0.2, False, "LOW"),
+        ([], 500, 0.2, False, "LOW"),
+        ([], 499, 0.30000000000000004, False, "LOW"),
+        ([], 450, 0.30000000000000004, False, "LOW"),
+        (["EXCESSIVE_LOAN_AMOUNT"], 450, 0.42000000000000004, False, "MEDIUM"),
+        (["EXCESSIVE_LOAN_AMOUNT"], 580, 0.32, False, "LOW"),
+        # Repeated flags count once per occurrence; 0.7000000000000001 is HIGH
+        (["POSSIBLE_MARKSHEET_IN_INCOME_PROOF", "EXCESSIVE_LOAN_AMOUNT",
+          "IDENTITY_NAME_MISMATCH", "EXCESSIVE_LOAN_AMOUNT"], 700, 0.7000000000000001, True, "HIGH"),
+        (["MISSING_PHOTO", "NO_FACE_DETECTED_IN_PHOTO", "LOW_CREDIT_HIGH_LOAN"], 580, 0.62, True, "MEDIUM"),
+        # Exactly 0.4 is still LOW; two flags make it fraudulent regardless of score
+        (["IDENTITY_NAME_MISMATCH", "EXCESSIVE_LOAN_AMOUNT"], 700, 0.4, True, "LOW"),
+        (["EXCESSIVE_LOAN_AMOUNT", "LOW_CREDIT_HIGH_LOAN", "HIGH_INCOME_CLAIM"], 450, 0.6599999999999999, True, "MEDIUM"),
+        (["IDENTITY_NAME_MISMATCH"] * 6, 450, 1.0, True, "HIGH"),
+    ]
+
+    results = fraud_service.detect_fraud_batch([c[0] for c in cases], [c[1] for c in cases])
+    for (flags, cibil, score, fraudulent, level), result in zip(cases, results):
+        assert result["fraud_score"] == score, (flags, cibil)
+        assert result["is_fraudulent"] is fraudulent, (flags, cibil)
+        assert result["risk_level"] == level, (flags, cibil)
+        assert result["anomaly_detected"] is (score > 0.5)
+        assert result["fraud_flags"] == flags
+
+
+def test_rule_config_validation_and_hot_reload(tmp_path):
+    with open(FRAUD_RULES_PATH) as f:
+        config = json.load(f)
+
+    broken = dict(config, thresholds={})
+    with pytest.raises(ValueError):
+        CompiledRuleSet(broken)
+
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(config))
+    registry = FraudRuleRegistry(str(path), reload_seconds=0)
+    assert registry.get().version == config["version"]
+
+    stricter = json.loads(json.dumps(config))
+    stricter["version"] = "test.2"
+    stricter["scoring"]["default_flag_weight"] = 0.3
+    path.write_text(json.dumps(stricter))
+    os.utime(path, (1, 1))
+    rules = registry.get()
+    assert rules.version == "test.2"
+
+    result = fraud_service.detect_fraud_batch([["EXCESSIVE_LOAN_AMOUNT"]], [750], rule_set=rules)[0]
+    assert result["fraud_score"] == 0.1 + 0.3
+    assert result["rule_set_version"] == "test.2"
+
+    # An invalid edit keeps the last good rule set
+    path.write_text("{not json")
+    os.utime(path, (2, 2))
+    assert registry.get().version == "test.2"
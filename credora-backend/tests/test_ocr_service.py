@@ -0,0 +1,325 @@
+import asyncio
+import io
+import time
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.api import loan
+from app.services.fraud_service import fraud_service
+from app.services.image_preprocessing import PREPROCESS_PROFILES, estimate_skew, preprocess_image
+from app.services.ocr_cache import OCRCache
+from app.services.ocr_regions import detect_text_regions, is_sufficient, recognize_regions
+from app.services.ocr_service import OCRService, ocr_service
+
+
+# An Aadhaar-style card, most relevant lines first
+CARD_LINES = [
+    "Government of India",
+    "Test User DOB 01/01/1990 Male",
+    "Aadhaar 1234 5678 9012",
+    "Unique Identification Authority issued enrolment 2015",
+    "Address house 12 MG Road Shivaji Nagar",
+    "Pune City Maharashtra State Pin Code 411001",
+    "Mobile 9876543210 email test user at example dot com",
+    "VID 9182 7364 5546 3728 download date 12/03/2021",
+    "help 1947 www uidai gov in resident portal",
+    "Aadhaar is proof of identity not of citizenship",
+    "verify identity using secure QR code authentication",
+    "should be used with online authentication only",
+]
+
+
+def write_text_pdf(path, page_texts):
+    """Minimal PDF with one line of Helvetica text per page."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in page_texts:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids), len(kids)
+    )
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(bytes(out))
+
+
+def test_pdf_pages_are_extracted_in_order_within_limits(tmp_path):
+    pdf_path = tmp_path / "statement.pdf"
+    write_text_pdf(pdf_path, [f"Statement page {i} closing balance {i}000" for i in range(8)])
+    service = OCRService(cache=OCRCache(str(tmp_path / "cache")))
+
+    text = service.extract_text(str(pdf_path))
+    assert text.index("page 0") < text.index("page 3") < text.index("page 7")
+
+    pages = dict(service.iter_pdf_pages(str(pdf_path), max_pages=3))
+    assert sorted(pages) == [0, 1, 2]
+
+    # The text budget stops extraction early instead of reading every page
+    budgeted = list(service.iter_pdf_pages(str(pdf_path), max_pages=8, max_text_bytes=1))
+    assert len(budgeted) == 1
+
+
+def test_identical_bytes_are_extracted_once(tmp_path, monkeypatch):
+    service = OCRService(cache=OCRCache(str(tmp_path / "cache")))
+    first = tmp_path / "first.pdf"
+    write_text_pdf(first, ["Salary slip gross income 1200000"])
+    retry = tmp_path / "retry.pdf"
+    retry.write_bytes(first.read_bytes())
+
+    text = service.extract_text(str(first))
+    assert "1200000" in text
+
+    def fail(*args):
+        raise AssertionError("cached document was extracted again")
+
+    monkeypatch.setattr(service, "_extract", fail)
+    assert service.extract_text(str(retry)) == text
+
+
+def test_cache_evicts_least_recently_used_entries(tmp_path):
+    cache = OCRCache(str(tmp_path), max_bytes=250)
+    for i in range(3):
+        cache.put(f"key{i}", "x" * 100)
+    assert cache.get("key0") is None
+    assert cache.get("key2") == "x" * 100
+
+
+def test_preprocessing_orients_downscales_and_binarizes():
+    # Phone photo stored landscape with an EXIF "rotate 90" orientation tag
+    photo = Image.new("RGB", (6000, 4000), "white")
+    exif = photo.getexif()
+    exif[0x0112] = 6
+    photo.info["exif"] = exif.tobytes()
+    photo = Image.open(_roundtrip_jpeg(photo))
+
+    prepared, timings = preprocess_image(photo, "identity_proof")
+    assert prepared.mode == "L"
+    assert prepared.height > prepared.width
+    assert max(prepared.size) == PREPROCESS_PROFILES["identity_proof"]["max_long_edge"]
+    assert set(np.unique(np.asarray(prepared))) <= {0, 255}
+    assert {"exif", "downscale", "deskew", "binarize", "total"} <= set(timings)
+
+
+def test_skew_of_rotated_text_block_is_measured():
+    page = np.full((800, 800), 255, dtype=np.uint8)
+    for y in range(200, 600, 40):
+        cv2.line(page, (150, y), (650, y), 0, 8)
+    matrix = cv2.getRotationMatrix2D((400, 400), 5, 1.0)
+    skewed = cv2.warpAffine(page, matrix, (800, 800), borderValue=255)
+    assert abs(abs(estimate_skew(skewed)) - 5) < 1
+
+
+def test_roi_ocr_reads_relevant_lines_first_and_stops_early():
+    card = np.full((600, 900), 255, dtype=np.uint8)
+    for y in range(250, 580, 30):
+        cv2.rectangle(card, (60, y), (700, y + 10), 0, -1)  # small print
+    cv2.rectangle(card, (60, 60), (500, 100), 0, -1)  # large heading
+    image = Image.fromarray(card)
+
+    boxes = detect_text_regions(image)
+    assert len(boxes) == 12
+    assert boxes[0][1] <= 60 and boxes[0][3] >= 40
+
+    # Four lines per batch, as ROI_BATCH_SIZE stacks them
+    batches = iter([" ".join(CARD_LINES[i:i + 4]) for i in range(0, len(CARD_LINES), 4)] + ["should never be read"])
+    calls = []
+
+    def recognize(region):
+        calls.append(region.size)
+        return next(batches)
+
+    text = recognize_regions(image, "identity_proof", recognize, {"full_name": "Test User"})
+    assert len(calls) == 2
+    assert "never" not in text
+    assert not is_sufficient(text, "identity_proof", {"full_name": "Someone Else"})
+    # Name, keyword and ID number alone aren't enough to stop
+    assert not is_sufficient(" ".join(CARD_LINES[:3]), "identity_proof", {"full_name": "Test User"})
+
+
+def test_roi_text_still_feeds_the_overlap_and_phone_checks():
+    from app.services.document_features import extract_document_features
+    from app.services.fraud_service import fraud_service
+
+    card = np.full((600, 900), 255, dtype=np.uint8)
+    for y in range(40, 580, 45):
+        cv2.rectangle(card, (60, y), (700, y + 12), 0, -1)
+    image = Image.fromarray(card)
+
+    def roi_text(document_type):
+        batches = iter(" ".join(CARD_LINES[i:i + 4]) for i in range(0, len(CARD_LINES), 4))
+        return recognize_regions(image, document_type, lambda region: next(batches), {"full_name": "Test User"})
+
+    # The same card uploaded as both identity and address proof
+    documents = [
+        SimpleNamespace(document_type=doc_type, ocr_extracted_text=text, file_path=None,
+                        ocr_features=extract_document_features(text, doc_type))
+        for doc_type, text in (("identity_proof", roi_text("identity_proof")), ("address_proof", roi_text("address_proof")))
+    ]
+    assert "9876543210" in documents[0].ocr_features["phones"]
+    app_data = {"income_annum": 1200000, "loan_amount": 2000000, "loan_term": 10, "cibil_score": 750, "user_full_name": "Test User"}
+    assert "SAME_DOCUMENT_USED_FOR_MULTIPLE_PROOFS" in fraud_service.check_rule_based_fraud(app_data, documents)
+
+
+def _roundtrip_jpeg(image):
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", exif=image.info["exif"])
+    buffer.seek(0)
+    return buffer
+
+
+def test_engine_pool_recycles_and_recovers_workers():
+    pytest.importorskip("tesserocr")
+    from app.services.ocr_engine import OCREngine, _worker_ping
+
+    engine = OCREngine(workers=1, max_jobs=2)
+    if not engine.use_pool:
+        pytest.skip("tesserocr has no language data")
+    try:
+        assert engine.health_check()["healthy"]
+        pids = {engine._get_pool().submit(_worker_ping).result() for _ in range(4)}
+        assert len(pids) >= 2
+
+        page = Image.new("L", (400, 100), 255)
+        assert isinstance(engine.recognize(page, timeout=30), str)
+
+        engine._restart("test")
+        assert engine.health_check()["healthy"]
+    finally:
+        engine.shutdown()
+
+
+def test_engine_jobs_queued_behind_a_busy_worker_do_not_restart_the_pool():
+    import multiprocessing
+    import threading
+    import time
+    from concurrent.futures import ProcessPoolExecutor
+    from app.services.ocr_engine import OCREngine
+
+    engine = OCREngine(workers=1)
+    engine.use_pool = True
+    engine._pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        engine._run(time.sleep, 0, timeout=60)  # start the worker
+
+        # Two 1s jobs on one worker; the second only starts once the first is done
+        errors = []
+        def job():
+            try:
+                engine._run(time.sleep, 1.0, timeout=1.5)
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=job) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == [] and engine.restarts == 0
+
+        # A stale failure report doesn't tear down the current pool
+        current = engine._pool
+        engine._restart("stale", failed=ProcessPoolExecutor(max_workers=1))
+        assert engine._pool is current and engine.restarts == 0
+    finally:
+        engine.shutdown()
+
+
+def _fake_slow_ocr(monkeypatch, seconds, calls):
+    def extract_text(file_path, document_type=None, mode=None, hints=None, content_sha256=None):
+        calls.append(document_type)
+        time.sleep(seconds)
+        return f"{document_type} text"
+
+    monkeypatch.setattr(ocr_service, "extract_text", extract_text)
+
+
+def _scan(tmp_path, name):
+    path = tmp_path / f"{name}.png"
+    Image.new("RGB", (200, 100), "white").save(path)
+    return str(path)
+
+
+def test_documents_of_an_upload_are_extracted_concurrently(monkeypatch, tmp_path):
+    calls = []
+    _fake_slow_ocr(monkeypatch, 0.3, calls)
+    doc_types = ["identity_proof", "address_proof", "income_proof"]
+
+    async def ingest_all():
+        return await asyncio.gather(*(loan._ingest_document(t, _scan(tmp_path, t), "Test User") for t in doc_types))
+
+    started = time.perf_counter()
+    results = asyncio.run(ingest_all())
+    elapsed = time.perf_counter() - started
+
+    assert sorted(calls) == sorted(doc_types)
+    assert [text for text, _, _ in results] == [f"{t} text" for t in doc_types]
+    # Three 0.3s extractions in parallel, not back to back
+    assert elapsed < 0.75
+
+
+def test_ocr_timeout_stores_no_text_instead_of_failing(monkeypatch, tmp_path):
+    from app.services import ocr_service as ocr_module
+
+    def tesseract_timeout(image, timeout):
+        raise RuntimeError("Tesseract process timeout")
+
+    # The per-run limit is enforced inside the worker, as pytesseract does
+    monkeypatch.setattr(ocr_module.ocr_engine, "recognize", tesseract_timeout)
+    monkeypatch.setattr(loan, "ocr_service", OCRService(cache=OCRCache(str(tmp_path / "cache"))))
+
+    text, features, _ = asyncio.run(loan._ingest_document("identity_proof", _scan(tmp_path, "id"), "Test User"))
+    assert text is None
+    assert features["length"] == 0
+
+    documents = [SimpleNamespace(document_type="identity_proof", ocr_extracted_text=None, ocr_features=features, file_path=None)]
+    app_data = {"income_annum": 1200000, "loan_amount": 2000000, "loan_term": 10, "cibil_score": 750, "user_full_name": "Test User"}
+    assert "DOC_OCR_WEAK_IDENTITY_PROOF" in fraud_service.check_rule_based_fraud(app_data, documents)
+
+
+def test_a_saturated_ocr_pool_queues_documents_instead_of_timing_them_out(monkeypatch):
+    from app.services.ocr_service import OCR_MAX_WORKERS
+
+    calls = []
+    _fake_slow_ocr(monkeypatch, 0.3, calls)
+    doc_types = [f"doc_{i}" for i in range(3 * OCR_MAX_WORKERS)]
+
+    async def extract_all(queue_timeout):
+        return await asyncio.gather(*(
+            ocr_service.extract_text_async(f"{t}.png", t, queue_timeout=queue_timeout) for t in doc_types
+        ))
+
+    # The last documents wait ~0.6s for a thread, twice as long as any one job runs
+    assert asyncio.run(extract_all(queue_timeout=5)) == [f"{t} text" for t in doc_types]
+
+    # A queue wait past the limit cancels the job rather than running it late
+    calls.clear()
+    texts = asyncio.run(extract_all(queue_timeout=0.1))
+    time.sleep(0.4)
+    assert texts[:OCR_MAX_WORKERS] == [f"{t} text" for t in doc_types[:OCR_MAX_WORKERS]]
+    assert texts[OCR_MAX_WORKERS:] == [None] * (len(doc_types) - OCR_MAX_WORKERS)
+    assert sorted(calls) == sorted(doc_types[:OCR_MAX_WORKERS])
+
+
+def test_photos_skip_ocr(monkeypatch, tmp_path):
+    calls = []
+    _fake_slow_ocr(monkeypatch, 0, calls)
+    text, features, _ = asyncio.run(loan._ingest_document("photo", _scan(tmp_path, "selfie"), "Test User"))
+    assert calls == [] and text is None
+    assert "photo_flags" in features
@@ -0,0 +1,43 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.passwords import PasswordHasher
+
+
+def test_hashing_runs_off_the_loop_and_sheds_load_when_the_queue_is_full():
+    hasher = PasswordHasher(workers=1, max_pending=2)
+
+    def slow_hash(password):
+        time.sleep(0.2)
+        return password[::-1]
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        clock = asyncio.create_task(ticker())
+        first = asyncio.create_task(hasher._run("hash", slow_hash, "abc"))
+        second = asyncio.create_task(hasher._run("hash", slow_hash, "def"))
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as rejected:
+            await hasher._run("hash", slow_hash, "ghi")
+        results = await asyncio.gather(first, second)
+        clock.cancel()
+        return results, rejected.value, ticks
+
+    results, rejected, ticks = asyncio.run(scenario())
+    hasher.shutdown()
+
+    assert results == ["cba", "fed"]
+    assert rejected.status_code == 503 and rejected.headers["Retry-After"] == "1"
+    # The loop kept running while both hashes (~0.4s) were in progress
+    assert ticks > 20
+    assert hasher.pending == 0
@@ -0,0 +1,35 @@
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.rate_limit import MemoryBuckets, RateLimit, parse_limit, rate_limit, rate_limiter
+
+
+def test_bucket_allows_bursts_then_refills_at_the_configured_rate():
+    buckets = MemoryBuckets(max_keys=2)
+    limit = parse_limit("3/minute")
+    assert limit == RateLimit(3, 60)
+
+    assert [buckets.take("a", limit, now=0)[0] for _ in range(4)] == [True, True, True, False]
+    allowed, retry_after = buckets.take("a", limit, now=0)
+    assert not allowed and retry_after == 20
+    assert buckets.take("a", limit, now=20)[0]
+
+    # Least recently used clients are dropped to bound memory
+    buckets.take("b", limit, now=20)
+    buckets.take("c", limit, now=20)
+    assert len(buckets) == 2 and buckets.take("a", limit, now=20) == (True, 0.0)
+
+
+def test_limited_route_returns_429_with_retry_after():
+    app = FastAPI()
+
+    @app.post("/expensive", dependencies=[Depends(rate_limit("test_expensive", "2/hour"))])
+    def expensive():
+        return {"ok": True}
+
+    rate_limiter.memory.clear()
+    client = TestClient(app)
+    assert [client.post("/expensive").status_code for _ in range(2)] == [200, 200]
+    response = client.post("/expensive")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) == 1800
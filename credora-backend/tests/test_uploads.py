@@ -0,0 +1,67 @@
+import asyncio
+import hashlib
+import io
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from app.core.security import document_url_expiry, sign_document_url, verify_document_signature
+from app.utils.file_response import RangeNotSatisfiable, parse_range
+from app.utils.uploads import IMAGE_TYPES, save_upload
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\n" + b"\x00" * 5000
+
+
+def upload(data, filename="scan.bin"):
+    return UploadFile(file=io.BytesIO(data), filename=filename)
+
+
+def test_upload_is_streamed_hashed_and_named_by_sniffed_type(tmp_path):
+    saved = asyncio.run(save_upload(upload(PNG_BYTES), str(tmp_path), "identity_proof"))
+    assert saved["path"].endswith("identity_proof.png")
+    assert saved["size"] == len(PNG_BYTES)
+    assert saved["sha256"] == hashlib.sha256(PNG_BYTES).hexdigest()
+    assert saved["content_type"] == "image/png"
+
+
+def test_rejected_uploads_leave_nothing_behind(tmp_path):
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(save_upload(upload(b"%PDF-1.4 ..."), str(tmp_path), "photo", allowed_types=IMAGE_TYPES))
+    assert exc.value.status_code == 415
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(save_upload(upload(PNG_BYTES), str(tmp_path), "photo", max_bytes=1000))
+    assert exc.value.status_code == 413
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_range_parsing():
+    assert parse_range(None, 1000) is None
+    assert parse_range("bytes=0-99", 1000) == (0, 99)
+    assert parse_range("bytes=900-", 1000) == (900, 999)
+    assert parse_range("bytes=-100", 1000) == (900, 999)
+    assert parse_range("bytes=990-5000", 1000) == (990, 999)
+    assert parse_range("bytes=0-1,5-6", 1000) is None
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range("bytes=1000-", 1000)
+
+
+def test_document_signatures_bind_document_version_and_expiry():
+    expires = document_url_expiry()
+    sig = sign_document_url(7, "abc", expires)
+    assert verify_document_signature(7, "abc", expires, sig)
+    assert not verify_document_signature(8, "abc", expires, sig)
+    assert not verify_document_signature(7, "def", expires, sig)
+    assert not verify_document_signature(7, "abc", expires + 1, sig)
+    expired = document_url_expiry(now=0)
+    assert not verify_document_signature(7, "abc", expired, sign_document_url(7, "abc", expired))
+
+
+def test_accepts_encoding():
+    from app.utils.file_response import accepts_encoding
+
+    assert accepts_encoding("gzip, deflate, br", "gzip")
+    assert accepts_encoding("br;q=1.0, gzip;q=0.5", "gzip")
+    assert not accepts_encoding("gzip;q=0", "gzip")
+    assert not accepts_encoding("identity", "gzip")
+    assert not accepts_encoding(None, "gzip")
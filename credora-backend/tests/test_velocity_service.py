@@ -0,0 +1,81 @@
+from types import SimpleNamespace
+
+from app.services.document_features import extract_document_features
+from app.services.fraud_rules import fraud_rules
+from app.services.velocity_service import SlidingWindowIndex, VelocityService
+
+NOW = 1_700_000_000.0
+
+
+def make_application(app_id, user_id, full_name="Ravi Kumar", email="ravi@example.com"):
+    return SimpleNamespace(
+        id=app_id,
+        user_id=user_id,
+        income_annum=1200000,
+        created_at=None,
+        user=SimpleNamespace(full_name=full_name, email=email),
+    )
+
+
+def make_identity_doc(text):
+    return SimpleNamespace(
+        document_type="identity_proof",
+        ocr_extracted_text=text,
+        ocr_features=extract_document_features(text, "identity_proof"),
+        file_path=None,
+    )
+
+
+def test_window_counts_and_eviction():
+    index = SlidingWindowIndex(window_hours=2)
+    index.add("k", 1, 10, NOW - 3 * 3600, now=NOW)  # outside window, ignored
+    index.add("k", 2, 10, NOW - 1.5 * 3600, now=NOW)
+    index.add("k", 3, 11, NOW - 600, now=NOW)
+    index.add("k", 3, 11, NOW - 600, now=NOW)  # idempotent
+
+    assert index.count("k", now=NOW) == 2
+    assert index.count("k", hours=1, now=NOW) == 1
+    assert index.distinct_accounts("k", now=NOW) == 2
+    assert index.count("k", now=NOW + 3600) == 1
+    assert index.distinct_accounts("k", now=NOW + 3 * 3600) == 0
+
+
+def test_out_of_order_timestamps_are_counted_and_evicted_by_time():
+    index = SlidingWindowIndex(window_hours=2)
+    index.add("k", 1, 10, NOW - 600, now=NOW)
+    index.add("k", 2, 11, NOW - 1.5 * 3600, now=NOW)  # older application recorded later
+    index.add("k", 3, 12, NOW - 300, now=NOW)
+
+    assert index.count("k", hours=1, now=NOW) == 2
+    assert index.count("k", now=NOW) == 3
+    # The older entry expires first even though it arrived second
+    assert index.count("k", now=NOW + 0.75 * 3600) == 2
+    assert index.distinct_accounts("k", now=NOW + 0.75 * 3600) == 2
+
+
+def test_shared_identity_and_velocity_flags():
+    service = VelocityService()
+    pan_doc = make_identity_doc("Income Tax Department PAN ABCDE1234F Ravi Kumar")
+
+    assert service.check_application(make_application(1, 10), [pan_doc], now=NOW) == []
+
+    flags = service.check_application(
+        make_application(2, 11, full_name="Someone Else", email="x@other.com"), [pan_doc], now=NOW
+    )
+    assert flags == ["IDENTITY_SHARED_ACROSS_ACCOUNTS"]
+
+    for app_id in range(3, 7):
+        flags = service.check_application(make_application(app_id, 10), [], now=NOW)
+    assert "HIGH_APPLICATION_VELOCITY" in flags
+
+
+def test_a_shared_name_and_income_is_only_a_weak_signal():
+    service = VelocityService()
+    assert service.check_application(make_application(1, 10), [], now=NOW) == []
+    # Another applicant with the same common name and income, nothing else in common
+    flags = service.check_application(make_application(2, 11, email="ravi.k@example.org"), [], now=NOW)
+    assert flags == ["NAME_AND_INCOME_SHARED_ACROSS_ACCOUNTS"]
+
+    rules = fraud_rules.get()
+    assert rules.flag_weight("NAME_AND_INCOME_SHARED_ACROSS_ACCOUNTS") < rules.flag_weight("SOME_OTHER_FLAG")
+    assert rules.flag_weight("SOME_OTHER_FLAG") < rules.flag_weight("IDENTITY_SHARED_ACROSS_ACCOUNTS")
@@ -46,7 +46,14 @@ const AdminAnalytics = () => {
 
   const fetchAnalytics = async () => {
     try {
-      const data = await loanService.getAllApplications();
+      // Only fetch the selected time range
+      const params = {};
+      if (timeRange) {
+        const cutoffDate = new Date();
+        cutoffDate.setDate(cutoffDate.getDate() - parseInt(timeRange));
+        params.created_from = cutoffDate.toISOString();
+      }
+      const data = await loanService.getAllApplications(params);
       setApplications(data);
     } catch (err) {
       showToast.error('Failed to load analytics data');
@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { Shield, Users, FileText, TrendingUp, LogOut, Eye, Check, X, Clock, Search, BarChart3 } from 'lucide-react';
 import { loanService } from '../services/loanService';
@@ -10,24 +10,65 @@ const AdminDashboard = () => {
   const navigate = useNavigate();
   const { user, logout } = useAuth();
   const [applications, setApplications] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [counts, setCounts] = useState({ total: 0, by_status: {} });
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [filter, setFilter] = useState('ALL');
   const [searchTerm, setSearchTerm] = useState('');
+  const [search, setSearch] = useState('');
   const [processing, setProcessing] = useState({});
+  // Only the latest request may update the list (filters can change mid-flight)
+  const requestId = useRef(0);
 
+  // Wait for a pause in typing before searching on the server
   useEffect(() => {
-    fetchAllApplications();
-  }, []);
+    const timer = setTimeout(() => setSearch(searchTerm.trim()), 300);
+    return () => clearTimeout(timer);
+  }, [searchTerm]);
 
-  const fetchAllApplications = async () => {
+  useEffect(() => {
+    fetchFirstPage();
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [filter, search]);
+
+  // Status and search are filtered on the server; the list is loaded a page at a time
+  const pageParams = () => ({
+    ...(filter !== 'ALL' ? { status: filter } : {}),
+    ...(search ? { search } : {}),
+  });
+
+  const fetchFirstPage = async () => {
+    const id = ++requestId.current;
+    setLoading(true);
     try {
-      // You'll need to create an admin endpoint to get all applications
-      const data = await loanService.getAllApplications();
-      setApplications(data);
+      const [page, countData] = await Promise.all([
+        loanService.getApplicationsPage(pageParams()),
+        loanService.getApplicationCounts(search ? { search } : {}),
+      ]);
+      if (id !== requestId.current) return;
+      setApplications(page.items);
+      setNextCursor(page.nextCursor);
+      setCounts(countData);
     } catch (err) {
       console.error('Failed to load applications');
     } finally {
-      setLoading(false);
+      if (id === requestId.current) setLoading(false);
+    }
+  };
+
+  const fetchNextPage = async () => {
+    const id = requestId.current;
+    setLoadingMore(true);
+    try {
+      const page = await loanService.getApplicationsPage(pageParams(), nextCursor);
+      if (id !== requestId.current) return;
+      setApplications(prev => [...prev, ...page.items]);
+      setNextCursor(page.nextCursor);
+    } catch (err) {
+      showToast.error('Failed to load more applications');
+    } finally {
+      setLoadingMore(false);
     }
   };
 
@@ -37,7 +78,7 @@ const AdminDashboard = () => {
       await loanService.reviewApplication(applicationId, decision);
       showToast.success(`Application ${decision.toLowerCase()} successfully!`);
       // Refresh applications
-      await fetchAllApplications();
+      await fetchFirstPage();
     } catch (err) {
       showToast.error('Failed to update application');
     } finally {
@@ -50,21 +91,12 @@ const AdminDashboard = () => {
     navigate('/login');
   };
 
-  const filteredApplications = applications.filter(app => {
-    const matchesFilter = filter === 'ALL' || app.status === filter;
-    const matchesSearch = 
-      app.id.toString().includes(searchTerm) ||
-      app.user?.full_name?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-      app.user?.email?.toLowerCase().includes(searchTerm.toLowerCase());
-    return matchesFilter && matchesSearch;
-  });
-
   const stats = {
-    total: applications.length,
-    pending: applications.filter(app => app.status === 'PENDING').length,
-    underReview: applications.filter(app => app.status === 'UNDER_REVIEW').length,
-    approved: applications.filter(app => app.status === 'APPROVED').length,
-    rejected: applications.filter(app => app.status === 'REJECTED').length,
+    total: counts.total,
+    pending: counts.by_status.PENDING || 0,
+    underReview: counts.by_status.UNDER_REVIEW || 0,
+    approved: counts.by_status.APPROVED || 0,
+    rejected: counts.by_status.REJECTED || 0,
   };
 
   const getStatusBadge = (status) => {
@@ -227,7 +259,7 @@ const AdminDashboard = () => {
                 <div className="animate-spin rounded-full h-12 w-12 border-b-2 border-blue-600 outline-none mx-auto mb-4"></div>
                 <p className="text-gray-600 dark:text-gray-400">Loading applications...</p>
               </div>
-            ) : filteredApplications.length === 0 ? (
+            ) : applications.length === 0 ? (
               <div className="p-12 text-center text-gray-500 dark:text-gray-400">
                 <FileText className="mx-auto mb-4 text-gray-400" size={48} />
                 <p>No applications found</p>
@@ -247,7 +279,7 @@ const AdminDashboard = () => {
                   </tr>
                 </thead>
                 <tbody className="divide-y divide-gray-200 dark:divide-gray-700">
-                  {filteredApplications.map((app) => (
+                  {applications.map((app) => (
                     <tr key={app.id} className="hover:bg-blue-50 dark:hover:bg-gray-700 transition">
                       <td className="px-6 py-4 text-sm font-bold text-gray-900 dark:text-white">#{app.id}</td>
                       <td className="px-6 py-4">
@@ -331,6 +363,17 @@ const AdminDashboard = () => {
               </table>
             )}
           </div>
+          {!loading && nextCursor && (
+            <div className="p-4 text-center border-t border-gray-200 dark:border-gray-700">
+              <button
+                onClick={fetchNextPage}
+                disabled={loadingMore}
+                className="px-4 py-2 bg-gray-100 dark:bg-gray-700 text-gray-700 dark:text-gray-300 rounded-lg hover:bg-gray-200 dark:hover:bg-gray-600 transition disabled:opacity-50"
+              >
+                {loadingMore ? 'Loading...' : 'Load more'}
+              </button>
+            </div>
+          )}
         </div>
       </div>
     </div>
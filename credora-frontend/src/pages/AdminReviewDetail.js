@@ -201,10 +201,11 @@ const AdminReviewDetail = () => {
                       {doc.type === 'photo' ? (
                         <div 
                           className="cursor-pointer"
-                          onClick={() => setSelectedImage(doc.url)}
+                          onClick={() => setSelectedImage(doc.preview_url || doc.url)}
                         >
                           <img 
-                            src={doc.url} 
+                            src={doc.thumbnail_url || doc.url} 
+                            loading="lazy"
                             alt={doc.name} 
                             className="w-full h-48 object-cover rounded-lg mb-3"
                           />
@@ -218,9 +219,20 @@ const AdminReviewDetail = () => {
                         </div>
                       ) : (
                         <div>
-                          <div className="w-full h-32 bg-gray-100 dark:bg-gray-800 rounded-lg flex items-center justify-center mb-3">
-                            <FileText className="text-gray-400" size={48} />
-                          </div>
+                          {doc.thumbnail_url ? (
+                            <img
+                              src={doc.thumbnail_url}
+                              alt={doc.name}
+                              loading="lazy"
+                              onClick={() => setSelectedImage(doc.preview_url)}
+                              onError={(e) => { e.currentTarget.style.display = 'none'; }}
+                              className="w-full h-32 object-contain bg-gray-100 dark:bg-gray-800 rounded-lg mb-3 cursor-pointer"
+                            />
+                          ) : (
+                            <div className="w-full h-32 bg-gray-100 dark:bg-gray-800 rounded-lg flex items-center justify-center mb-3">
+                              <FileText className="text-gray-400" size={48} />
+                            </div>
+                          )}
                           <div className="flex items-center justify-between">
                             <div className="flex-1 min-w-0">
                               <p className="font-semibold text-gray-900 dark:text-white text-sm truncate">{doc.name}</p>
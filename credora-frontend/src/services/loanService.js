@@ -45,12 +45,35 @@ export const loanService = {
     return response.data;
   },
 
-  // Admin: Get all applications
-  getAllApplications: async () => {
-    const response = await api.get('/api/loan/admin/all-applications');
+  // Admin: Get one page of applications (newest first). Filters: status, final_decision,
+  // min_fraud_score, max_fraud_score, created_from, created_to, user_id, search, order, limit.
+  // nextCursor is null on the last page.
+  getApplicationsPage: async (params = {}, cursor = null) => {
+    const response = await api.get('/api/loan/admin/all-applications', {
+      params: { ...params, ...(cursor ? { cursor } : {}) },
+    });
+    return { items: response.data, nextCursor: response.headers['x-next-cursor'] || null };
+  },
+
+  // Admin: Number of applications per status ({ total, by_status }); optional search
+  getApplicationCounts: async (params = {}) => {
+    const response = await api.get('/api/loan/admin/application-counts', { params });
     return response.data;
   },
 
+  // Admin: Get all applications matching the filters, following the page cursors.
+  // Only for bounded result sets (e.g. a date range); lists should page instead.
+  getAllApplications: async (params = {}) => {
+    const applications = [];
+    let cursor = null;
+    do {
+      const page = await loanService.getApplicationsPage({ limit: 200, ...params }, cursor);
+      applications.push(...page.items);
+      cursor = page.nextCursor;
+    } while (cursor);
+    return applications;
+  },
+
   // Admin: Review application (approve/reject)
   reviewApplication: async (applicationId, decision) => {
     const response = await api.post(`/api/loan/review/${applicationId}`, 
@@ -13,16 +13,36 @@ const DashboardScreen = () => {
   const navigation = useNavigation();
   const [applications, setApplications] = useState([]);
   const [loading, setLoading] = useState(true);
+  // Admin listing is keyset paginated: cursor of the next page, null on the last one
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  // Admin totals come from the server; the loaded pages are only part of the list
+  const [counts, setCounts] = useState(null);
 
   useEffect(() => {
     fetchApplications();
   }, []);
 
+  const fetchAdminPage = async (cursor = null) => {
+    const res = await api.get('/api/loan/admin/all-applications', {
+      params: cursor ? { cursor } : {},
+    });
+    setApplications(prev => (cursor ? [...prev, ...res.data] : res.data));
+    setNextCursor(res.headers['x-next-cursor'] || null);
+  };
+
   const fetchApplications = async () => {
     try {
-      const endpoint = user?.is_admin ? '/api/loan/admin/all-applications' : '/api/loan/my-applications';
-      const res = await api.get(endpoint);
-      setApplications(res.data);
+      if (user?.is_admin) {
+        const [, countsRes] = await Promise.all([
+          fetchAdminPage(),
+          api.get('/api/loan/admin/application-counts'),
+        ]);
+        setCounts(countsRes.data);
+      } else {
+        const res = await api.get('/api/loan/my-applications');
+        setApplications(res.data);
+      }
     } catch (err) {
       console.error(err);
     } finally {
@@ -30,6 +50,23 @@ const DashboardScreen = () => {
     }
   };
 
+  const loadMore = async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      await fetchAdminPage(nextCursor);
+    } catch (err) {
+      console.error(err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const totalCount = counts ? counts.total : applications.length;
+  const approvedCount = counts
+    ? (counts.by_status.APPROVED || 0)
+    : applications.filter(a => a.status === 'APPROVED').length;
+
   const getStatusColor = (status) => {
     if (status === 'APPROVED') return tw`bg-green-100 text-green-700`;
     if (status === 'REJECTED') return tw`bg-red-100 text-red-700`;
@@ -61,12 +98,12 @@ const DashboardScreen = () => {
         <View style={tw`flex-row flex-wrap justify-between mb-6`}>
           <View style={tw`w-[48%] bg-white dark:bg-gray-800 p-5 rounded-2xl shadow-sm border-l-4 border-blue-500 mb-4`}>
             <Text style={tw`text-gray-500 dark:text-gray-400 font-bold text-xs uppercase tracking-wider mb-1`}>Total</Text>
-            <Text style={tw`text-3xl font-black dark:text-white`}>{applications.length}</Text>
+            <Text style={tw`text-3xl font-black dark:text-white`}>{totalCount}</Text>
           </View>
           <View style={tw`w-[48%] bg-white dark:bg-gray-800 p-5 rounded-2xl shadow-sm border-l-4 border-green-500 mb-4`}>
             <Text style={tw`text-gray-500 dark:text-gray-400 font-bold text-xs uppercase tracking-wider mb-1`}>Approved</Text>
             <Text style={tw`text-3xl font-black text-green-600 dark:text-green-400`}>
-              {applications.filter(a => a.status === 'APPROVED').length}
+              {approvedCount}
             </Text>
           </View>
         </View>
@@ -129,6 +166,22 @@ const DashboardScreen = () => {
             </View>
           ))
         )}
+
+        {!loading && nextCursor && (
+          <TouchableOpacity
+            onPress={loadMore}
+            disabled={loadingMore}
+            style={tw`mt-2 bg-blue-600 py-3 rounded-xl items-center justify-center`}
+          >
+            {loadingMore ? (
+              <ActivityIndicator color="white" />
+            ) : (
+              <Text style={tw`text-white font-bold text-sm tracking-wide`}>
+                Load more ({applications.length} of {totalCount})
+              </Text>
+            )}
+          </TouchableOpacity>
+        )}
       </ScrollView>
     </View>
   );